@@ -1,9 +1,35 @@
 from django.contrib import admin
+from .forms import DirectUploadModelForm
 from .models import Bio, Post, Video, Project
 
 
+class BioForm(DirectUploadModelForm):
+    direct_upload_fields = ('image', 'resume')
+    
+    class Meta:
+        model = Bio
+        fields = '__all__'
+
+
+class PostForm(DirectUploadModelForm):
+    direct_upload_fields = ('image',)
+    
+    class Meta:
+        model = Post
+        fields = '__all__'
+
+
+class ProjectForm(DirectUploadModelForm):
+    direct_upload_fields = ('image',)
+    
+    class Meta:
+        model = Project
+        fields = '__all__'
+
+
 @admin.register(Bio)
 class BioAdmin(admin.ModelAdmin):
+    form = BioForm
     list_display = ('__str__', 'updated_at')
     
     fieldsets = (
@@ -27,6 +53,7 @@ class BioAdmin(admin.ModelAdmin):
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
+    form = PostForm
     list_display = ('title', 'author', 'tags', 'is_published', 'date_published')
     list_filter = ('tags', 'is_published', 'date_published', 'author')
     search_fields = ('title', 'excerpt', 'content')
@@ -70,6 +97,7 @@ class VideoAdmin(admin.ModelAdmin):
 
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
+    form = ProjectForm
     list_display = ('title', 'stack', 'website_url', 'github_url', 'is_published', 'created_at')
     list_filter = ('is_published', 'created_at')
     search_fields = ('title', 'description', 'stack')
@@ -0,0 +1,308 @@
+"""
+Prebuilt artifacts (search and suggest indexes, ...) shared by every worker.
+
+An artifact is built from the DynamoDB items, serialised to bytes and kept
+in the "artifacts" storage. Each worker keeps the parsed object in memory
+and requests only ever read that copy: loading it, checking the storage for
+a newer build (at most every ARTIFACT_REFRESH_SECONDS) and building a
+missing artifact from DynamoDB all happen on a background thread. Until a
+worker's first load finishes, get() raises ArtifactUnavailable and views
+answer 503; afterwards a stale copy is served while the newer one loads.
+
+update() is a compare-and-swap: the change is written only if the stored
+artifact is still the version it was applied to (an S3 If-Match on the
+ETag, or the modification time checked under a file lock for local
+storage). Otherwise it is re-applied to the newer version, so concurrent
+saves in different processes don't drop each other's changes.
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, storages
+from storages.utils import clean_name, safe_join
+from .signals import content_deleted, content_saved
+
+logger = logging.getLogger(__name__)
+
+# Loads and builds, off the request path
+_loader = ThreadPoolExecutor(max_workers=2, thread_name_prefix='artifacts')
+
+
+class ArtifactUnavailable(Exception):
+    """The artifact isn't loaded in this worker yet; it is loading or being built"""
+
+    retry_after = 1
+
+    def __init__(self, name):
+        super().__init__(f'{name} is not loaded yet')
+        self.name = name
+
+
+class ArtifactConflict(Exception):
+    """update() kept losing the race to other writers"""
+
+
+def get_storage():
+    return storages['artifacts']
+
+
+class S3Versions:
+    """
+    Versioned reads and conditional writes of artifacts on S3, by ETag.
+    botocore is imported per call: workers with local storage never load it.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.client = storage.connection.meta.client
+
+    def key(self, name):
+        return safe_join(self.storage.location, clean_name(name))
+
+    def version(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.storage.bucket_name, Key=self.key(name))['ETag']
+        except ClientError as e:
+            if e.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+                return None
+            raise
+
+    def read(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            obj = self.client.get_object(Bucket=self.storage.bucket_name, Key=self.key(name))
+        except ClientError as e:
+            if e.response['ResponseMetadata']['HTTPStatusCode'] == 404:
+                return None, None
+            raise
+        return obj['Body'].read(), obj['ETag']
+
+    def write(self, name, data, expected=None, force=False):
+        """The new version, or None if the stored version isn't `expected` (None: doesn't exist)"""
+        from botocore.exceptions import ClientError
+
+        params = dict(self.storage.get_object_parameters(name), Bucket=self.storage.bucket_name,
+                      Key=self.key(name), Body=data)
+        if self.storage.default_acl:
+            params['ACL'] = self.storage.default_acl
+        if not force:
+            if expected is None:
+                params['IfNoneMatch'] = '*'
+            else:
+                params['IfMatch'] = expected
+        try:
+            return self.client.put_object(**params)['ETag']
+        except ClientError as e:
+            # 409 when a concurrent conditional write to the same key is in flight
+            if e.response['ResponseMetadata']['HTTPStatusCode'] in (409, 412):
+                return None
+            raise
+
+
+class FileVersions:
+    """Versioned reads and conditional writes of artifacts on a local disk, by modification time"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def version(self, name):
+        try:
+            return os.stat(self.storage.path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def read(self, name):
+        try:
+            with open(self.storage.path(name), 'rb') as f:
+                return f.read(), os.fstat(f.fileno()).st_mtime_ns
+        except FileNotFoundError:
+            return None, None
+
+    def write(self, name, data, expected=None, force=False):
+        """The new version, or None if the stored version isn't `expected` (None: doesn't exist)"""
+        path = self.storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f'{path}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not force and self.version(name) != expected:
+                return None
+            temporary = f'{path}.{os.getpid()}.{threading.get_ident()}'
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+            version = self.version(name)
+            if version == expected:
+                # A write within the filesystem's timestamp resolution; make the change visible
+                os.utime(path, ns=(version + 1, version + 1))
+                version += 1
+            return version
+
+
+def versions(storage):
+    if isinstance(storage, FileSystemStorage):
+        return FileVersions(storage)
+    # Only imported for S3 storage: it loads boto3, which local storage doesn't need
+    from storages.backends.s3 import S3Storage
+    if isinstance(storage, S3Storage):
+        return S3Versions(storage)
+    raise TypeError(f'Artifacts need an S3 or file system storage, not {type(storage).__name__}')
+
+
+class Artifact:
+    """
+    A named artifact with a per-worker in-memory copy
+
+    Args:
+        name: File name in the artifacts storage
+        loads: bytes -> object
+        dumps: object -> bytes
+        build: () -> object, a full rebuild from DynamoDB used when the
+               artifact doesn't exist yet
+    """
+
+    def __init__(self, name, loads, dumps, build):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.build = build
+        self._value = None
+        self._version = None
+        self._checked_at = None
+        self._loading = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        The in-memory object; a check for a newer one is started in the
+        background when it is due
+
+        Raises:
+            ArtifactUnavailable: This worker hasn't loaded the artifact yet
+        """
+        checked_at = self._checked_at
+        if checked_at is None or time.monotonic() - checked_at >= settings.ARTIFACT_REFRESH_SECONDS:
+            self._refresh_in_background()
+        value = self._value
+        if value is None:
+            raise ArtifactUnavailable(self.name)
+        return value
+
+    def load(self):
+        """Wait for the artifact to be loaded (built if missing); for warm-up and commands"""
+        self._refresh_in_background().result()
+        if self._value is None:
+            raise ArtifactUnavailable(self.name)
+        return self._value
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._loading is None or self._loading.done():
+                self._checked_at = time.monotonic()
+                self._loading = _loader.submit(self._refresh)
+            return self._loading
+
+    def _refresh(self):
+        store = versions(get_storage())
+        try:
+            version = store.version(self.name)
+            if version is None:
+                # First deploy or a wiped bucket; if another worker publishes first, theirs is loaded
+                value = self.build()
+                version = store.write(self.name, self.dumps(value))
+                if version is not None:
+                    self._set(value, version)
+                    return
+            if version is None or version != self._version:
+                data, version = store.read(self.name)
+                if data is not None:
+                    self._set(self.loads(data), version)
+        except Exception:
+            # Keep serving the copy we have; the storage is retried next interval
+            logger.exception('Could not load artifact', extra={'artifact': self.name})
+
+    def _set(self, value, version):
+        with self._lock:
+            self._value, self._version = value, version
+
+    def publish(self, value):
+        """Replace the artifact for every worker (this one immediately)"""
+        version = versions(get_storage()).write(self.name, self.dumps(value), force=True)
+        self._set(value, version)
+
+    def update(self, change):
+        """
+        Apply `change(value) -> value` to the latest published artifact,
+        re-applying it if another process published in between
+
+        Raises:
+            ArtifactConflict: Still losing after ARTIFACT_UPDATE_ATTEMPTS tries
+        """
+        store = versions(get_storage())
+        for attempt in range(settings.ARTIFACT_UPDATE_ATTEMPTS):
+            data, version = store.read(self.name)
+            if data is None:
+                # Nothing to change yet: the build includes this item, which is already saved
+                self._refresh_in_background()
+                return
+            value = change(self.loads(data))
+            new_version = store.write(self.name, self.dumps(value), version)
+            if new_version is not None:
+                self._set(value, new_version)
+                return
+            time.sleep(0.05 * (attempt + 1))
+        raise ArtifactConflict(f'{self.name} changed under every update attempt')
+
+    def rebuild(self):
+        self.publish(self.build())
+
+    def connect(self, kinds, to_entry, add):
+        """
+        Keep the artifact in step with saved and deleted items
+
+        A published item's entry is added (or replaced); unpublished and
+        deleted items are dropped with `without(kind, id)`. Failures are
+        logged: the next save or a `rebuild_indexes` run brings the artifact
+        back in line.
+
+        Args:
+            kinds: {model class name: kind} of the items the artifact covers
+            to_entry: (kind, item) -> the item's entry
+            add: (current, entry) -> the object with the entry added
+        """
+
+        def saved(sender, item, **kwargs):
+            kind = kinds.get(sender.__name__)
+            if kind is None:
+                return
+            try:
+                if item.is_published:
+                    entry = to_entry(kind, item)
+                    self.update(lambda current: add(current, entry))
+                else:
+                    self.update(lambda current: current.without(kind, item.id))
+            except Exception:
+                self._update_failed(kind, item)
+
+        def deleted(sender, item, **kwargs):
+            kind = kinds.get(sender.__name__)
+            if kind is None:
+                return
+            try:
+                self.update(lambda current: current.without(kind, item.id))
+            except Exception:
+                self._update_failed(kind, item)
+
+        # Strong references: the receivers live as long as the artifact
+        content_saved.connect(saved, weak=False, dispatch_uid=f'artifact-saved:{self.name}')
+        content_deleted.connect(deleted, weak=False, dispatch_uid=f'artifact-deleted:{self.name}')
+
+    def _update_failed(self, kind, item):
+        logger.exception('Artifact update failed', extra={'artifact': self.name, 'type': kind, 'id': item.id})
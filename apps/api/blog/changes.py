@@ -0,0 +1,136 @@
+"""
+Change log of the content served by the API.
+
+Every save() and delete() of a bio, post, project or video
+(blog/pynamo_models.py) appends an entry to the Change table: the item's
+type, id and slug, whether it is now published, unpublished or deleted (a
+tombstone), and its updated_at. Entries share one partition, sorted by
+'<logged at>~<type>~<id>', so `/api/v1/changes/?since=` is a single Query
+over the changes after the client's cursor, costing O(changes) instead of a
+refetch of every list.
+
+A cursor is the sort key of the last entry a client has seen; `since` also
+takes an ISO 8601 timestamp or Unix time. Keys are separated by '~', which
+needs no escaping in a query string (cursors logged with '#' still parse).
+Entries newer than CHANGE_LOG_SETTLE_SECONDS are held back, so a write
+logged a moment late by another worker is never skipped. Entries expire
+(DynamoDB TTL) after CHANGE_LOG_RETENTION_DAYS; older cursors get
+CursorExpired, and the client refetches everything instead.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION = 'changes'
+
+SOURCES = {'Bio': 'bio', 'Post': 'post', 'Project': 'project', 'Video': 'video'}
+
+STAMP_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'  # Fixed width, so keys sort by time
+
+SEPARATOR = '~'  # Unreserved in URLs, so cursors survive unencoded in ?since=
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the change log's retention"""
+
+
+def stamp(moment):
+    return moment.astimezone(timezone.utc).strftime(STAMP_FORMAT)
+
+
+def status_of(item, deleted=False):
+    if deleted:
+        return 'deleted'
+    return 'published' if getattr(item, 'is_published', True) else 'unpublished'
+
+
+def record(item, deleted=False):
+    """Log a saved or deleted item; failures are logged, never raised (the item is already written)"""
+    from .pynamo_models import Change
+
+    kind = SOURCES.get(type(item).__name__)
+    if kind is None:
+        return
+    now = datetime.now(timezone.utc)
+    try:
+        Change(
+            PARTITION,
+            SEPARATOR.join((stamp(now), kind, item.id)),
+            item_id=item.id,
+            item_type=kind,
+            slug=getattr(item, 'slug', None),
+            status=status_of(item, deleted),
+            updated_at=now if deleted else item.updated_at,
+            expires_at=timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS),
+        ).save()
+    except Exception:
+        # Clients that miss it pick it up on their next full refetch
+        logger.exception('Change log write failed', extra={'type': kind, 'id': item.id})
+
+
+def parse_since(value):
+    """The sort key after which to read: `value` as a cursor, ISO 8601 timestamp or Unix time"""
+    value = value.strip().replace('#', SEPARATOR)  # Cursors from before the '~' separator
+    if SEPARATOR in value:
+        moment = value.split(SEPARATOR, 1)[0]
+        datetime.strptime(moment, STAMP_FORMAT)  # Raises ValueError on a malformed cursor
+        return value
+    try:
+        moment = datetime.fromtimestamp(float(value), timezone.utc)
+    except ValueError:
+        # '+' in a query string arrives as a space
+        moment = datetime.fromisoformat(value.replace(' ', '+').replace('Z', '+00:00'))
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+    # A prefix of every key with the same stamp sorts before them, so they're included
+    return f'{stamp(moment)}{SEPARATOR}'
+
+
+def current_cursor():
+    """A cursor covering everything logged so far: where a client that just fetched everything starts"""
+    return f'{stamp(datetime.now(timezone.utc) - timedelta(seconds=settings.CHANGE_LOG_SETTLE_SECONDS))}{SEPARATOR}'
+
+
+def changes_since(cursor, limit):
+    """
+    Up to `limit` log entries after `cursor`, the latest per item, with the
+    cursor to continue from
+
+    Returns:
+        dict: {'changes': [...], 'cursor': str, 'has_more': bool}
+    """
+    from .pynamo_models import Change
+
+    now = datetime.now(timezone.utc)
+    if cursor < stamp(now - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)):
+        raise CursorExpired('The cursor is older than the change log; refetch everything')
+    upper = current_cursor()
+    if cursor >= upper:
+        return {'changes': [], 'cursor': cursor, 'has_more': False}
+
+    # between() is inclusive, so the entry at the cursor may come back too
+    entries = [
+        entry for entry in Change.query(PARTITION, Change.sk.between(cursor, upper), limit=limit + 2)
+        if entry.sk != cursor
+    ]
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.item_type, entry.item_id), None)  # Re-inserted at its latest position
+        latest[(entry.item_type, entry.item_id)] = {
+            'type': entry.item_type,
+            'id': entry.item_id,
+            'slug': entry.slug,
+            'status': entry.status,
+            'updated_at': entry.updated_at.strftime(STAMP_FORMAT),
+        }
+    return {
+        'changes': list(latest.values()),
+        'cursor': entries[-1].sk if has_more else upper,
+        'has_more': has_more,
+    }
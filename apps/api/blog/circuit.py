@@ -0,0 +1,148 @@
+"""
+Circuit breakers around DynamoDB, one per table.
+
+Every call a model's connection dispatches is recorded. When, within the
+last DYNAMODB_CIRCUIT_WINDOW_SECONDS, at least DYNAMODB_CIRCUIT_MIN_CALLS
+calls were made and DYNAMODB_CIRCUIT_FAILURE_RATE of them failed with
+throttling, a server error or a network error, the table's circuit opens:
+calls fail immediately with CircuitOpenError instead of queueing behind
+retries. After DYNAMODB_CIRCUIT_OPEN_SECONDS one probe call is let through
+(half-open); its outcome closes the circuit or opens it again.
+
+Views answer from the last good cached response while a circuit is open
+(see blog/response_cache.py). This module is loaded with the models, before
+Django is set up, so it reads its settings from blog/dynamo_config.py.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from botocore.exceptions import BotoCoreError, ClientError
+from . import dynamo_config
+from .deadlines import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+# Error codes that say the table is struggling, not that the request was wrong
+FAILURE_CODES = frozenset([
+    'InternalServerError',
+    'LimitExceededException',
+    'ProvisionedThroughputExceededException',
+    'RequestLimitExceeded',
+    'ServiceUnavailable',
+    'ThrottlingException',
+])
+
+
+class CircuitOpenError(Exception):
+    """A call was refused because its table's circuit is open"""
+
+    def __init__(self, table, retry_after):
+        super().__init__(f'DynamoDB table {table} is unavailable (circuit open)')
+        self.table = table
+        self.retry_after = retry_after
+
+
+def is_failure(error):
+    if isinstance(error, ClientError):
+        return error.response.get('Error', {}).get('Code') in FAILURE_CODES
+    return isinstance(error, BotoCoreError)  # Timeouts, connection errors
+
+
+class CircuitBreaker:
+    def __init__(self, name, window_seconds=None, min_calls=None, failure_rate=None, open_seconds=None):
+        self.name = name
+        self.window_seconds = window_seconds or dynamo_config.DYNAMODB_CIRCUIT_WINDOW_SECONDS
+        self.min_calls = min_calls or dynamo_config.DYNAMODB_CIRCUIT_MIN_CALLS
+        self.failure_rate = failure_rate or dynamo_config.DYNAMODB_CIRCUIT_FAILURE_RATE
+        self.open_seconds = open_seconds or dynamo_config.DYNAMODB_CIRCUIT_OPEN_SECONDS
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.probing = False
+        self.outcomes = deque()  # (time, failed)
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may go ahead"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return
+            raise CircuitOpenError(self.name, max(remaining, 1.0))
+
+    def record(self, failed):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN and self.probing:
+                self.probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CLOSED
+                    self.outcomes.clear()
+                    logger.info('Circuit closed', extra={'table': self.name})
+                return
+
+            self.outcomes.append((now, failed))
+            while self.outcomes and self.outcomes[0][0] < now - self.window_seconds:
+                self.outcomes.popleft()
+            failures = sum(1 for _, f in self.outcomes if f)
+            if (
+                self.state == CLOSED and len(self.outcomes) >= self.min_calls
+                and failures / len(self.outcomes) >= self.failure_rate
+            ):
+                self._open(now)
+
+    def release(self):
+        """The call was never made: free the probe slot without recording an outcome"""
+        with self._lock:
+            self.probing = False
+
+    def reset(self):
+        """Close the circuit and forget the recorded outcomes"""
+        with self._lock:
+            self.state = CLOSED
+            self.probing = False
+            self.outcomes.clear()
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.outcomes.clear()
+        logger.warning('Circuit opened', extra={'table': self.name})
+
+    def call(self, fn, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except DeadlineExceeded:
+            # The request ran out of time, which says nothing about the table
+            self.release()
+            raise
+        except Exception as e:
+            self.record(is_failure(e))
+            raise
+        self.record(False)
+        return result
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(table):
+    with _breakers_lock:
+        if table not in _breakers:
+            _breakers[table] = CircuitBreaker(table)
+        return _breakers[table]
+
@@ -0,0 +1,97 @@
+"""
+Precompressed variants of cached responses.
+
+When the response cache (blog/response_cache.py) stores a response, its body
+is rendered to JSON once and compressed with gzip and brotli once. Each
+request then gets the variant its Accept-Encoding prefers, sent as stored:
+a cache hit costs neither rendering nor compression, where GZipMiddleware
+would recompress the same list on every request. Every variant has its own
+ETag, so revalidations answer 304 without a body.
+
+`manage.py benchmark_compression` compares both on the posts list.
+"""
+
+import gzip
+import hashlib
+import brotli
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+# Preferred first, when the client accepts several
+ENCODINGS = ('br', 'gzip')
+
+# Set on the response itself rather than carried over from the cached headers
+OWN_HEADERS = ('content-type', 'content-length', 'content-encoding', 'etag', 'vary')
+
+
+def accepted_encodings(header):
+    """{content-coding: qvalue} from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class Representation:
+    """A rendered JSON body and its encodings, keyed by content-coding ('identity' for none)"""
+
+    def __init__(self, bodies):
+        self.bodies = bodies
+        self.etag = hashlib.sha256(bodies['identity']).hexdigest()[:32]
+
+    @classmethod
+    def render(cls, data):
+        body = JSONRenderer().render(data)
+        bodies = {'identity': body}
+        if len(body) >= settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            # mtime=0 keeps the bytes identical for identical content
+            encoded = {
+                'br': brotli.compress(body, quality=settings.RESPONSE_BROTLI_QUALITY, mode=brotli.MODE_TEXT),
+                'gzip': gzip.compress(body, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0),
+            }
+            bodies.update((coding, data) for coding, data in encoded.items() if len(data) < len(body))
+        return cls(bodies)
+
+    def choose(self, accept_encoding):
+        """The stored content-coding to send for an Accept-Encoding header"""
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ENCODINGS:
+            if coding in self.bodies and accepted.get(coding, accepted.get('*', 0)) > 0:
+                return coding
+        return 'identity'
+
+    def response(self, request, status, headers):
+        """The variant for `request` as an HttpResponse (304 when the client has it)"""
+        coding = self.choose(request.headers.get('Accept-Encoding', ''))
+        etag = f'"{self.etag}-{coding}"'
+        response = get_conditional_response(request, etag=etag) if status == 200 else None
+        if response is None:
+            response = HttpResponse(self.bodies[coding], status=status, content_type='application/json')
+            if coding != 'identity':
+                response['Content-Encoding'] = coding
+        for name, value in headers.items():
+            if name.lower() not in OWN_HEADERS:
+                response[name] = value
+        response['ETag'] = etag
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+
+def wants_json(request):
+    """Whether the request negotiated plain JSON, which is what the stored bodies hold"""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return isinstance(renderer, JSONRenderer) and 'indent' not in getattr(request, 'accepted_media_type', '')
@@ -0,0 +1,89 @@
+"""
+Request deadlines for DynamoDB and S3 calls.
+
+RequestDeadlineMiddleware (blog/middleware.py) gives every read request a
+time budget. While it is set:
+
+- DynamoDB calls use a client whose connect and read timeouts are capped by
+  what is left of it, rounded down to one of TIMEOUT_STEPS (see
+  TunedConnection in blog/pynamo_models.py). botocore has no per-call
+  timeout, so each step is a client of its own, built on first use;
+- no attempt starts once the budget is spent, and no retry starts without
+  at least DEADLINE_RETRY_MIN_SECONDS left, raising DeadlineExceeded
+  instead. These checks are botocore event handlers (install()), so they
+  also apply to the shared S3 client.
+
+Views then answer with their degraded response (the last good cached
+response or a 503, see blog/views.py). Work outside a request (background
+refreshes, management commands) has no deadline. The budget lives in a
+context variable, so each request thread has its own.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Don't start a retry with less time than this left: it couldn't finish
+DEADLINE_RETRY_MIN_SECONDS = 0.1
+
+# Timeouts a call can be capped to; the smallest is also the floor, so an
+# almost-spent budget still gets a real attempt
+TIMEOUT_STEPS = (0.25, 0.5, 1.0, 2.0)
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The current request's time budget ran out before an AWS call could be made"""
+
+
+def remaining():
+    """Seconds left in the current budget, or None when there is none"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline(seconds):
+    """Run the block with a budget of `seconds` (None: no budget)"""
+    token = _deadline.set(time.monotonic() + seconds if seconds else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def timeout_step(timeout):
+    """
+    The timeout to cap a call to now: None while the budget still covers
+    `timeout` (or there is none), else the largest step it covers
+    """
+    budget = remaining()
+    if budget is None or budget >= timeout:
+        return None
+    return max((step for step in TIMEOUT_STEPS if step <= budget), default=TIMEOUT_STEPS[0])
+
+
+def _check_before_send(**kwargs):
+    budget = remaining()
+    if budget is not None and budget <= 0:
+        raise DeadlineExceeded('Request deadline exceeded before calling AWS')
+
+
+def _check_before_retry(response=None, caught_exception=None, **kwargs):
+    budget = remaining()
+    if budget is None or budget >= DEADLINE_RETRY_MIN_SECONDS:
+        return None  # Let botocore's retry handler decide
+    failed = caught_exception is not None or (
+        response is not None and (response[0].status_code >= 500 or 'Error' in response[1])
+    )
+    if failed:
+        raise DeadlineExceeded('Request deadline exceeded; not retrying') from caught_exception
+    return None
+
+
+def install(client):
+    """Stop a botocore client's attempts and retries once the request deadline is spent"""
+    client.meta.events.register_first('before-send.*.*', _check_before_send)
+    client.meta.events.register_first('needs-retry.*.*', _check_before_retry)
+    return client
@@ -2,9 +2,14 @@
 DynamoDB configuration for PynamoDB models
 """
 
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from decouple import config
 
+logger = logging.getLogger(__name__)
+
 # AWS Configuration
 AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID', default='')
 AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
@@ -17,6 +22,27 @@ USE_DYNAMODB_LOCAL = config('USE_DYNAMODB_LOCAL', default=False, cast=bool)
 # Table name prefix (useful for different environments)
 TABLE_PREFIX = config('DYNAMODB_TABLE_PREFIX', default='cgstewart_')
 
+# Connection tuning shared by every model (see gunicorn.conf.py for the thread count).
+# Each request thread needs one pooled connection; the headroom covers warm-up and
+# background work running alongside requests.
+GUNICORN_THREADS = config('GUNICORN_THREADS', default=1, cast=int)
+DYNAMODB_MAX_POOL_CONNECTIONS = config('DYNAMODB_MAX_POOL_CONNECTIONS', default=GUNICORN_THREADS + 4, cast=int)
+DYNAMODB_CONNECT_TIMEOUT = config('DYNAMODB_CONNECT_TIMEOUT', default=2.0, cast=float)
+DYNAMODB_READ_TIMEOUT = config('DYNAMODB_READ_TIMEOUT', default=5.0, cast=float)
+DYNAMODB_MAX_ATTEMPTS = config('DYNAMODB_MAX_ATTEMPTS', default=3, cast=int)
+DYNAMODB_RETRY_MODE = config('DYNAMODB_RETRY_MODE', default='adaptive')
+DYNAMODB_TCP_KEEPALIVE = config('DYNAMODB_TCP_KEEPALIVE', default=True, cast=bool)
+
+# Per-table circuit breakers (see blog/circuit.py)
+DYNAMODB_CIRCUIT_WINDOW_SECONDS = config('DYNAMODB_CIRCUIT_WINDOW_SECONDS', default=60, cast=float)
+DYNAMODB_CIRCUIT_MIN_CALLS = config('DYNAMODB_CIRCUIT_MIN_CALLS', default=5, cast=int)
+DYNAMODB_CIRCUIT_FAILURE_RATE = config('DYNAMODB_CIRCUIT_FAILURE_RATE', default=0.5, cast=float)
+DYNAMODB_CIRCUIT_OPEN_SECONDS = config('DYNAMODB_CIRCUIT_OPEN_SECONDS', default=30, cast=float)
+
+_session = None
+_session_lock = threading.RLock()  # botocore sessions are not safe for concurrent create_client
+
+
 def configure_pynamodb():
     """Configure PynamoDB with environment settings"""
     if USE_DYNAMODB_LOCAL:
@@ -33,5 +59,70 @@ def configure_pynamodb():
         if AWS_REGION:
             os.environ['AWS_DEFAULT_REGION'] = AWS_REGION
 
-# Call this when the app starts
-configure_pynamodb()
+
+def botocore_config(timeout=None):
+    """
+    Client configuration applied to every DynamoDB connection, with its
+    connect and read timeouts capped to `timeout` if given
+    """
+    from botocore.config import Config
+
+    return Config(
+        parameter_validation=False,  # PynamoDB builds valid requests already
+        connect_timeout=min(DYNAMODB_CONNECT_TIMEOUT, timeout or DYNAMODB_CONNECT_TIMEOUT),
+        read_timeout=min(DYNAMODB_READ_TIMEOUT, timeout or DYNAMODB_READ_TIMEOUT),
+        max_pool_connections=DYNAMODB_MAX_POOL_CONNECTIONS,
+        retries={'mode': DYNAMODB_RETRY_MODE, 'total_max_attempts': DYNAMODB_MAX_ATTEMPTS},
+        tcp_keepalive=DYNAMODB_TCP_KEEPALIVE,
+    )
+
+
+def get_botocore_session():
+    """Process-wide botocore session, so credentials are resolved once per worker"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                from botocore.session import get_session
+                _session = get_session()
+    return _session
+
+
+def create_client(region, host=None, timeout=None):
+    """
+    A DynamoDB client built from botocore_config(timeout): PynamoDB only
+    exposes pool size and timeouts through Meta, not the retry mode or TCP
+    keepalive. The client also follows the request deadline (see
+    blog/deadlines.py). Used by TunedConnection (blog/pynamo_models.py).
+    """
+    from .deadlines import install
+
+    with _session_lock:
+        client = get_botocore_session().create_client(
+            'dynamodb',
+            region,
+            endpoint_url=host,
+            config=botocore_config(timeout),
+        )
+    return install(client)
+
+
+def warm_up_connections(models, budget=None):
+    """
+    Resolve credentials and open a pooled TLS connection to every table so the
+    first request served by a fresh worker doesn't pay for the handshake.
+    Pass the request deadline as `budget` to warm the client requests start
+    with (see blog/deadlines.py). Failures are logged, never raised: a cold
+    connection still works.
+    """
+    from .deadlines import deadline
+
+    def warm(model):
+        try:
+            with deadline(budget):
+                model.describe_table()
+        except Exception:
+            logger.warning('DynamoDB warm-up failed', extra={'table': model.Meta.table_name}, exc_info=True)
+
+    with ThreadPoolExecutor(max_workers=len(models)) as pool:
+        list(pool.map(warm, models))
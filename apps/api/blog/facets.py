@@ -0,0 +1,147 @@
+"""
+Facet indexes (post tags and months, project technologies) maintained on
+publish.
+
+Each facet maps values to the published items carrying them, with counts,
+in the Facet table, so filtering and facet counts are a single GetItem or
+Query instead of a table scan. When an item is saved or deleted, the values
+it is currently counted under (its '<facet>#item' record) are diffed with
+its new values and the difference is applied in one transaction of atomic
+ADD/DELETE updates. Conditions on set membership keep the counts exact; if
+they ever fail (a concurrent edit, drift) the facet is rebuilt from a scan.
+"""
+
+import logging
+from django.dispatch import receiver
+from pynamodb.exceptions import DoesNotExist, TransactWriteError
+from pynamodb.transactions import TransactWrite
+from .signals import content_deleted, content_saved
+
+logger = logging.getLogger(__name__)
+
+# facet -> (PynamoDB model name, item -> set of values)
+FACETS = {
+    'tag': ('Post', lambda item: set(item.tags)),
+    'month': ('Post', lambda item: {item.date_published.strftime('%Y-%m')}),
+    'stack': ('Project', lambda item: set(item.stack)),
+}
+
+
+def item_key(facet):
+    return f'{facet}#item'
+
+
+def values_of(facet, item):
+    """Values a published item is counted under; none once unpublished"""
+    _, get_values = FACETS[facet]
+    return get_values(item) if item.is_published else set()
+
+
+def apply_change(facet, item, deleted=False):
+    """Move an item between facet values to match its current state"""
+    from .pynamo_models import Facet
+
+    new = set() if deleted else values_of(facet, item)
+    try:
+        old = set(Facet.get(item_key(facet), item.id).members or ())
+    except DoesNotExist:
+        old = set()
+    if new == old:
+        return
+
+    with TransactWrite(connection=Facet._get_connection().connection) as transaction:
+        for value in new - old:
+            transaction.update(
+                Facet(facet, value),
+                actions=[Facet.members.add({item.id}), Facet.count.add(1)],
+                condition=~Facet.members.contains(item.id),
+            )
+        for value in old - new:
+            transaction.update(
+                Facet(facet, value),
+                actions=[Facet.members.delete({item.id}), Facet.count.add(-1)],
+                condition=Facet.members.contains(item.id),
+            )
+        if new:
+            transaction.save(Facet(item_key(facet), item.id, members=new))
+        else:
+            transaction.delete(Facet(item_key(facet), item.id))
+
+
+def rebuild_facet(facet):
+    """Recompute a facet from a scan of its model, replacing whatever is stored"""
+    from . import pynamo_models
+    from .pynamo_models import Facet
+
+    model_name, _ = FACETS[facet]
+    model = getattr(pynamo_models, model_name)
+    members = {}
+    item_values = {}
+    for item in model.scan():
+        values = values_of(facet, item)
+        if values:
+            item_values[item.id] = values
+        for value in values:
+            members.setdefault(value, set()).add(item.id)
+
+    stale = [
+        record for pk in (facet, item_key(facet)) for record in Facet.query(pk)
+        if record.sk not in (members if pk == facet else item_values)
+    ]
+    with Facet.batch_write() as batch:
+        for record in stale:
+            batch.delete(record)
+        for value, ids in members.items():
+            batch.save(Facet(facet, value, count=len(ids), members=ids))
+        for item_id, values in item_values.items():
+            batch.save(Facet(item_key(facet), item_id, members=values))
+    return len(members)
+
+
+def update_facets(model_name, item, deleted=False):
+    for facet, (facet_model, _) in FACETS.items():
+        if facet_model != model_name:
+            continue
+        try:
+            apply_change(facet, item, deleted=deleted)
+        except TransactWriteError:
+            logger.warning('Facet update conflicted, rebuilding', extra={'facet': facet, 'id': item.id}, exc_info=True)
+            rebuild_facet(facet)
+
+
+def counts(facet):
+    """[{'value', 'count'}] of a facet, most used first (one Query)"""
+    from .pynamo_models import Facet
+
+    values = [
+        {'value': record.sk, 'count': int(record.count)}
+        for record in Facet.query(facet, filter_condition=Facet.count > 0)
+    ]
+    values.sort(key=lambda value: (-value['count'], value['value'].lower()))
+    return values
+
+
+def members(facet, value):
+    """Ids of the published items carrying `value` (one GetItem)"""
+    from .pynamo_models import Facet
+
+    try:
+        return set(Facet.get(facet, value).members or ())
+    except DoesNotExist:
+        return set()
+
+
+@receiver(content_saved)
+def facet_saved_item(sender, item, **kwargs):
+    try:
+        update_facets(sender.__name__, item)
+    except Exception:
+        logger.exception('Facet update failed', extra={'model': sender.__name__, 'id': item.id})
+
+
+@receiver(content_deleted)
+def facet_deleted_item(sender, item, **kwargs):
+    try:
+        update_facets(sender.__name__, item, deleted=True)
+    except Exception:
+        logger.exception('Facet update failed', extra={'model': sender.__name__, 'id': item.id})
@@ -0,0 +1,255 @@
+"""
+RSS and Atom feeds of the latest posts, and the sitemap of every published
+post, project and video.
+
+The documents are rendered ahead of time and kept gzip-compressed in an
+artifact (blog/artifacts.py) together with the small records they are
+rendered from. Publishing, editing or deleting an item updates its record
+and re-renders the documents from the records, without rescanning, so
+serving a feed or sitemap never touches DynamoDB. Output is deterministic:
+unchanged content keeps the same bytes, ETag and Last-Modified.
+"""
+
+import gzip
+import hashlib
+import json
+import struct
+import zlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+from django.conf import settings
+from .artifacts import Artifact
+
+ARTIFACT_NAME = 'feeds.bin'
+FORMAT = b'FEEDv1'
+
+# Item type -> (PynamoDB model name, path of its page on the site)
+SOURCES = {
+    'post': ('Post', 'posts'),
+    'project': ('Project', 'projects'),
+    'video': ('Video', 'videos'),
+}
+KINDS = {model_name: kind for kind, (model_name, _) in SOURCES.items()}
+
+CONTENT_TYPES = {
+    'feed.xml': 'application/rss+xml; charset=utf-8',
+    'atom.xml': 'application/atom+xml; charset=utf-8',
+}
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+
+def as_utc(value):
+    # PynamoDB stores naive datetimes as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def record(kind, item):
+    """What a published item contributes to the feeds and sitemap"""
+    if kind == 'post':
+        published, summary, categories = item.date_published, item.excerpt, list(item.tags)
+    else:
+        published, summary, categories = item.created_at, item.description, []
+    return {
+        'type': kind,
+        'id': item.id,
+        'slug': item.slug,
+        'title': item.title,
+        'summary': summary or '',
+        'categories': categories,
+        'published': as_utc(published).isoformat(),
+        'updated': as_utc(item.updated_at or published).isoformat(),
+    }
+
+
+def item_url(rec):
+    return f"{settings.SITE_URL}/{SOURCES[rec['type']][1]}/{rec['slug']}"
+
+
+def latest(records):
+    return max((rec['updated'] for rec in records), default=None)
+
+
+def render_rss(posts):
+    updated = latest(posts)
+    items = []
+    for rec in posts:
+        categories = ''.join(f'<category>{escape(category)}</category>' for category in rec['categories'])
+        items.append(
+            f'<item><title>{escape(rec["title"])}</title><link>{escape(item_url(rec))}</link>'
+            f'<guid isPermaLink="true">{escape(item_url(rec))}</guid>'
+            f'<pubDate>{format_datetime(datetime.fromisoformat(rec["published"]))}</pubDate>'
+            f'<description>{escape(rec["summary"])}</description>{categories}</item>'
+        )
+    build_date = f'<lastBuildDate>{format_datetime(datetime.fromisoformat(updated))}</lastBuildDate>' if updated else ''
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom"><channel>'
+        f'<title>{escape(settings.FEED_TITLE)}</title><link>{escape(settings.SITE_URL)}/</link>'
+        f'<description>{escape(settings.FEED_DESCRIPTION)}</description>'
+        f'<atom:link href={quoteattr(settings.SITE_URL + "/feed.xml")} rel="self" type="application/rss+xml"/>'
+        f'{build_date}{"".join(items)}</channel></rss>\n'
+    )
+
+
+def render_atom(posts):
+    updated = latest(posts) or datetime(1970, 1, 1, tzinfo=timezone.utc).isoformat()
+    entries = []
+    for rec in posts:
+        categories = ''.join(f'<category term={quoteattr(category)}/>' for category in rec['categories'])
+        entries.append(
+            f'<entry><id>{escape(item_url(rec))}</id><title>{escape(rec["title"])}</title>'
+            f'<link href={quoteattr(item_url(rec))}/>'
+            f'<published>{rec["published"]}</published><updated>{rec["updated"]}</updated>'
+            f'<summary>{escape(rec["summary"])}</summary>{categories}</entry>'
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<id>{escape(settings.SITE_URL)}/</id><title>{escape(settings.FEED_TITLE)}</title>'
+        f'<subtitle>{escape(settings.FEED_DESCRIPTION)}</subtitle>'
+        f'<link href={quoteattr(settings.SITE_URL + "/")}/>'
+        f'<link href={quoteattr(settings.SITE_URL + "/atom.xml")} rel="self"/>'
+        f'<author><name>{escape(settings.FEED_TITLE)}</name></author>'
+        f'<updated>{updated}</updated>{"".join(entries)}</feed>\n'
+    )
+
+
+def render_urlset(urls):
+    entries = ''.join(
+        f'<url><loc>{escape(loc)}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</url>'
+        for loc, lastmod in urls
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>\n'
+    )
+
+
+def render_sitemap_index(pages):
+    entries = ''.join(
+        f'<sitemap><loc>{escape(settings.SITE_URL)}/{name}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</sitemap>'
+        for name, lastmod in pages
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        f'<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>\n'
+    )
+
+
+def sitemap_documents(records):
+    """
+    {name: (xml, last modified)} of the sitemap: a single sitemap.xml, or a
+    sitemap index at sitemap.xml over sitemap-1.xml, ... once there are more
+    than SITEMAP_MAX_URLS URLs
+    """
+    urls = [(f'{settings.SITE_URL}/', latest(records))]
+    for kind, (_, path) in SOURCES.items():
+        section = [rec for rec in records if rec['type'] == kind]
+        urls.append((f'{settings.SITE_URL}/{path}', latest(section)))
+        urls.extend((item_url(rec), rec['updated']) for rec in sorted(section, key=lambda rec: rec['slug']))
+
+    size = settings.SITEMAP_MAX_URLS
+    if len(urls) <= size:
+        return {'sitemap.xml': (render_urlset(urls), latest(records))}
+    documents = {}
+    for number, start in enumerate(range(0, len(urls), size), start=1):
+        chunk = urls[start:start + size]
+        documents[f'sitemap-{number}.xml'] = (render_urlset(chunk), max((lastmod for _, lastmod in chunk if lastmod), default=None))
+    index = [(name, modified) for name, (_, modified) in documents.items()]
+    documents['sitemap.xml'] = (render_sitemap_index(index), latest(records))
+    return documents
+
+
+class Document:
+    """A pre-rendered, gzip-compressed document with its validators"""
+
+    def __init__(self, body, modified):
+        self.body = body
+        self.modified = modified  # ISO 8601 or None
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+    @property
+    def last_modified(self):
+        return datetime.fromisoformat(self.modified).timestamp() if self.modified else None
+
+    @classmethod
+    def render(cls, xml, modified):
+        # mtime=0 keeps the bytes (and ETag) identical for identical content
+        return cls(gzip.compress(xml.encode(), mtime=0), modified)
+
+
+class FeedSet:
+    """The records of every published item and the documents rendered from them"""
+
+    def __init__(self, records, documents=None):
+        self.records = records
+        self.documents = documents if documents is not None else self.render(records)
+
+    @staticmethod
+    def render(records):
+        posts = sorted(
+            (rec for rec in records if rec['type'] == 'post'),
+            key=lambda rec: (rec['published'], rec['id']), reverse=True,
+        )[:settings.FEED_ITEMS_COUNT]
+        documents = {
+            'feed.xml': Document.render(render_rss(posts), latest(posts)),
+            'atom.xml': Document.render(render_atom(posts), latest(posts)),
+        }
+        for name, (xml, modified) in sitemap_documents(records).items():
+            documents[name] = Document.render(xml, modified)
+        return documents
+
+    def with_record(self, rec):
+        return FeedSet([r for r in self.records if (r['type'], r['id']) != (rec['type'], rec['id'])] + [rec])
+
+    def without(self, kind, item_id):
+        return FeedSet([r for r in self.records if (r['type'], r['id']) != (kind, item_id)])
+
+    def to_bytes(self):
+        """FORMAT, compressed JSON header length, header (records, document index), then the gzip bodies"""
+        names = sorted(self.documents)
+        header = zlib.compress(json.dumps({
+            'records': self.records,
+            'documents': [[name, len(self.documents[name].body), self.documents[name].modified] for name in names],
+        }, separators=(',', ':')).encode())
+        return b''.join([FORMAT, struct.pack('<I', len(header)), header] + [self.documents[name].body for name in names])
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data.startswith(FORMAT):
+            raise ValueError('Not a feed set')
+        position = len(FORMAT)
+        (header_length,) = struct.unpack_from('<I', data, position)
+        position += 4
+        header = json.loads(zlib.decompress(data[position:position + header_length]))
+        position += header_length
+        documents = {}
+        for name, length, modified in header['documents']:
+            documents[name] = Document(data[position:position + length], modified)
+            position += length
+        return cls(header['records'], documents)
+
+
+def build_feeds():
+    """Full rebuild from every published post, project and video"""
+    from . import pynamo_models
+
+    records = []
+    for kind, (model_name, _) in SOURCES.items():
+        model = getattr(pynamo_models, model_name)
+        records.extend(record(kind, item) for item in model.scan(model.is_published == True))  # noqa: E712
+    return FeedSet(records)
+
+
+index = Artifact(ARTIFACT_NAME, loads=FeedSet.from_bytes, dumps=FeedSet.to_bytes, build=build_feeds)
+index.connect(KINDS, to_entry=record, add=FeedSet.with_record)
+
+
+def get_document(name):
+    """The pre-rendered Document called `name`, or None"""
+    return index.get().documents.get(name)
+
+
+def content_type(name):
+    return CONTENT_TYPES.get(name, SITEMAP_CONTENT_TYPE)
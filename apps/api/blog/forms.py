@@ -0,0 +1,91 @@
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models.fields.files import FieldFile
+from django.urls import reverse
+
+
+class DirectUploadWidget(forms.Widget):
+    """File picker that uploads straight to S3 and submits only a verified-upload token"""
+    template_name = 'blog/widgets/direct_upload.html'
+    
+    class Media:
+        js = ('blog/direct_upload.js',)
+    
+    def __init__(self, field_spec, accept=None, attrs=None):
+        self.field_spec = field_spec
+        self.accept = accept
+        super().__init__(attrs)
+    
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget'].update({
+            'field_spec': self.field_spec,
+            'accept': self.accept,
+            # The stored file, if any (the value is a token once a new file is uploaded)
+            'current': value if isinstance(value, FieldFile) and value else None,
+            'start_url': reverse('upload-start'),
+            'complete_url': reverse('upload-complete'),
+            'abort_url': reverse('upload-abort'),
+        })
+        return context
+    
+    def format_value(self, value):
+        # Only tokens round-trip through the hidden input; stored files are shown as links
+        return value if isinstance(value, str) else ''
+    
+    def value_from_datadict(self, data, files, name):
+        if data.get(f'{name}-clear'):
+            return False
+        return data.get(name) or None
+
+
+class DirectUploadField(forms.Field):
+    """Form field whose cleaned value is the S3 key of a verified direct upload"""
+    
+    def __init__(self, field_spec, accept=None, **kwargs):
+        self.field_spec = field_spec
+        kwargs.setdefault('widget', DirectUploadWidget(field_spec, accept=accept))
+        super().__init__(**kwargs)
+    
+    def clean(self, value):
+        if value is False:
+            if self.required:
+                raise ValidationError(self.error_messages['required'], code='required')
+            return False  # Clear the file
+        if not value:
+            # Keep the stored file unless the field must be filled in
+            if self.required and not self.initial:
+                raise ValidationError(self.error_messages['required'], code='required')
+            return None
+        from . import uploads  # Loads boto3: only when a form actually carries an upload
+        return uploads.key_from_token(self.field_spec, value)
+    
+    def has_changed(self, initial, data):
+        return data is not None
+
+
+class DirectUploadModelForm(forms.ModelForm):
+    """
+    ModelForm whose file fields upload from the browser straight to S3
+    (when S3 storage is in use) instead of streaming through Django
+    """
+    direct_upload_fields = ()
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not settings.DIRECT_UPLOADS_ENABLED:
+            return
+        model_name = self._meta.model._meta.model_name
+        for name in self.direct_upload_fields:
+            if name not in self.fields:
+                continue
+            field = self.fields[name]
+            self.fields[name] = DirectUploadField(
+                f'{model_name}.{name}',
+                accept='image/*' if isinstance(field, forms.ImageField) else None,
+                required=field.required,
+                label=field.label,
+                help_text=field.help_text,
+                initial=getattr(self.instance, name),
+            )
@@ -0,0 +1,156 @@
+"""
+Responsive image pipeline: resizes uploaded images into width-bounded
+AVIF/WebP variants and records them on the DynamoDB item, along with the
+intrinsic size, dominant colour and a tiny placeholder the frontend uses
+to reserve layout space before the image loads.
+
+Encoding runs in a small process pool so neither the admin request nor the
+gunicorn worker's CPU time is spent on it.
+"""
+
+import base64
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Pool processes are spawned fresh, so they need their own Django setup"""
+    import django
+    django.setup()
+
+
+def get_pool():
+    """Lazily started process pool shared by the whole worker"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PIPELINE_WORKERS,
+                # fork() would copy the worker's threads and open sockets
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+    return _pool
+
+
+def variant_widths(width):
+    """Target widths for an image `width` pixels wide, never upscaling"""
+    widths = [w for w in settings.IMAGE_VARIANT_WIDTHS if w < width]
+    widths.append(min(width, max(settings.IMAGE_VARIANT_WIDTHS)))
+    return sorted(set(widths))
+
+
+def prepare_image(image):
+    """Apply EXIF orientation and normalise the mode to RGB(A)"""
+    from PIL import ImageOps
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    return image
+
+
+def render_variants(image, base_name):
+    """
+    Resize a prepared Pillow image into every configured width and format
+
+    Returns:
+        list: (key, bytes, width, height, format) tuples
+    """
+    from PIL import Image, features
+
+    rendered = []
+    for target in variant_widths(image.width):
+        resized = image.copy()
+        resized.thumbnail((target, image.height), Image.Resampling.LANCZOS)
+        for fmt in settings.IMAGE_VARIANT_FORMATS:
+            if not features.check(fmt):
+                continue
+            buffer = BytesIO()
+            resized.save(buffer, fmt.upper(), quality=settings.IMAGE_VARIANT_QUALITY[fmt])
+            key = f'{base_name}/{resized.width}w.{fmt}'
+            rendered.append((key, buffer.getvalue(), resized.width, resized.height, fmt))
+    return rendered
+
+
+def dominant_color(image):
+    """Most common colour of a prepared image, as '#rrggbb'"""
+    sample = image.convert('RGB')
+    sample.thumbnail((64, 64))
+    palette_image = sample.quantize(colors=5)
+    _, index = max(palette_image.getcolors())
+    r, g, b = palette_image.getpalette()[index * 3:index * 3 + 3]
+    return f'#{r:02x}{g:02x}{b:02x}'
+
+
+def placeholder(image):
+    """Tiny blurred-up preview (LQIP) of a prepared image, as a WebP data URI"""
+    from PIL import Image
+
+    preview = image.copy()
+    preview.thumbnail((settings.IMAGE_PLACEHOLDER_SIZE, settings.IMAGE_PLACEHOLDER_SIZE), Image.Resampling.LANCZOS)
+    buffer = BytesIO()
+    preview.save(buffer, 'WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def build_variants(model_name, item_id, image_name):
+    """
+    Pool task: render the variants of `image_name`, upload them next to the
+    original and store them on the item together with the image's intrinsic
+    size, dominant colour and placeholder. Returns the stored variants.
+    """
+    from PIL import Image
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from . import pynamo_models
+
+    with default_storage.open(image_name, 'rb') as f:
+        image = prepare_image(Image.open(f))
+
+    base_name = os.path.splitext(image_name)[0]
+    variants = []
+    for key, data, width, height, fmt in render_variants(image, base_name):
+        key = default_storage.save(key, ContentFile(data))
+        variants.append(pynamo_models.ImageVariant(key=key, width=width, height=height, format=fmt))
+
+    model = getattr(pynamo_models, model_name)
+    item = model.get(item_id)
+    item.update(actions=[
+        model.image_variants.set(variants),
+        model.image_width.set(image.width),
+        model.image_height.set(image.height),
+        model.image_color.set(dominant_color(image)),
+        model.image_placeholder.set(placeholder(image)),
+    ])
+    return [variant.as_dict() for variant in variants]
+
+
+def schedule_variants(model_name, item_id, image_name):
+    """Queue variant generation for an item's newly uploaded image"""
+    def finished(future):
+        if future.exception():
+            logger.error(
+                'Image variant generation failed',
+                extra={'model': model_name, 'item_id': item_id, 'image': image_name},
+                exc_info=future.exception(),
+            )
+            return
+        # build_variants() writes through update(), which sends no content_saved,
+        # and in another process: retire this worker's cached responses here
+        from .response_cache import responses
+        responses.clear()
+
+    future = get_pool().submit(build_variants, model_name, item_id, image_name)
+    future.add_done_callback(finished)
+    return future
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from blog.rendering import auto_excerpt, changed_attributes
+
+# Summary attribute filled from the content when empty, per model
+SUMMARY_ATTRIBUTES = {'Post': 'excerpt', 'Project': 'description'}
+
+
+def backfill_segment(model, segment, total_segments):
+    """Bring the rendered content and reading metadata of one scan segment up to date"""
+    updated = 0
+    for item in model.scan(segment=segment, total_segments=total_segments):
+        values = changed_attributes(item)
+        summary = SUMMARY_ATTRIBUTES[model.__name__]
+        if not getattr(item, summary):
+            values[summary] = auto_excerpt(values.get('content_html', item.content_html))
+        if values:
+            # update() rather than save(): keeps updated_at, and derived indexes don't change
+            item.update(actions=[getattr(model, name).set(value) for name, value in values.items()])
+            updated += 1
+    return updated
+
+
+class Command(BaseCommand):
+    help = 'Compute rendered content and reading metadata (word count, reading time, headings, excerpt) for posts and projects missing them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segments', type=int, default=4,
+                            help='Parallel scan segments per table (default: 4)')
+
+    def handle(self, *args, **options):
+        from blog.pynamo_models import Post, Project
+
+        segments = max(1, options['segments'])
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            for model in (Post, Project):
+                updated = sum(executor.map(lambda segment: backfill_segment(model, segment, segments), range(segments)))
+                self.stdout.write(self.style.SUCCESS(f'{model.__name__}: updated {updated} item(s)'))
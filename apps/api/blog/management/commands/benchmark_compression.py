@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.middleware.gzip import GZipMiddleware
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+import time
+
+from blog.response_cache import responses
+
+
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+class Command(BaseCommand):
+    help = ('Compare CPU per request and response size of precompressed cached responses '
+            'with GZipMiddleware-style compression on every request')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', type=str, default='/api/v1/posts/',
+                            help='Endpoint to benchmark (default: /api/v1/posts/)')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per strategy')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        count = max(1, options['requests'])
+        match = resolve(path)
+        if not hasattr(match.func, 'view_class'):
+            raise CommandError(f'{path} is not served by an API view')
+        # Unthrottled, so thousands of requests from one client all reach the view
+        view = match.func.view_class.as_view(throttle_classes=[])
+        factory = RequestFactory()
+
+        def request(accept_encoding=ACCEPT_ENCODING):
+            return factory.get(path, HTTP_ACCEPT_ENCODING=accept_encoding)
+
+        def call_view(req):
+            return view(req, *match.args, **match.kwargs)
+
+        def per_request_gzip():
+            # What GZipMiddleware does: render the cached data, then compress it
+            req = request()
+            response = call_view(req)
+            response.render()
+            return GZipMiddleware(call_view).process_response(req, response)
+
+        # A long lifetime keeps background refreshes out of the measurement
+        with override_settings(RESPONSE_CACHE_ENABLED=True, RESPONSE_CACHE_SECONDS=3600):
+            with override_settings(RESPONSE_COMPRESSION_ENABLED=False):
+                responses.clear()
+                identity = call_view(request(''))
+                identity.render()
+                if identity.status_code != 200:
+                    raise CommandError(f'{path} answered {identity.status_code}')
+                results = [('gzip per request', self.measure(per_request_gzip, count))]
+
+            responses.clear()
+            call_view(request())  # Fills the cache
+            results += [
+                ('precompressed', self.measure(lambda: call_view(request()), count)),
+                ('precompressed (gzip only)', self.measure(lambda: call_view(request('gzip')), count)),
+            ]
+        responses.clear()
+
+        size = len(identity.content)
+        self.stdout.write(f'{path}: {size} bytes uncompressed, {count} requests per strategy, '
+                          f'Accept-Encoding: {ACCEPT_ENCODING}')
+        self.stdout.write(f'{"strategy":<28}{"CPU/request":>14}{"bytes":>10}{"saved":>9}  encoding')
+        for name, (cpu, length, encoding) in results:
+            self.stdout.write(
+                f'{name:<28}{cpu * 1e6:>11.0f} us{length:>10}{1 - length / size:>9.1%}  {encoding or "identity"}'
+            )
+        baseline, precompressed = results[0][1][0], results[1][1][0]
+        speedup = baseline / precompressed if precompressed else float('inf')
+        self.stdout.write(self.style.SUCCESS(f'Precompressed responses use {speedup:.1f}x less CPU per request'))
+
+    def measure(self, serve, count):
+        """(CPU seconds per request, body length, content-coding) of serve()"""
+        started = time.process_time()
+        for _ in range(count):
+            response = serve()
+        cpu = (time.process_time() - started) / count
+        return cpu, len(response.content), response.get('Content-Encoding')
@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import unquote, urlparse
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models
+import json
+import time
+
+
+def file_fields():
+    """(model, [file field names]) for every blog model with uploads"""
+    for model in apps.get_app_config('blog').get_models():
+        names = [field.name for field in model._meta.get_fields() if isinstance(field, models.FileField)]
+        if names:
+            yield model, names
+
+
+def upload_prefixes():
+    """Top-level upload_to prefixes, with nested ones (bio/resume/ in bio/) folded in"""
+    prefixes = sorted({
+        str(model._meta.get_field(name).upload_to)
+        for model, names in file_fields()
+        for name in names
+    })
+    return [p for p in prefixes if not any(p != other and p.startswith(other) for other in prefixes)]
+
+
+def url_to_key(url):
+    """S3 key of a media URL stored on a DynamoDB item"""
+    return unquote(urlparse(url).path).lstrip('/') if url else None
+
+
+def django_references():
+    """Yield (key, source) for every file referenced by the Django models"""
+    for model, names in file_fields():
+        for row in model.objects.values_list('pk', *names).iterator():
+            pk, values = row[0], row[1:]
+            for name, value in zip(names, values):
+                if value:
+                    yield value, f'{model.__name__}:{pk} {name}'
+
+
+def dynamodb_references():
+    """Yield (key, source) for every image, variant and resume on the DynamoDB items"""
+    from blog import pynamo_models
+
+    for model in pynamo_models.ALL_MODELS:
+        names = [name for name in ('image_url', 'resume_url', 'image_variants') if name in model.get_attributes()]
+        if not names:
+            continue
+        for item in model.scan(attributes_to_get=['id'] + names):
+            source = f'dynamodb {model.__name__}:{item.id}'
+            for name in ('image_url', 'resume_url'):
+                key = url_to_key(getattr(item, name, None)) if name in names else None
+                if key:
+                    yield key, f'{source} {name}'
+            for variant in getattr(item, 'image_variants', None) or []:
+                yield variant.key, f'{source} image_variants'
+
+
+class Command(BaseCommand):
+    help = 'Check that every uploaded file referenced by the database exists in S3 and report orphaned objects as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.S3_MAX_POOL_CONNECTIONS,
+                            help='Concurrent S3 requests (default: S3_MAX_POOL_CONNECTIONS)')
+        parser.add_argument('--prefix', action='append', dest='prefixes',
+                            help='Bucket prefix to scan for orphans (repeatable; default: the models\' upload_to prefixes)')
+        parser.add_argument('--skip-dynamodb', action='store_true',
+                            help='Only check files referenced by the Django models')
+        parser.add_argument('--fail-on-missing', action='store_true',
+                            help='Exit with an error when referenced files are missing')
+
+    def handle(self, *args, **options):
+        from blog.utils import get_s3_client
+
+        bucket = settings.AWS_STORAGE_BUCKET_NAME
+        if not bucket:
+            raise CommandError('AWS_STORAGE_BUCKET_NAME is not set; uploads are stored locally')
+
+        started = time.monotonic()
+        client = get_s3_client()
+        prefixes = options['prefixes'] or upload_prefixes()
+
+        def list_prefix(prefix):
+            """Every object under `prefix`, following continuation tokens"""
+            objects = {}
+            for page in client.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    objects[obj['Key']] = obj
+            return objects
+
+        def exists(key):
+            try:
+                client.head_object(Bucket=bucket, Key=key)
+                return True
+            except client.exceptions.ClientError as e:
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                    return False
+                raise
+
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            # Bucket listings run in the pool while the references are being read
+            listings = [pool.submit(list_prefix, prefix) for prefix in prefixes]
+
+            references = {}
+            sources = [django_references()]
+            if not options['skip_dynamodb']:
+                sources.append(dynamodb_references())
+            for source in sources:
+                for key, referenced_by in source:
+                    references.setdefault(key, []).append(referenced_by)
+
+            listed = {}
+            for future in listings:
+                listed.update(future.result())
+
+            # Keys outside the scanned prefixes can't be answered from the listing
+            unlisted = [key for key in references if not key.startswith(tuple(prefixes))]
+            checks = {pool.submit(exists, key): key for key in unlisted}
+            missing = {key for key in references if key.startswith(tuple(prefixes)) and key not in listed}
+            for future in as_completed(checks):
+                if not future.result():
+                    missing.add(checks[future])
+
+        orphaned = sorted(
+            (obj for key, obj in listed.items() if key not in references),
+            key=lambda obj: obj['Key'],
+        )
+        report = {
+            'bucket': bucket,
+            'prefixes': prefixes,
+            'referenced': len(references),
+            'listed': len(listed),
+            'missing': [{'key': key, 'referenced_by': references[key]} for key in sorted(missing)],
+            'orphaned': [
+                {'key': obj['Key'], 'size': obj['Size'], 'last_modified': obj['LastModified'].isoformat()}
+                for obj in orphaned
+            ],
+            'orphaned_bytes': sum(obj['Size'] for obj in orphaned),
+            'elapsed_seconds': round(time.monotonic() - started, 3),
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+        if missing and options['fail_on_missing']:
+            raise CommandError(f'{len(missing)} referenced file(s) missing from s3://{bucket}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from blog.related import refresh_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related posts and projects stored on every published item'
+
+    def handle(self, *args, **options):
+        for model_name in ('Post', 'Project'):
+            updated = refresh_related(model_name)
+            self.stdout.write(self.style.SUCCESS(f'{model_name}: updated related items on {updated} item(s)'))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+import subprocess
+import sys
+
+
+# Boots the WSGI app and resolves a URL the same way a fresh worker does
+# before it can answer its first request.
+BOOT_SNIPPET = """
+import os
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+import config.wsgi
+from django.urls import resolve
+resolve({path!r}).func
+"""
+
+
+class Command(BaseCommand):
+    help = 'Profile worker boot with "python -X importtime" and enforce an import-time budget'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', type=str, default='/api/v1/bio/',
+                            help='URL to resolve after boot (default: /api/v1/bio/)')
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help='Fail when total import time exceeds this (overrides IMPORT_TIME_BUDGET_MS)')
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest imports to list')
+        parser.add_argument('--runs', type=int, default=5,
+                            help='Profile this many fresh interpreters and gate on the median run')
+
+    def handle(self, *args, **options):
+        budget_ms = options['budget_ms']
+        if budget_ms is None:
+            budget_ms = settings.IMPORT_TIME_BUDGET_MS
+
+        # An untimed first boot writes the bytecode caches, which a fresh image
+        # doesn't have yet; the median then ignores one-off spikes either way
+        self.profile(options['path'])
+        runs = sorted((self.profile(options['path']) for _ in range(max(1, options['runs']))), key=lambda run: run[0])
+        total_us, imports = runs[(len(runs) - 1) // 2]
+
+        self.stdout.write(f'Slowest imports (cumulative) booting for {options["path"]}:')
+        slowest = sorted(imports, key=lambda row: row[1], reverse=True)[:options['top']]
+        for self_us, cumulative_us, name in slowest:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms self  {name}')
+
+        total_ms = total_us / 1000
+        spread = ', '.join(f'{run[0] / 1000:.0f}' for run in runs)
+        summary = f'Total import time: {total_ms:.1f} ms, median of {len(runs)} runs ({spread}) (budget {budget_ms:.1f} ms)'
+        if budget_ms and total_ms > budget_ms:
+            raise CommandError(f'{summary} - over budget by {total_ms - budget_ms:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def profile(self, path):
+        """Run one interpreter under -X importtime and parse its report"""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SNIPPET.format(path=path)],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Boot failed:\n{result.stderr[-2000:]}')
+
+        total_us = 0
+        imports = []
+        for line in result.stderr.splitlines():
+            # Format: "import time: <self us> | <cumulative us> | <indent><module>"
+            if not line.startswith('import time:') or 'imported package' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+            total_us += self_us
+            imports.append((self_us, cumulative_us, name.strip()))
+        return total_us, imports
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from blog.facets import FACETS, rebuild_facet
+
+
+class Command(BaseCommand):
+    help = 'Recompute the facet indexes (post tags and months, project technologies) from a scan of the content tables'
+
+    def handle(self, *args, **options):
+        for facet in FACETS:
+            values = rebuild_facet(facet)
+            self.stdout.write(self.style.SUCCESS(f'{facet}: {values} value(s)'))
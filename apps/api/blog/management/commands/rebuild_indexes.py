@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from blog import feeds, search, slugs, suggest
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the prebuilt in-memory indexes (search, suggest, slugs) and the pre-rendered feeds and sitemap from DynamoDB and publish them to every worker'
+
+    def handle(self, *args, **options):
+        for name, artifact in [('search', search.index), ('suggest', suggest.index), ('slugs', slugs.index), ('feeds', feeds.index)]:
+            artifact.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {name} ({artifact.name})'))
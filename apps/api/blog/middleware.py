@@ -0,0 +1,20 @@
+from django.conf import settings
+from .deadlines import deadline
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestDeadlineMiddleware:
+    """
+    Give each read request REQUEST_DEADLINE_SECONDS for its AWS calls.
+    Writes (admin, uploads) run without a deadline so they are never cut short.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS or not settings.REQUEST_DEADLINE_SECONDS:
+            return self.get_response(request)
+        with deadline(settings.REQUEST_DEADLINE_SECONDS):
+            return self.get_response(request)
@@ -3,6 +3,7 @@ PynamoDB models for CG Stewart's portfolio
 Converting Django models to DynamoDB using PynamoDB
 """
 
+from pynamodb.connection import Connection
 from pynamodb.models import Model
 from pynamodb.attributes import (
     UnicodeAttribute, 
@@ -10,21 +11,129 @@ from pynamodb.attributes import (
     BooleanAttribute,
     ListAttribute,
     MapAttribute,
-    NumberAttribute
+    NumberAttribute,
+    TTLAttribute,
+    UnicodeSetAttribute
 )
 from datetime import datetime
 import uuid
 import os
 from django.utils.text import slugify
 from decouple import config
+from . import circuit, dynamo_config
+from .deadlines import timeout_step
 
 
-class Bio(Model):
+class BaseMeta:
+    """Connection settings shared by every table"""
+    region = config('AWS_REGION', default='us-east-1')
+    connect_timeout_seconds = dynamo_config.DYNAMODB_CONNECT_TIMEOUT
+    read_timeout_seconds = dynamo_config.DYNAMODB_READ_TIMEOUT
+    max_retry_attempts = dynamo_config.DYNAMODB_MAX_ATTEMPTS - 1
+    max_pool_connections = dynamo_config.DYNAMODB_MAX_POOL_CONNECTIONS
+
+
+class TunedConnection(Connection):
+    """
+    PynamoDB Connection whose botocore client comes from
+    dynamo_config.create_client() and whose calls go through the table's
+    circuit breaker (blog/circuit.py). Under a request deadline, calls use a
+    client with timeouts capped to what is left of it (blog/deadlines.py).
+    """
+    
+    def __init__(self, table_name, **kwargs):
+        super().__init__(**kwargs)
+        self.breaker = circuit.breaker(table_name)
+        self._capped_clients = {}  # Timeout step -> client
+    
+    @property
+    def client(self):
+        step = timeout_step(max(dynamo_config.DYNAMODB_CONNECT_TIMEOUT, dynamo_config.DYNAMODB_READ_TIMEOUT))
+        client = self._client if step is None else self._capped_clients.get(step)
+        # Same rebuild rule as PynamoDB's: botocore caches empty credentials after
+        # an instance metadata hiccup, and a client without them never recovers
+        if client is None or (client._request_signer and not client._request_signer._credentials):
+            client = dynamo_config.create_client(self.region, self.host, timeout=step)
+            client.meta.events.register_first('before-send.*.*', self._before_send)
+            if step is None:
+                self._client = client
+            else:
+                self._capped_clients[step] = client
+        return client
+    
+    def dispatch(self, operation_name, operation_kwargs):
+        return self.breaker.call(super().dispatch, operation_name, operation_kwargs)
+
+
+class BaseModel(Model):
+    """
+    Base for all tables: connections are TunedConnections, so they use the
+    tuned botocore client configuration and go through the table's circuit
+    breaker
+    """
+    
+    @classmethod
+    def _get_connection(cls):
+        connection = super()._get_connection()
+        if not isinstance(connection.connection, TunedConnection):
+            tuned = TunedConnection(
+                cls.Meta.table_name,
+                region=cls.Meta.region,
+                host=cls.Meta.host,
+                connect_timeout_seconds=cls.Meta.connect_timeout_seconds,
+                read_timeout_seconds=cls.Meta.read_timeout_seconds,
+                max_retry_attempts=cls.Meta.max_retry_attempts,
+                max_pool_connections=cls.Meta.max_pool_connections,
+                extra_headers=cls.Meta.extra_headers,
+                aws_access_key_id=cls.Meta.aws_access_key_id,
+                aws_secret_access_key=cls.Meta.aws_secret_access_key,
+                aws_session_token=cls.Meta.aws_session_token,
+            )
+            tuned.add_meta_table(connection.get_meta_table())
+            connection.connection = tuned
+        return connection
+
+
+class ContentModel(BaseModel):
+    """
+    Base for the content the API serves (bio, posts, videos, projects):
+    every write is logged in the change log (blog/changes.py) and sent as
+    content_saved / content_deleted, which derived data (indexes, facets,
+    cached responses) follows. Tables of derived data don't signal.
+    """
+
+    def save(self, **kwargs):
+        result = super().save(**kwargs)
+        # Imported here: these modules need the Django app registry,
+        # and this module is also loaded before Django is set up (gunicorn post_fork)
+        from .changes import record
+        from .signals import content_saved
+        record(self)
+        content_saved.send(sender=type(self), item=self)
+        return result
+
+    def delete(self, **kwargs):
+        result = super().delete(**kwargs)
+        from .changes import record
+        from .signals import content_deleted
+        record(self, deleted=True)
+        content_deleted.send(sender=type(self), item=self)
+        return result
+
+
+class ImageVariant(MapAttribute):
+    """One resized rendition of an item's image, generated at upload time"""
+    key = UnicodeAttribute()
+    width = NumberAttribute()
+    height = NumberAttribute()
+    format = UnicodeAttribute()
+
+
+class Bio(ContentModel):
     """Single bio instance for the author"""
     
-    class Meta:
+    class Meta(BaseMeta):
         table_name = config('DYNAMODB_BIO_TABLE', default='cgstewart-bio-production')
-        region = config('AWS_REGION', default='us-east-1')
         
     # Use a fixed ID since there's only one bio
     id = UnicodeAttribute(hash_key=True, default='author_bio')
@@ -32,6 +141,11 @@ class Bio(Model):
     # Bio content
     about = UnicodeAttribute()
     image_url = UnicodeAttribute(null=True)
+    image_variants = ListAttribute(of=ImageVariant, default=list)
+    image_width = NumberAttribute(null=True)
+    image_height = NumberAttribute(null=True)
+    image_color = UnicodeAttribute(null=True)
+    image_placeholder = UnicodeAttribute(null=True)
     
     # Social Media Links
     x_url = UnicodeAttribute(null=True)
@@ -52,12 +166,11 @@ class Bio(Model):
         return super().save(**kwargs)
 
 
-class Post(Model):
+class Post(ContentModel):
     """Blog posts"""
     
-    class Meta:
+    class Meta(BaseMeta):
         table_name = config('DYNAMODB_POSTS_TABLE', default='cgstewart-posts-production')
-        region = config('AWS_REGION', default='us-east-1')
         
     # Primary key
     id = UnicodeAttribute(hash_key=True, default=lambda: str(uuid.uuid4()))
@@ -66,15 +179,33 @@ class Post(Model):
     title = UnicodeAttribute()
     slug = UnicodeAttribute()
     image_url = UnicodeAttribute(null=True)
+    image_variants = ListAttribute(of=ImageVariant, default=list)
+    image_width = NumberAttribute(null=True)
+    image_height = NumberAttribute(null=True)
+    image_color = UnicodeAttribute(null=True)
+    image_placeholder = UnicodeAttribute(null=True)
     excerpt = UnicodeAttribute()
     content = UnicodeAttribute()
     
+    # Sanitised HTML and table of contents of `content`, rendered on save (blog/rendering.py)
+    content_html = UnicodeAttribute(null=True)
+    content_hash = UnicodeAttribute(null=True)
+    toc = ListAttribute(default=list)
+    
+    # Reading metadata derived from `content` on save, small enough for list projections
+    word_count = NumberAttribute(null=True)
+    reading_time = NumberAttribute(null=True)  # Minutes
+    heading_count = NumberAttribute(null=True)
+    
     # Author (simplified - just store username/id)
     author = UnicodeAttribute()
     
     # Tags as a list
     tags = ListAttribute(of=UnicodeAttribute, default=list)
     
+    # Most similar posts in list shape, precomputed by blog/related.py
+    related = ListAttribute(default=list)
+    
     # Status
     is_published = BooleanAttribute(default=True)
     
@@ -86,16 +217,20 @@ class Post(Model):
         # Auto-generate slug if not provided
         if not self.slug:
             self.slug = slugify(self.title)
+        # Rendered here so reads never pay for markdown
+        from .rendering import auto_excerpt, render_item
+        render_item(self)
+        if not self.excerpt:
+            self.excerpt = auto_excerpt(self.content_html)
         self.updated_at = datetime.now()
         return super().save(**kwargs)
 
 
-class Video(Model):
+class Video(ContentModel):
     """Video content"""
     
-    class Meta:
+    class Meta(BaseMeta):
         table_name = config('DYNAMODB_VIDEOS_TABLE', default='cgstewart-videos-production')
-        region = config('AWS_REGION', default='us-east-1')
         
     # Primary key
     id = UnicodeAttribute(hash_key=True, default=lambda: str(uuid.uuid4()))
@@ -121,12 +256,11 @@ class Video(Model):
         return super().save(**kwargs)
 
 
-class Project(Model):
+class Project(ContentModel):
     """Portfolio projects"""
     
-    class Meta:
+    class Meta(BaseMeta):
         table_name = config('DYNAMODB_PROJECTS_TABLE', default='cgstewart-projects-production')
-        region = config('AWS_REGION', default='us-east-1')
         
     # Primary key
     id = UnicodeAttribute(hash_key=True, default=lambda: str(uuid.uuid4()))
@@ -137,13 +271,31 @@ class Project(Model):
     description = UnicodeAttribute()
     content = UnicodeAttribute(null=True)
     
+    # Sanitised HTML and table of contents of `content`, rendered on save (blog/rendering.py)
+    content_html = UnicodeAttribute(null=True)
+    content_hash = UnicodeAttribute(null=True)
+    toc = ListAttribute(default=list)
+    
+    # Reading metadata derived from `content` on save, small enough for list projections
+    word_count = NumberAttribute(null=True)
+    reading_time = NumberAttribute(null=True)  # Minutes
+    heading_count = NumberAttribute(null=True)
+    
     # Stack as a list of technologies
     stack = ListAttribute(of=UnicodeAttribute, default=list)
     
+    # Most similar projects in list shape, precomputed by blog/related.py
+    related = ListAttribute(default=list)
+    
     # URLs
     website_url = UnicodeAttribute(null=True)
     github_url = UnicodeAttribute(null=True)
     image_url = UnicodeAttribute(null=True)
+    image_variants = ListAttribute(of=ImageVariant, default=list)
+    image_width = NumberAttribute(null=True)
+    image_height = NumberAttribute(null=True)
+    image_color = UnicodeAttribute(null=True)
+    image_placeholder = UnicodeAttribute(null=True)
     
     # Status
     is_published = BooleanAttribute(default=True)
@@ -156,14 +308,65 @@ class Project(Model):
         # Auto-generate slug if not provided
         if not self.slug:
             self.slug = slugify(self.title)
+        # Rendered here so reads never pay for markdown
+        from .rendering import auto_excerpt, render_item
+        render_item(self)
+        if not self.description:
+            self.description = auto_excerpt(self.content_html)
         self.updated_at = datetime.now()
         return super().save(**kwargs)
 
 
+class Facet(BaseModel):
+    """
+    Aggregates maintained on publish (see blog/facets.py). For each facet
+    (e.g. 'stack') there is one item per value, with the ids of the published
+    items carrying it and their count, and one '<facet>#item' item per indexed
+    item recording the values it is currently counted under.
+    """
+    
+    class Meta(BaseMeta):
+        table_name = config('DYNAMODB_FACETS_TABLE', default='cgstewart-facets-production')
+    
+    pk = UnicodeAttribute(hash_key=True)
+    sk = UnicodeAttribute(range_key=True)
+    count = NumberAttribute(default=0)
+    members = UnicodeSetAttribute(null=True)
+
+
+class Change(BaseModel):
+    """
+    Change log of the bio, posts, projects and videos (see blog/changes.py):
+    one item per save or delete, all in one partition sorted by when they
+    were logged. Items expire through the table's TTL on `expires_at`.
+    """
+    
+    class Meta(BaseMeta):
+        table_name = config('DYNAMODB_CHANGES_TABLE', default='cgstewart-changes-production')
+    
+    pk = UnicodeAttribute(hash_key=True)  # Always 'changes'
+    sk = UnicodeAttribute(range_key=True)  # '<logged at>~<type>~<id>'
+    item_id = UnicodeAttribute()
+    item_type = UnicodeAttribute()
+    slug = UnicodeAttribute(null=True)
+    status = UnicodeAttribute()  # 'published', 'unpublished' or 'deleted'
+    updated_at = UTCDateTimeAttribute()
+    expires_at = TTLAttribute(null=True)
+
+
+ALL_MODELS = [Bio, Post, Video, Project, Facet, Change]
+
+
 # Utility functions for table management
+def warm_up_connections():
+    """Open the connection pool of every table (run once per worker after fork)"""
+    # Runs before Django is set up, hence config() rather than settings
+    dynamo_config.warm_up_connections(ALL_MODELS, budget=config('REQUEST_DEADLINE_SECONDS', default=3.0, cast=float))
+
+
 def create_all_tables(wait=True):
     """Create all DynamoDB tables"""
-    models = [Bio, Post, Video, Project]
+    models = ALL_MODELS
     
     for model in models:
         if not model.exists():
@@ -175,7 +378,7 @@ def create_all_tables(wait=True):
 
 def delete_all_tables():
     """Delete all DynamoDB tables (use with caution!)"""
-    models = [Bio, Post, Video, Project]
+    models = ALL_MODELS
     
     for model in models:
         if model.exists():
@@ -0,0 +1,137 @@
+"""
+Precomputed "related content" for posts and projects.
+
+On publish (and with `manage.py compute_related`) every published item of
+the model is turned into a TF-IDF vector over its title, tags/stack and
+text, and each item's nearest neighbours by cosine similarity are stored
+on it, already serialised in list shape. Detail views return them as part
+of the item they already read, at no extra read cost.
+"""
+
+import heapq
+import logging
+import math
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.dispatch import receiver
+from .response_cache import responses
+from .search import tokenize
+from .signals import content_deleted, content_saved
+
+logger = logging.getLogger(__name__)
+
+# Tags and stack entries say more about what an item is about than body text
+KEYWORD_WEIGHT = 3
+
+# Only an item's most distinctive terms take part in the comparison: that
+# keeps the number of compared pairs small and drops noise from long posts
+MAX_TERMS = 64
+
+# One job at a time per process; a publish burst queues up behind it
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related')
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def terms(item):
+    """Term counts of a post or project"""
+    keywords = item.tags if hasattr(item, 'tags') else item.stack
+    summary = getattr(item, 'excerpt', None) or getattr(item, 'description', None)
+    counts = Counter(tokenize(' '.join([item.title, summary or '', item.content or ''])))
+    for keyword in keywords:
+        counts[keyword.lower()] += KEYWORD_WEIGHT
+    return counts
+
+
+def tfidf_vectors(documents):
+    """
+    Unit-length sparse TF-IDF vectors ({term: weight}) of a list of term
+    Counters, keeping each document's MAX_TERMS highest-weighted terms
+    """
+    document_frequency = Counter(term for counts in documents for term in counts)
+    total = len(documents)
+    vectors = []
+    for counts in documents:
+        weights = (
+            (term, (1 + math.log(count)) * math.log((1 + total) / (1 + document_frequency[term])))
+            for term, count in counts.items()
+        )
+        vector = dict(heapq.nlargest(MAX_TERMS, weights, key=lambda pair: pair[1]))
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in vector.items() if weight})
+    return vectors
+
+
+def nearest_neighbours(vectors, count):
+    """
+    Top `count` most similar other documents for every document, as lists of
+    indexes. Dot products are accumulated through an inverted index, so only
+    pairs sharing a term are ever compared.
+    """
+    postings = {}
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            postings.setdefault(term, []).append((index, weight))
+
+    neighbours = []
+    for index, vector in enumerate(vectors):
+        scores = Counter()
+        for term, weight in vector.items():
+            for other, other_weight in postings[term]:
+                if other != index:
+                    scores[other] += weight * other_weight
+        best = heapq.nlargest(count, scores.items(), key=lambda pair: (pair[1], -pair[0]))
+        neighbours.append([other for other, score in best if score > 0])
+    return neighbours
+
+
+def refresh_related(model_name):
+    """Recompute and store the related items of every published item of a model"""
+    from . import pynamo_models
+    from .serializers import PostListSerializer, ProjectListSerializer
+
+    model = getattr(pynamo_models, model_name)
+    serializer = PostListSerializer if model_name == 'Post' else ProjectListSerializer
+    items = list(model.scan(model.is_published == True))  # noqa: E712
+    neighbours = nearest_neighbours(tfidf_vectors([terms(item) for item in items]), settings.RELATED_ITEMS_COUNT)
+    cards = serializer(items, many=True).data
+
+    updated = 0
+    for item, related in zip(items, neighbours):
+        value = [dict(cards[other]) for other in related]
+        if value != item.related:
+            # update() rather than save(): it doesn't send content_saved, so no loop
+            item.update(actions=[model.related.set(value)])
+            updated += 1
+    if updated:
+        # Nor does it retire the cached detail responses still holding the old lists
+        responses.clear()
+    return updated
+
+
+def schedule_refresh(model_name):
+    """Queue a background refresh unless one for the model is already waiting"""
+    with _pending_lock:
+        if model_name in _pending:
+            return
+        _pending.add(model_name)
+
+    def run():
+        with _pending_lock:
+            _pending.discard(model_name)
+        try:
+            refresh_related(model_name)
+        except Exception:
+            logger.exception('Related content refresh failed', extra={'model': model_name})
+
+    _executor.submit(run)
+
+
+@receiver(content_saved)
+@receiver(content_deleted)
+def refresh_on_change(sender, item, **kwargs):
+    """Any publish, edit or delete can change other items' neighbours"""
+    if sender.__name__ in ('Post', 'Project'):
+        schedule_refresh(sender.__name__)
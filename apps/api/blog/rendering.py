@@ -0,0 +1,150 @@
+"""
+Server-side rendering of post and project markdown.
+
+Content is rendered once when an item is saved (see Post.save() and
+Project.save()): markdown to HTML with Pygments syntax highlighting
+(`highlight` CSS classes), heading anchors and a table of contents, then
+sanitised with an allow-list. Reading metadata (word count, reading time,
+heading count) is derived from the same render and stored alongside, so
+lists never need the body. Items saved before this existed are rendered on
+first read through a cache keyed by the content hash, and brought up to
+date by `manage.py backfill_content_metadata`.
+"""
+
+import hashlib
+import html as html_lib
+import math
+import re
+import threading
+from collections import OrderedDict
+
+EXTENSIONS = ['extra', 'sane_lists', 'codehilite', 'toc']
+EXTENSION_CONFIGS = {
+    'codehilite': {'css_class': 'highlight', 'guess_lang': False},
+    'toc': {'permalink': False, 'toc_depth': '2-4'},
+}
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'img', 'li', 'ol', 'p', 'pre', 'span',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'align'},
+    'th': {'align'},
+    # Heading anchors, footnote targets and Pygments token classes
+    **{tag: {'id'} for tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li', 'sup')},
+    **{tag: {'class'} for tag in ('code', 'div', 'pre', 'span')},
+}
+
+# Lazily rendered documents kept per worker
+CACHE_SIZE = 256
+_rendered = OrderedDict()  # content hash -> (html, toc), least recently used first
+_rendered_lock = threading.Lock()
+
+WORDS_PER_MINUTE = 230
+EXCERPT_LENGTH = 200
+
+TAG_RE = re.compile(r'<[^>]+>')
+HEADING_RE = re.compile(r'<h[1-6][\s>]')
+PARAGRAPH_RE = re.compile(r'<p>(.*?)</p>', re.S)
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def toc_entries(tokens):
+    """The toc extension's tokens as [{'id', 'title', 'level', 'children'}]"""
+    return [
+        {'id': token['id'], 'title': token['name'], 'level': token['level'], 'children': toc_entries(token['children'])}
+        for token in tokens
+    ]
+
+
+def render_markdown(text):
+    """
+    Render markdown to sanitised HTML
+
+    Returns:
+        tuple: (html, table of contents)
+    """
+    # Only workers that render pay for nh3 (markdown and Pygments are loaded at
+    # boot anyway, by rest_framework.compat: see IMPORT_TIME_BUDGET_MS)
+    import markdown
+    import nh3
+
+    converter = markdown.Markdown(extensions=EXTENSIONS, extension_configs=EXTENSION_CONFIGS)
+    html = converter.convert(text or '')
+    html = nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, link_rel='noopener noreferrer')
+    return html, toc_entries(converter.toc_tokens)
+
+
+def _render_cached(digest, text):
+    """
+    render_markdown(text), cached by `digest` alone: the cache holds hashes
+    and rendered output, never the source text
+    """
+    with _rendered_lock:
+        if digest in _rendered:
+            _rendered.move_to_end(digest)
+            return _rendered[digest]
+    result = render_markdown(text)
+    with _rendered_lock:
+        _rendered[digest] = result
+        while len(_rendered) > CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return result
+
+
+def plain_text(html):
+    return ' '.join(html_lib.unescape(TAG_RE.sub(' ', html)).split())
+
+
+def reading_metadata(html):
+    """Word count, reading time in minutes and heading count of rendered content"""
+    words = len(plain_text(html).split())
+    return {
+        'word_count': words,
+        'reading_time': math.ceil(words / WORDS_PER_MINUTE),
+        'heading_count': len(HEADING_RE.findall(html)),
+    }
+
+
+def auto_excerpt(html, length=EXCERPT_LENGTH):
+    """The first paragraph of rendered content as plain text, cut at a word boundary"""
+    for paragraph in PARAGRAPH_RE.findall(html or ''):
+        text = plain_text(paragraph)
+        if text:
+            if len(text) <= length:
+                return text
+            return text[:length].rsplit(' ', 1)[0].rstrip(' .,;:') + '…'
+    return ''
+
+
+def changed_attributes(item):
+    """Rendered content and reading metadata of an item, or {} when they're up to date"""
+    text = item.content or ''
+    digest = content_hash(text)
+    if item.content_html is not None and item.content_hash == digest and item.word_count is not None:
+        return {}
+    html, toc = render_markdown(text)
+    return {'content_html': html, 'toc': toc, 'content_hash': digest, **reading_metadata(html)}
+
+
+def render_item(item):
+    """Store rendered content and reading metadata on an item (called from save())"""
+    for name, value in changed_attributes(item).items():
+        setattr(item, name, value)
+
+
+def rendered(item):
+    """(html, toc) of an item: as stored at save time, else rendered once per content hash"""
+    text = item.content or ''
+    digest = content_hash(text)
+    if item.content_html is not None and item.content_hash == digest:
+        return item.content_html, item.toc
+    return _render_cached(digest, text)
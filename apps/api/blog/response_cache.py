@@ -0,0 +1,244 @@
+"""
+Response cache for the read views, with request coalescing.
+
+Responses are kept in the default Django cache for RESPONSE_CACHE_SECONDS
+and may then be served stale for RESPONSE_CACHE_STALE_SECONDS while a
+single background refresh runs. When a key has to be (re)computed, only one
+caller does it:
+
+- within a process, concurrent callers for the same key wait on the one
+  computation in flight and share its result (single-flight);
+- across processes, the computing caller holds a lock taken with the
+  cache's atomic add(), so with a shared cache backend only one worker in
+  the fleet reads DynamoDB for a key; the others serve the stale value, or
+  wait briefly for the winner's.
+
+Any content change bumps the cache generation, which retires every cached
+response in this process at once. The last good response of each request
+is also kept, across generations, for RESPONSE_CACHE_LAST_GOOD_SECONDS:
+when recomputing fails (DynamoDB throttling, an open circuit breaker, see
+blog/circuit.py, or a spent request deadline, see blog/deadlines.py) it is
+served instead, with Age and Warning headers.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from rest_framework.response import Response
+from .compression import Representation, wants_json
+from .deadlines import remaining
+from .signals import content_deleted, content_saved
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = 'responses:generation'
+
+# How often a caller that lost the cross-process lock looks for the winner's value
+LOCK_POLL_SECONDS = 0.05
+
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='response-cache')
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its outcome"""
+
+    class Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self.Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class ResponseCache:
+    """
+    Cached values with stale-while-revalidate and coalesced recomputation
+
+    Args:
+        fresh_seconds: How long a value is served as is
+        stale_seconds: How much longer it may be served while being refreshed
+        lock_seconds: Lifetime of the cross-process lock (bounds a lost holder)
+    """
+
+    def __init__(self, fresh_seconds=None, stale_seconds=None, lock_seconds=None):
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.lock_seconds = lock_seconds
+        self.flights = SingleFlight()
+
+    def _setting(self, value, name):
+        return value if value is not None else getattr(settings, name)
+
+    def versioned(self, key):
+        generation = cache.get_or_set(GENERATION_KEY, 1, None)
+        return f'responses:{generation}:{key}'
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """
+        The cached value of `key`, computing it with `compute()` on a miss
+
+        Values for which `cacheable(value)` is false are handed to every
+        waiting caller but not stored.
+        """
+        return self.fetch(key, compute, cacheable)[0]
+
+    def fetch(self, key, compute, cacheable=lambda value: True):
+        """Like get_or_compute(), returning (value, time it was stored or None if just computed)"""
+        versioned = self.versioned(key)
+        entry = cache.get(versioned)
+        if entry is not None:
+            stored_at, fresh_until, value = entry
+            if time.time() >= fresh_until and not self.flights.in_flight(versioned):
+                _refresher.submit(self._refresh_in_background, key, versioned, compute, cacheable)
+            return value, stored_at
+        return self.flights.do(versioned, lambda: self._compute(key, versioned, compute, cacheable))
+
+    def _refresh_in_background(self, key, versioned, compute, cacheable):
+        try:
+            self.flights.do(versioned, lambda: self._compute(key, versioned, compute, cacheable))
+        except Exception:
+            logger.exception('Background response refresh failed', extra={'key': key})
+
+    def _compute(self, key, versioned, compute, cacheable):
+        # Another flight may have stored a fresh value since this caller looked
+        entry = cache.get(versioned)
+        if entry is not None and time.time() < entry[1]:
+            return entry[2], entry[0]
+
+        lock_seconds = self._setting(self.lock_seconds, 'RESPONSE_CACHE_LOCK_SECONDS')
+        lock_key = f'{versioned}:lock'
+        if not cache.add(lock_key, True, lock_seconds):
+            # Another process is computing this key
+            if entry is not None:
+                return entry[2], entry[0]
+            budget = remaining()
+            wait_until = time.time() + (lock_seconds if budget is None else min(lock_seconds, max(budget, 0)))
+            while time.time() < wait_until:
+                time.sleep(LOCK_POLL_SECONDS)
+                entry = cache.get(versioned)
+                if entry is not None:
+                    return entry[2], entry[0]
+
+        try:
+            value = compute()
+            if cacheable(value):
+                now = time.time()
+                fresh = self._setting(self.fresh_seconds, 'RESPONSE_CACHE_SECONDS')
+                stale = self._setting(self.stale_seconds, 'RESPONSE_CACHE_STALE_SECONDS')
+                cache.set(versioned, (now, now + fresh, value), fresh + stale)
+                cache.set(f'responses:last-good:{key}', (now, value), settings.RESPONSE_CACHE_LAST_GOOD_SECONDS)
+            return value, None
+        finally:
+            cache.delete(lock_key)
+
+    def last_good(self, key):
+        """(value, time stored) of the last value cached for `key` in any generation, or None"""
+        entry = cache.get(f'responses:last-good:{key}')
+        return (entry[1], entry[0]) if entry is not None else None
+
+    def is_stale(self, stored_at):
+        return time.time() - stored_at >= self._setting(self.fresh_seconds, 'RESPONSE_CACHE_SECONDS')
+
+    def clear(self):
+        """Retire every cached value (in this process, or everywhere with a shared cache)"""
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, 2, None)
+
+
+responses = ResponseCache()
+
+
+def request_key(request):
+    """The path plus its query parameters in a canonical order"""
+    params = sorted(request.query_params.lists())
+    query = '&'.join(f'{name}={value}' for name, values in params for value in sorted(values))
+    return f'{request.path}?{query}'
+
+
+def cached_response(method):
+    """
+    Serve an APIView's get() from the response cache; only 200s are stored,
+    with their precompressed JSON (see blog/compression.py). A server error
+    is replaced by the last good response when there is one.
+    """
+
+    @wraps(method)
+    def get(view, request, *args, **kwargs):
+        def compute():
+            response = method(view, request, *args, **kwargs)
+            representation = None
+            if response.status_code == 200 and settings.RESPONSE_COMPRESSION_ENABLED:
+                representation = Representation.render(response.data)
+            return response.status_code, response.data, dict(response.items()), representation
+
+        if not settings.RESPONSE_CACHE_ENABLED:
+            return method(view, request, *args, **kwargs)
+        key = request_key(request)
+        (status_code, data, headers, representation), stored_at = responses.fetch(
+            key, compute, cacheable=lambda value: value[0] == 200,
+        )
+        warning = None
+        if status_code >= 500:
+            last_good = responses.last_good(key)
+            if last_good is not None:
+                (status_code, data, headers, representation), stored_at = last_good
+                warning = '111 - "Revalidation Failed"'
+        if stored_at is not None and warning is None and responses.is_stale(stored_at):
+            warning = '110 - "Response is Stale"'
+
+        if representation is not None and wants_json(request):
+            # Stored JSON, in the encoding the client prefers: nothing to render or compress
+            response = representation.response(request, status_code, headers)
+        else:
+            response = Response(data, status=status_code, headers=headers)
+        if stored_at is not None:
+            response['Age'] = str(max(0, int(time.time() - stored_at)))
+        if warning:
+            response['Warning'] = warning
+        return response
+
+    return get
+
+
+@receiver(content_saved)
+@receiver(content_deleted)
+def clear_on_change(sender, item, **kwargs):
+    responses.clear()
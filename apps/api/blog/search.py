@@ -0,0 +1,227 @@
+"""
+Full-text search over published posts, projects and videos.
+
+Documents are tokenised, stemmed and stored in an inverted index laid out
+as flat arrays (CSR style: one offsets array into shared doc-id and term-
+frequency arrays), ranked with BM25. The index is a prebuilt artifact
+(blog/artifacts.py): workers hold it in memory and queries never touch
+DynamoDB. Publishing, editing or deleting an item updates it in place from
+the per-document term counts already in the index, without rescanning.
+"""
+
+import heapq
+import json
+import math
+import re
+import struct
+import zlib
+from array import array
+from collections import Counter
+from django.conf import settings
+from .artifacts import Artifact
+
+ARTIFACT_NAME = 'search.idx'
+FORMAT = b'BM25v1'
+
+K1 = 1.2
+B = 0.75
+
+# How much one occurrence counts, per field
+FIELD_WEIGHTS = {'title': 3, 'keywords': 2, 'summary': 1, 'content': 1}
+
+STOP_WORDS = frozenset('''
+    a an and are as at be but by for from has have how i in is it its of on or
+    that the this to was were what when where which who why will with you your
+'''.split())
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# (suffix, replacement), longest first; applied once, keeping a stem of 3+ letters
+SUFFIXES = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('ousness', 'ous'),
+    ('iveness', 'ive'), ('tional', 'tion'), ('ements', ''), ('ments', ''), ('ement', ''),
+    ('ment', ''), ('ness', ''), ('ings', ''), ('edly', ''), ('ing', ''), ('ies', 'y'),
+    ('ed', ''), ('ly', ''), ('es', ''), ('s', ''),
+)
+
+
+def stem(word):
+    """A light Porter-style stemmer: 'running' -> 'run', 'libraries' -> 'library'"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == 's' and word[-2] in 'su':
+                break  # 'class', 'status'
+            if suffix == 'es' and word[-3] not in 'sxz' and word[-4:-2] not in ('ch', 'sh'):
+                word = word[:-1]  # 'caches' -> 'cache'
+                break
+            word = word[:-len(suffix)] + replacement
+            if replacement == '' and len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]  # 'running' -> 'runn' -> 'run'
+            break
+    if len(word) >= 4 and word.endswith('e'):
+        word = word[:-1]  # 'make' and 'making' both -> 'mak'
+    return word
+
+
+def tokenize(text):
+    """Lowercased, stemmed terms of `text`, without stop words"""
+    return [stem(token) for token in TOKEN_RE.findall((text or '').lower()) if token not in STOP_WORDS]
+
+
+def document(kind, item):
+    """
+    Searchable fields and display data of a published item
+
+    Returns:
+        tuple: (info dict returned with results, Counter of weighted terms)
+    """
+    if kind == 'post':
+        fields = {'title': item.title, 'keywords': ' '.join(item.tags), 'summary': item.excerpt, 'content': item.content}
+        summary = item.excerpt
+    elif kind == 'project':
+        fields = {'title': item.title, 'keywords': ' '.join(item.stack), 'summary': item.description, 'content': item.content}
+        summary = item.description
+    else:
+        fields = {'title': item.title, 'summary': item.description}
+        summary = item.description
+
+    terms = Counter()
+    for field, text in fields.items():
+        for term in tokenize(text):
+            terms[term] += FIELD_WEIGHTS[field]
+    info = {'type': kind, 'id': item.id, 'slug': item.slug, 'title': item.title, 'summary': (summary or '')[:200]}
+    return info, terms
+
+
+class SearchIndex:
+    """
+    BM25 inverted index
+
+    `terms[i]`'s postings are `doc_ids[offsets[i]:offsets[i + 1]]` with the
+    matching `frequencies`; `docs[d]` is the info dict of document d and
+    `lengths[d]` its weighted term count.
+    """
+
+    def __init__(self, docs, lengths, terms, offsets, doc_ids, frequencies):
+        self.docs = docs
+        self.lengths = lengths
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.frequencies = frequencies
+        self.term_index = {term: i for i, term in enumerate(terms)}
+        # BM25's length normalisation depends only on the document, so it's precomputed
+        # `or 1.0`: documents whose fields have no terms (all stop words, say) have length 0
+        average_length = ((sum(lengths) / len(lengths)) if lengths else 0.0) or 1.0
+        self.norms = [K1 * (1 - B + B * length / average_length) for length in lengths]
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Build from (info, Counter) pairs"""
+        documents = list(documents)
+        postings = {}
+        for doc_id, (_, terms) in enumerate(documents):
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append((doc_id, frequency))
+
+        terms = sorted(postings)
+        offsets, doc_ids, frequencies = array('I', [0]), array('I'), array('I')
+        for term in terms:
+            for doc_id, frequency in postings[term]:
+                doc_ids.append(doc_id)
+                frequencies.append(frequency)
+            offsets.append(len(doc_ids))
+        lengths = array('I', (sum(counts.values()) for _, counts in documents))
+        return cls([info for info, _ in documents], lengths, terms, offsets, doc_ids, frequencies)
+
+    def documents(self):
+        """The (info, Counter) pairs the index was built from"""
+        counts = [Counter() for _ in self.docs]
+        for i, term in enumerate(self.terms):
+            for position in range(self.offsets[i], self.offsets[i + 1]):
+                counts[self.doc_ids[position]][term] = self.frequencies[position]
+        return list(zip(self.docs, counts))
+
+    def without(self, kind, item_id):
+        return SearchIndex.from_documents(
+            (info, counts) for info, counts in self.documents()
+            if not (info['type'] == kind and info['id'] == item_id)
+        )
+
+    def with_document(self, info, counts):
+        kept = [(i, c) for i, c in self.documents() if not (i['type'] == info['type'] and i['id'] == info['id'])]
+        return SearchIndex.from_documents(kept + [(info, counts)])
+
+    def search(self, query, limit=10, kind=None):
+        """Top `limit` documents for `query` as info dicts with a `score`"""
+        total = len(self.docs)
+        scores = {}
+        for term in set(tokenize(query)):
+            i = self.term_index.get(term)
+            if i is None:
+                continue
+            start, end = self.offsets[i], self.offsets[i + 1]
+            idf = math.log(1 + (total - (end - start) + 0.5) / ((end - start) + 0.5))
+            norms = self.norms
+            for doc_id, frequency in zip(self.doc_ids[start:end], self.frequencies[start:end]):
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (K1 + 1) / (frequency + norms[doc_id])
+
+        if kind:
+            scores = {doc_id: score for doc_id, score in scores.items() if self.docs[doc_id]['type'] == kind}
+        best = heapq.nlargest(limit, scores.items(), key=lambda pair: pair[1])
+        return [dict(self.docs[doc_id], score=round(score, 4)) for doc_id, score in best]
+
+    def to_bytes(self):
+        """FORMAT, JSON header length, JSON header (docs, terms), then the raw arrays; zlib-compressed"""
+        header = json.dumps({'docs': self.docs, 'terms': self.terms}, separators=(',', ':')).encode()
+        arrays = [self.lengths, self.offsets, self.doc_ids, self.frequencies]
+        body = FORMAT + struct.pack('<I', len(header)) + header
+        for values in arrays:
+            values = array('I', values)
+            body += struct.pack('<I', len(values)) + values.tobytes()
+        return zlib.compress(body)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = zlib.decompress(data)
+        if not data.startswith(FORMAT):
+            raise ValueError('Not a search index')
+        position = len(FORMAT)
+        (header_length,) = struct.unpack_from('<I', data, position)
+        position += 4
+        header = json.loads(data[position:position + header_length])
+        position += header_length
+        arrays = []
+        for _ in range(4):
+            (count,) = struct.unpack_from('<I', data, position)
+            position += 4
+            values = array('I')
+            values.frombytes(data[position:position + count * values.itemsize])
+            position += count * values.itemsize
+            arrays.append(values)
+        lengths, offsets, doc_ids, frequencies = arrays
+        return cls(header['docs'], lengths, header['terms'], offsets, doc_ids, frequencies)
+
+
+SEARCHABLE = {'Post': 'post', 'Project': 'project', 'Video': 'video'}
+
+
+def build_index():
+    """Full rebuild from every published post, project and video"""
+    from . import pynamo_models
+
+    documents = []
+    for model_name, kind in SEARCHABLE.items():
+        model = getattr(pynamo_models, model_name)
+        documents.extend(document(kind, item) for item in model.scan(model.is_published == True))  # noqa: E712
+    return SearchIndex.from_documents(documents)
+
+
+index = Artifact(ARTIFACT_NAME, loads=SearchIndex.from_bytes, dumps=SearchIndex.to_bytes, build=build_index)
+index.connect(SEARCHABLE, to_entry=document, add=lambda current, entry: current.with_document(*entry))
+
+
+def search(query, limit=10, kind=None):
+    return index.get().search(query, limit=min(limit, settings.SEARCH_MAX_RESULTS), kind=kind)
@@ -1,110 +1,194 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import Bio, Post, Video, Project
-
-
-class BioSerializer(serializers.ModelSerializer):
-    image_url = serializers.SerializerMethodField()
-    resume_url = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Bio
-        fields = [
-            'id', 'image', 'image_url', 'about', 'x_url', 'linkedin_url', 'github_url', 
-            'youtube_url', 'twitch_url', 'resume', 'resume_url', 'updated_at'
-        ]
-    
-    def get_image_url(self, obj):
-        """Get public URL for image"""
-        return obj.image.url if obj.image else None
-    
-    def get_resume_url(self, obj):
-        """Get public URL for resume"""
-        return obj.resume.url if obj.resume else None
-
-
-class PostSerializer(serializers.ModelSerializer):
-    author_name = serializers.CharField(source='author.username', read_only=True)
-    image_url = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Post
-        fields = [
-            'id', 'title', 'image', 'image_url', 'excerpt', 'content', 'author', 'author_name',
-            'date_published', 'slug', 'tags', 'is_published', 'created_at', 'updated_at'
-        ]
-    
-    def get_image_url(self, obj):
-        """Get public URL for image"""
-        return obj.image.url if obj.image else None
-
-
-class PostListSerializer(serializers.ModelSerializer):
+
+
+# The API serves the PynamoDB items from blog/pynamo_models.py, so these are
+# plain read-only serializers over their attributes. `image` and `resume` are
+# kept as aliases of the URL fields for existing clients. Every serializer
+# can be narrowed to the fields a client asked for (?fields= / ?exclude=).
+
+IMAGE_MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+
+
+def image_sources(variants):
+    """
+    Group resized image variants into <picture> sources, best format first:
+    [{'type': 'image/avif', 'srcset': '<url> 320w, <url> 640w'}, ...]
+    """
+    sources = []
+    for fmt, mime_type in IMAGE_MIME_TYPES.items():
+        candidates = sorted((v for v in variants or [] if v.format == fmt), key=lambda v: v.width)
+        if candidates:
+            sources.append({
+                'type': mime_type,
+                'srcset': ', '.join(f'{default_storage.url(v.key)} {int(v.width)}w' for v in candidates),
+            })
+    return sources
+
+
+class ImageSourcesField(serializers.Field):
+    """Read-only, srcset-ready view of an item's `image_variants`"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'image_variants')
+        super().__init__(read_only=True, **kwargs)
+
+    def to_representation(self, value):
+        return image_sources(value)
+
+
+class FieldSelectionMixin(serializers.Serializer):
+    """
+    Serializer narrowed to `fields` (all fields when None). `attributes()`
+    gives the model attributes those fields read, so the view can fetch only
+    them from DynamoDB (a projection) instead of trimming whole items.
+    """
+
+    # Model attributes read by SerializerMethodFields that need more than their namesake
+    field_attributes = {}
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def select(cls, fields=None, exclude=None):
+        """Names of the fields to render: `fields` (default: all) minus `exclude`"""
+        available = list(cls._declared_fields)
+        unknown = [name for name in (fields or []) + (exclude or []) if name not in available]
+        if unknown:
+            raise serializers.ValidationError({'fields': f'Unknown fields: {", ".join(unknown)}'})
+        return [name for name in fields or available if name not in (exclude or [])]
+
+    @classmethod
+    def attributes(cls, names):
+        """Model attributes read by the fields `names`"""
+        attributes = set()
+        for name in names:
+            if name in cls.field_attributes:
+                attributes.update(cls.field_attributes[name])
+            else:
+                source = cls._declared_fields[name].source
+                # SerializerMethodFields ('*') read the attribute they're named after
+                attributes.add(name if source in (None, '*') else source.split('.')[0])
+        return attributes
+
+
+class BioSerializer(FieldSelectionMixin):
+    id = serializers.CharField()
+    image = serializers.CharField(source='image_url')
+    image_url = serializers.CharField()
+    image_sources = ImageSourcesField()
+    image_width = serializers.IntegerField()
+    image_height = serializers.IntegerField()
+    image_color = serializers.CharField()
+    image_placeholder = serializers.CharField()
+    about = serializers.CharField()
+    x_url = serializers.CharField()
+    linkedin_url = serializers.CharField()
+    github_url = serializers.CharField()
+    youtube_url = serializers.CharField()
+    twitch_url = serializers.CharField()
+    resume = serializers.CharField(source='resume_url')
+    resume_url = serializers.CharField()
+    updated_at = serializers.DateTimeField()
+
+
+class PostListSerializer(FieldSelectionMixin):
     """Simplified serializer for post listings"""
-    author = serializers.StringRelatedField(read_only=True)
-    image_url = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Post
-        fields = [
-            'id', 'title', 'image', 'image_url', 'excerpt', 'author', 
-            'date_published', 'slug', 'tags'
-        ]
-    
-    def get_image_url(self, obj):
-        """Get public URL for image"""
-        return obj.image.url if obj.image else None
-
-
-class VideoSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Video
-        fields = [
-            'id', 'title', 'video_url', 'slug', 'description', 
-            'is_published', 'created_at', 'updated_at'
-        ]
-
-
-class ProjectSerializer(serializers.ModelSerializer):
-    stack_list = serializers.SerializerMethodField()
-    image_url = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Project
-        fields = [
-            'id', 'title', 'description', 'stack', 'stack_list', 'website_url', 
-            'github_url', 'slug', 'content', 'image', 'image_url', 'is_published', 
-            'created_at', 'updated_at'
-        ]
-    
-    def get_stack_list(self, obj):
-        """Convert comma-separated stack string to list"""
-        if obj.stack:
-            return [tech.strip() for tech in obj.stack.split(',')]
-        return []
-    
-    def get_image_url(self, obj):
-        """Get public URL for image"""
-        return obj.image.url if obj.image else None
-
-
-class ProjectListSerializer(serializers.ModelSerializer):
+    id = serializers.CharField()
+    title = serializers.CharField()
+    image = serializers.CharField(source='image_url')
+    image_url = serializers.CharField()
+    image_sources = ImageSourcesField()
+    image_width = serializers.IntegerField()
+    image_height = serializers.IntegerField()
+    image_color = serializers.CharField()
+    image_placeholder = serializers.CharField()
+    excerpt = serializers.CharField()
+    author = serializers.CharField()
+    date_published = serializers.DateTimeField()
+    slug = serializers.CharField()
+    tags = serializers.ListField(child=serializers.CharField())
+    word_count = serializers.IntegerField()
+    reading_time = serializers.IntegerField()
+    heading_count = serializers.IntegerField()
+
+
+class RenderedContentMixin(serializers.Serializer):
+    """`content` rendered to sanitised HTML, with its table of contents (blog/rendering.py)"""
+    content_html = serializers.SerializerMethodField()
+    toc = serializers.SerializerMethodField()
+
+    field_attributes = {
+        'content_html': ['content', 'content_html', 'content_hash', 'toc'],
+        'toc': ['content', 'content_html', 'content_hash', 'toc'],
+    }
+
+    def get_content_html(self, obj):
+        from .rendering import rendered
+        return rendered(obj)[0]
+
+    def get_toc(self, obj):
+        from .rendering import rendered
+        return rendered(obj)[1]
+
+
+class PostSerializer(RenderedContentMixin, PostListSerializer):
+    content = serializers.CharField()
+    author_name = serializers.CharField(source='author')
+    is_published = serializers.BooleanField()
+    created_at = serializers.DateTimeField(source='date_published')
+    updated_at = serializers.DateTimeField()
+    related = serializers.ListField(child=serializers.DictField())
+
+
+class VideoSerializer(FieldSelectionMixin):
+    id = serializers.CharField()
+    title = serializers.CharField()
+    video_url = serializers.CharField()
+    slug = serializers.CharField()
+    description = serializers.CharField()
+    is_published = serializers.BooleanField()
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
+
+
+class ProjectListSerializer(FieldSelectionMixin):
     """Simplified serializer for project listings"""
-    stack_list = serializers.SerializerMethodField()
-    image_url = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Project
-        fields = [
-            'id', 'title', 'description', 'stack_list', 'website_url', 
-            'github_url', 'slug', 'image', 'image_url'
-        ]
-    
-    def get_stack_list(self, obj):
-        """Convert comma-separated stack string to list"""
-        if obj.stack:
-            return [tech.strip() for tech in obj.stack.split(',')]
-        return []
-    
-    def get_image_url(self, obj):
-        """Get public URL for image"""
-        return obj.image.url if obj.image else None
+    id = serializers.CharField()
+    title = serializers.CharField()
+    description = serializers.CharField()
+    stack_list = serializers.ListField(source='stack', child=serializers.CharField())
+    website_url = serializers.CharField()
+    github_url = serializers.CharField()
+    slug = serializers.CharField()
+    image = serializers.CharField(source='image_url')
+    image_url = serializers.CharField()
+    image_sources = ImageSourcesField()
+    image_width = serializers.IntegerField()
+    image_height = serializers.IntegerField()
+    image_color = serializers.CharField()
+    image_placeholder = serializers.CharField()
+    word_count = serializers.IntegerField()
+    reading_time = serializers.IntegerField()
+    heading_count = serializers.IntegerField()
+
+
+class ProjectSerializer(RenderedContentMixin, ProjectListSerializer):
+    stack = serializers.SerializerMethodField()
+    content = serializers.CharField()
+    is_published = serializers.BooleanField()
+    created_at = serializers.DateTimeField()
+    updated_at = serializers.DateTimeField()
+    related = serializers.ListField(child=serializers.DictField())
+
+    def get_stack(self, obj):
+        """Comma-separated stack, as entered in the admin"""
+        return ', '.join(obj.stack)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import Bio, Post, Video, Project
+
+SYNCED_MODELS = (Bio, Post, Video, Project)
+
+# Sent by the content models (ContentModel in blog/pynamo_models.py) after an
+# item is written or deleted, with sender=<model class> and item=<instance>.
+# Derived data such as the search index listens to these.
+content_saved = Signal()
+content_deleted = Signal()
+
+
+@receiver(post_save)
+def sync_saved_content(sender, instance, **kwargs):
+    """Push admin edits to the DynamoDB item served by the API"""
+    if sender in SYNCED_MODELS and settings.DYNAMODB_SYNC_ENABLED:
+        from .sync import sync_instance
+        sync_instance(instance)
+
+
+@receiver(post_delete)
+def sync_deleted_content(sender, instance, **kwargs):
+    """Remove the DynamoDB item of content deleted in the admin"""
+    if sender in SYNCED_MODELS and settings.DYNAMODB_SYNC_ENABLED:
+        from .sync import delete_instance
+        delete_instance(instance)
@@ -0,0 +1,99 @@
+"""
+Slug -> id lookup for published posts, projects and videos.
+
+The exact set of published slugs per type, with each item's id, is kept in
+an artifact (blog/artifacts.py) and held in memory by every worker. A detail
+request resolves its slug there: unknown slugs are a 404 without any
+DynamoDB call, and known ones are a single GetItem instead of a scan.
+Lookups that still miss (the worker's copy is a few seconds behind an
+unpublish or delete) are remembered for SLUG_NEGATIVE_CACHE_SECONDS so
+repeated hits on the same dead link stay off DynamoDB too.
+"""
+
+import json
+import zlib
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from pynamodb.exceptions import DoesNotExist
+from .artifacts import Artifact
+from .signals import content_saved
+
+ARTIFACT_NAME = 'slugs.json.z'
+
+SOURCES = {'Post': 'post', 'Project': 'project', 'Video': 'video'}
+
+
+class SlugIndex:
+    """{type: {slug: id}} of every published item"""
+
+    def __init__(self, slugs):
+        self.slugs = slugs
+
+    def lookup(self, kind, slug):
+        return self.slugs.get(kind, {}).get(slug)
+
+    def with_item(self, kind, item_id, slug):
+        entries = {s: i for s, i in self.slugs.get(kind, {}).items() if i != item_id}
+        entries[slug] = item_id
+        return SlugIndex(dict(self.slugs, **{kind: entries}))
+
+    def without(self, kind, item_id):
+        entries = {s: i for s, i in self.slugs.get(kind, {}).items() if i != item_id}
+        return SlugIndex(dict(self.slugs, **{kind: entries}))
+
+    def to_bytes(self):
+        return zlib.compress(json.dumps(self.slugs, separators=(',', ':')).encode())
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(json.loads(zlib.decompress(data)))
+
+
+def build_index():
+    """Full rebuild from every published post, project and video"""
+    from . import pynamo_models
+
+    slugs = {}
+    for model_name, kind in SOURCES.items():
+        model = getattr(pynamo_models, model_name)
+        items = model.scan(model.is_published == True, attributes_to_get=['id', 'slug'])  # noqa: E712
+        slugs[kind] = {item.slug: item.id for item in items}
+    return SlugIndex(slugs)
+
+
+index = Artifact(ARTIFACT_NAME, loads=SlugIndex.from_bytes, dumps=SlugIndex.to_bytes, build=build_index)
+index.connect(
+    SOURCES,
+    to_entry=lambda kind, item: (kind, item.id, item.slug),
+    add=lambda current, entry: current.with_item(*entry),
+)
+
+
+def miss_key(kind, slug):
+    return f'slug-miss:{kind}:{slug}'
+
+
+def get_published(model, kind, slug, attributes_to_get=None):
+    """The published item of `model` with `slug`, or None; `attributes_to_get` limits what is read"""
+    item_id = index.get().lookup(kind, slug)
+    if item_id is None or cache.get(miss_key(kind, slug)):
+        return None
+    try:
+        if attributes_to_get is not None:
+            attributes_to_get = sorted(set(attributes_to_get) | {'is_published', 'slug'})
+        item = model.get(item_id, attributes_to_get=attributes_to_get)
+    except DoesNotExist:
+        item = None
+    if item is None or not item.is_published or item.slug != slug:
+        cache.set(miss_key(kind, slug), True, settings.SLUG_NEGATIVE_CACHE_SECONDS)
+        return None
+    return item
+
+
+@receiver(content_saved)
+def forget_missed_slug(sender, item, **kwargs):
+    """A slug that just got published mustn't keep answering 404 from the miss cache"""
+    kind = SOURCES.get(sender.__name__)
+    if kind is not None and item.is_published:
+        cache.delete(miss_key(kind, item.slug))
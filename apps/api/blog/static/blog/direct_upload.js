@@ -0,0 +1,168 @@
+/*
+ * Admin direct uploads: send files from the browser straight to S3 using a
+ * presigned POST or multipart session from /api/v1/uploads/, then store the
+ * verification token in the form. See blog/uploads.py.
+ */
+(function () {
+  'use strict';
+
+  var PART_CONCURRENCY = 3;
+
+  function csrfToken() {
+    var input = document.querySelector('input[name="csrfmiddlewaretoken"]');
+    return input ? input.value : '';
+  }
+
+  function api(url, payload) {
+    return fetch(url, {
+      method: 'POST',
+      credentials: 'same-origin',
+      headers: { 'Content-Type': 'application/json', 'X-CSRFToken': csrfToken() },
+      body: JSON.stringify(payload)
+    }).then(function (response) {
+      return response.json().catch(function () { return {}; }).then(function (data) {
+        if (!response.ok) {
+          throw new Error(data.error || ('Upload API error ' + response.status));
+        }
+        return data;
+      });
+    });
+  }
+
+  function sha256(file) {
+    // Keys are content-addressed, so identical files are only stored once
+    return file.arrayBuffer().then(function (buffer) {
+      return crypto.subtle.digest('SHA-256', buffer);
+    }).then(function (digest) {
+      return Array.prototype.map.call(new Uint8Array(digest), function (byte) {
+        return ('0' + byte.toString(16)).slice(-2);
+      }).join('');
+    });
+  }
+
+  function postToS3(session, file, onProgress) {
+    var form = new FormData();
+    Object.keys(session.fields).forEach(function (name) {
+      form.append(name, session.fields[name]);
+    });
+    form.append('file', file);  // S3 requires the file to be the last field
+
+    return new Promise(function (resolve, reject) {
+      var xhr = new XMLHttpRequest();
+      xhr.open('POST', session.url);
+      xhr.upload.onprogress = function (event) {
+        if (event.lengthComputable) onProgress(event.loaded, event.total);
+      };
+      xhr.onload = function () {
+        if (xhr.status >= 200 && xhr.status < 300) resolve({});
+        else reject(new Error('S3 rejected the upload (' + xhr.status + ')'));
+      };
+      xhr.onerror = function () { reject(new Error('Network error while uploading')); };
+      xhr.send(form);
+    });
+  }
+
+  function multipartToS3(session, file, onProgress) {
+    var loaded = {};
+    var queue = session.parts.slice();
+    var done = [];
+
+    function reportProgress() {
+      var total = 0;
+      Object.keys(loaded).forEach(function (part) { total += loaded[part]; });
+      onProgress(total, file.size);
+    }
+
+    function uploadNext() {
+      var part = queue.shift();
+      if (!part) return Promise.resolve();
+      var start = (part.part_number - 1) * session.part_size;
+      var blob = file.slice(start, Math.min(start + session.part_size, file.size));
+
+      return fetch(part.url, { method: 'PUT', body: blob }).then(function (response) {
+        if (!response.ok) throw new Error('S3 rejected part ' + part.part_number);
+        // Requires the bucket's CORS rules to expose the ETag header
+        done.push({ part_number: part.part_number, etag: response.headers.get('ETag') });
+        loaded[part.part_number] = blob.size;
+        reportProgress();
+        return uploadNext();
+      });
+    }
+
+    var workers = [];
+    for (var i = 0; i < PART_CONCURRENCY; i++) workers.push(uploadNext());
+    return Promise.all(workers).then(function () {
+      return { upload_id: session.upload_id, parts: done };
+    });
+  }
+
+  function setUp(container) {
+    var fileInput = container.querySelector('.direct-upload-input');
+    var tokenInput = container.querySelector('input[type="hidden"]');
+    var progress = container.querySelector('.direct-upload-progress');
+    var status = container.querySelector('.direct-upload-status');
+    var field = container.dataset.field;
+    var form = container.closest('form');
+    var pending = 0;
+
+    function setBusy(busy) {
+      pending += busy ? 1 : -1;
+      form.querySelectorAll('[type="submit"]').forEach(function (button) {
+        button.disabled = pending > 0;
+      });
+    }
+
+    fileInput.addEventListener('change', function () {
+      var file = fileInput.files[0];
+      if (!file) return;
+
+      tokenInput.value = '';
+      progress.hidden = false;
+      progress.value = 0;
+      status.textContent = 'Uploading…';
+      setBusy(true);
+
+      var session;
+      sha256(file).then(function (digest) {
+        return api(container.dataset.startUrl, {
+          field: field,
+          filename: file.name,
+          content_type: file.type || 'application/octet-stream',
+          size: file.size,
+          sha256: digest
+        });
+      }).then(function (data) {
+        session = data;
+        if (session.method === 'exists') return {};
+        var send = session.method === 'multipart' ? multipartToS3 : postToS3;
+        return send(session, file, function (loaded, total) {
+          progress.value = Math.round((loaded / total) * 100);
+        });
+      }).then(function (result) {
+        status.textContent = 'Verifying…';
+        return api(container.dataset.completeUrl, Object.assign({ field: field, key: session.key }, result));
+      }).then(function (data) {
+        tokenInput.value = data.token;
+        progress.value = 100;
+        status.textContent = 'Uploaded ' + file.name + ' — save to apply.';
+      }).catch(function (error) {
+        if (session && session.method === 'multipart') {
+          api(container.dataset.abortUrl, { field: field, key: session.key, upload_id: session.upload_id })
+            .catch(function () {});
+        }
+        fileInput.value = '';
+        progress.hidden = true;
+        status.textContent = error.message;
+      }).then(function () {
+        setBusy(false);
+      });
+    });
+
+    // The file itself must never be posted to Django
+    fileInput.removeAttribute('name');
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('.direct-upload').forEach(setUp);
+  });
+})();
@@ -0,0 +1,168 @@
+"""
+Storage backends for the S3 bucket.
+
+Media uploads are stored under the SHA-256 of their content, so an object's
+bytes never change once written: identical uploads share one object and
+clients and CDNs can cache them forever (MEDIA_CACHE_CONTROL). Static files
+are collected with hashed names and a manifest, then published to the same
+bucket with gzip-encoded bodies.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+from .utils import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+HASH_LENGTH = 32  # hex characters (128 bits) of the SHA-256 used in object keys
+
+
+def content_hash(content):
+    """Hex SHA-256 of a Django File, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, content):
+    """'posts/photo.JPG' -> 'posts/<hash>.jpg', keeping the directory and extension"""
+    directory, filename = posixpath.split(clean_name(name))
+    extension = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(directory, content_hash(content)[:HASH_LENGTH] + extension)
+
+
+class ContentHashedS3Storage(S3Storage):
+    """S3 storage with content-addressed, deduplicated, immutable objects"""
+
+    # A name is only ever reused for identical bytes, so there's no need to
+    # probe S3 for a free name before saving
+    file_overwrite = True
+
+    def get_object_parameters(self, name):
+        params = super().get_object_parameters(name)
+        params['CacheControl'] = settings.MEDIA_CACHE_CONTROL
+        return params
+
+    def _save(self, name, content):
+        name = hashed_name(name, content)
+        if self.exists(name):
+            # Same bytes already uploaded
+            return name
+        return super()._save(name, content)
+
+
+# Text assets worth compressing; images and fonts like woff2 are already compressed
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml', 'application/xml')
+
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def gzip_body(data):
+    """The object body: gzip-encoded when that makes it smaller"""
+    # mtime=0 keeps the bytes (and so the ETag) identical between deploys
+    gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+    return (gzipped, 'gzip') if len(gzipped) < len(data) else (data, None)
+
+
+def publish_static(root, hashed_names, prefix, workers, manifest_name=None):
+    """
+    Upload the collected files under `root` to the static bucket in parallel,
+    skipping objects whose ETag already matches. Hashed names are cached
+    forever and the unhashed originals briefly; the manifest, which names
+    the current hashes, is always revalidated.
+
+    Text assets are stored gzip-encoded under their own key and served that
+    way to every client: S3 can't negotiate Content-Encoding, and every
+    browser that can run the admin accepts gzip. A brotli variant would need
+    a CDN rule choosing it by Accept-Encoding, which the stack doesn't have.
+
+    Returns:
+        dict: {'uploaded': n, 'unchanged': n} counted in objects
+    """
+    client = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+
+    # Single-part uploads have the body's MD5 as their ETag
+    etags = {}
+    for page in client.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            etags[obj['Key']] = obj['ETag'].strip('"')
+
+    def put(key, body, encoding, content_type, cache_control):
+        params = {'ContentType': content_type, 'CacheControl': cache_control}
+        if encoding:
+            params['ContentEncoding'] = encoding
+        if settings.AWS_DEFAULT_ACL:
+            params['ACL'] = settings.AWS_DEFAULT_ACL
+        client.put_object(Bucket=bucket, Key=key, Body=body, **params)
+
+    def upload(name):
+        """Returns (uploaded, unchanged) object counts for one collected file"""
+        key = prefix + name
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if name == manifest_name:
+            cache_control = settings.STATIC_MANIFEST_CACHE_CONTROL
+        elif name in hashed_names:
+            cache_control = settings.STATIC_CACHE_CONTROL
+        else:
+            cache_control = settings.STATIC_UNHASHED_CACHE_CONTROL
+        with open(os.path.join(root, name), 'rb') as f:
+            data = f.read()
+        body, encoding = gzip_body(data) if is_compressible(content_type) else (data, None)
+        if etags.get(key) == hashlib.md5(body).hexdigest():
+            return 0, 1
+        put(key, body, encoding, content_type, cache_control)
+        return 1, 0
+
+    names = [
+        os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+        for directory, _, filenames in os.walk(root)
+        for filename in filenames
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        counts = list(pool.map(upload, names))
+    return {'uploaded': sum(c[0] for c in counts), 'unchanged': sum(c[1] for c in counts)}
+
+
+class S3ManifestStaticStorage(ManifestStaticFilesStorage):
+    """
+    collectstatic hashes files and writes the manifest locally in STATIC_ROOT
+    (so post-processing never reads back from S3), then publishes STATIC_ROOT
+    to the static bucket when STATIC_BUCKET_NAME is set
+    """
+
+    # Fall back to the unhashed name rather than erroring on a missing entry
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run or not settings.STATIC_BUCKET_NAME:
+            return
+        result = publish_static(
+            self.location,
+            hashed_names=set(self.hashed_files.values()),
+            prefix=urlparse(settings.STATIC_URL).path.lstrip('/'),
+            workers=settings.S3_MAX_POOL_CONNECTIONS,
+            manifest_name=self.manifest_name,
+        )
+        logger.info('Published static files to S3', extra=result)
+
+    def url(self, name, force=False):
+        # The bucket only serves hashed names well (immutable caching), so use
+        # them whenever static files come from S3, even with DEBUG on
+        return super().url(name, force=force or bool(settings.STATIC_BUCKET_NAME))
@@ -0,0 +1,121 @@
+"""
+Typeahead completions for post/video/project titles, post tags and project
+stack technologies.
+
+The index is a sorted array of normalised completion keys searched with
+bisect; every title is also entered under each of its later words, so
+'dja' completes 'Running Django fast'. Weights are precomputed: a tag or
+technology weighs as many items as use it, a title weighs 1. Tags are
+shown by their label ('Book Reviews') with the stored `value` to filter on
+('book_reviews'). The source records live in an artifact
+(blog/artifacts.py) so completions never hit DynamoDB, and content changes
+update them without a rescan.
+"""
+
+import bisect
+import heapq
+import json
+import re
+import zlib
+from .artifacts import Artifact
+from .models import Post as PostModel
+
+ARTIFACT_NAME = 'suggest.json.z'
+MAX_RESULTS = 10
+
+SOURCES = {'Post': 'post', 'Project': 'project', 'Video': 'video'}
+
+# Display text of stored values, per term kind; others are shown as stored
+LABELS = {'tag': dict(PostModel.TAG_CHOICES)}
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'[a-z0-9+#.]+', text.lower().replace('_', ' ')))
+
+
+def record(kind, item):
+    """What one published item contributes: its title and its tags or stack"""
+    if kind == 'post':
+        terms = ['tag', list(item.tags)]
+    elif kind == 'project':
+        terms = ['stack', list(item.stack)]
+    else:
+        terms = None
+    return {'type': kind, 'id': item.id, 'slug': item.slug, 'title': item.title, 'terms': terms}
+
+
+class SuggestIndex:
+    """
+    Sorted completion keys with parallel arrays of suggestion ids; `suggestions`
+    holds each distinct completion once with its weight
+    """
+
+    def __init__(self, records):
+        self.records = records
+
+        suggestions = {}
+        for rec in records:
+            suggestions[(rec['type'], rec['id'])] = {'text': rec['title'], 'type': rec['type'], 'slug': rec['slug'], 'weight': 1}
+            if rec['terms']:
+                kind, values = rec['terms']
+                for value in set(values):
+                    suggestion = suggestions.setdefault((kind, value), {
+                        'text': LABELS.get(kind, {}).get(value, value), 'type': kind, 'value': value, 'weight': 0,
+                    })
+                    suggestion['weight'] += 1
+        self.suggestions = list(suggestions.values())
+
+        entries = []
+        for number, suggestion in enumerate(self.suggestions):
+            words = normalize(suggestion['text']).split()
+            for start in range(len(words)):
+                entries.append((' '.join(words[start:]), number))
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.numbers = [number for _, number in entries]
+
+    def complete(self, prefix, limit=MAX_RESULTS):
+        """Top `limit` suggestions with a key starting with `prefix`, heaviest first"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + '\uffff', start)
+        matches = {self.numbers[position] for position in range(start, end)}
+        best = heapq.nsmallest(
+            limit, matches,
+            key=lambda number: (-self.suggestions[number]['weight'], self.suggestions[number]['text'].lower()),
+        )
+        return [self.suggestions[number] for number in best]
+
+    def with_record(self, rec):
+        return SuggestIndex([r for r in self.records if (r['type'], r['id']) != (rec['type'], rec['id'])] + [rec])
+
+    def without(self, kind, item_id):
+        return SuggestIndex([r for r in self.records if (r['type'], r['id']) != (kind, item_id)])
+
+    def to_bytes(self):
+        return zlib.compress(json.dumps(self.records, separators=(',', ':')).encode())
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(json.loads(zlib.decompress(data)))
+
+
+def build_index():
+    """Full rebuild from every published post, project and video"""
+    from . import pynamo_models
+
+    records = []
+    for model_name, kind in SOURCES.items():
+        model = getattr(pynamo_models, model_name)
+        records.extend(record(kind, item) for item in model.scan(model.is_published == True))  # noqa: E712
+    return SuggestIndex(records)
+
+
+index = Artifact(ARTIFACT_NAME, loads=SuggestIndex.from_bytes, dumps=SuggestIndex.to_bytes, build=build_index)
+index.connect(SOURCES, to_entry=record, add=SuggestIndex.with_record)
+
+
+def suggest(prefix, limit=MAX_RESULTS):
+    return index.get().complete(prefix, limit=min(limit, MAX_RESULTS))
@@ -0,0 +1,106 @@
+"""
+Mirror admin edits of the Django models (SQLite) into the DynamoDB items
+served by the API. Enabled with DYNAMODB_SYNC_ENABLED.
+"""
+
+from pynamodb.exceptions import DoesNotExist
+from . import models, pynamo_models
+
+
+def item_id(instance):
+    """DynamoDB id of the item mirroring a Django model instance"""
+    if isinstance(instance, models.Bio):
+        return 'author_bio'
+    return str(instance.pk)
+
+
+def file_url(file_field):
+    return file_field.url if file_field else None
+
+
+def item_attributes(instance):
+    """Attribute values of the DynamoDB item for a Django model instance"""
+    if isinstance(instance, models.Bio):
+        return {
+            'about': instance.about,
+            'image_url': file_url(instance.image),
+            'x_url': instance.x_url,
+            'linkedin_url': instance.linkedin_url,
+            'github_url': instance.github_url,
+            'youtube_url': instance.youtube_url,
+            'twitch_url': instance.twitch_url,
+            'resume_url': file_url(instance.resume),
+        }
+    if isinstance(instance, models.Post):
+        return {
+            'title': instance.title,
+            'slug': instance.slug,
+            'image_url': file_url(instance.image),
+            'excerpt': instance.excerpt,
+            'content': instance.content,
+            'author': instance.author.username,
+            'tags': [instance.tags],
+            'is_published': instance.is_published,
+            'date_published': instance.date_published,
+        }
+    if isinstance(instance, models.Video):
+        return {
+            'title': instance.title,
+            'slug': instance.slug,
+            'video_url': instance.video_url,
+            'description': instance.description,
+            'is_published': instance.is_published,
+            'created_at': instance.created_at,
+        }
+    if isinstance(instance, models.Project):
+        return {
+            'title': instance.title,
+            'slug': instance.slug,
+            'description': instance.description,
+            'content': instance.content,
+            'stack': [tech.strip() for tech in instance.stack.split(',') if tech.strip()],
+            'website_url': instance.website_url,
+            'github_url': instance.github_url,
+            'image_url': file_url(instance.image),
+            'is_published': instance.is_published,
+            'created_at': instance.created_at,
+        }
+    raise TypeError(f'{type(instance).__name__} is not synced to DynamoDB')
+
+
+def sync_instance(instance):
+    """
+    Create or update the DynamoDB item for `instance`. Existing items are
+    loaded first so attributes computed after upload (image variants and
+    placeholders) survive edits that don't replace the image.
+    """
+    model = getattr(pynamo_models, type(instance).__name__)
+    try:
+        item = model.get(item_id(instance))
+    except DoesNotExist:
+        item = model(item_id(instance))
+
+    attributes = item_attributes(instance)
+    image_changed = 'image_url' in attributes and attributes['image_url'] != item.image_url
+    for name, value in attributes.items():
+        setattr(item, name, value)
+    if image_changed:
+        # Filled in again by the image pipeline
+        item.image_variants = []
+        item.image_width = item.image_height = None
+        item.image_color = item.image_placeholder = None
+    item.save()
+
+    if image_changed and instance.image:
+        from .images import schedule_variants
+        schedule_variants(model.__name__, item.id, instance.image.name)
+    return item
+
+
+def delete_instance(instance):
+    """Remove the DynamoDB item mirroring a deleted Django model instance"""
+    model = getattr(pynamo_models, type(instance).__name__)
+    try:
+        model.get(item_id(instance)).delete()
+    except DoesNotExist:
+        pass
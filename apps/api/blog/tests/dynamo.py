@@ -0,0 +1,68 @@
+"""
+Base for tests of code that reads and writes the DynamoDB tables: every test
+gets empty tables (moto), a fresh artifacts directory and an empty cache
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+from .. import circuit, feeds, search, slugs, suggest
+from ..pynamo_models import ALL_MODELS, Post
+from ..response_cache import responses
+
+FAKE_CREDENTIALS = {'AWS_ACCESS_KEY_ID': 'test', 'AWS_SECRET_ACCESS_KEY': 'test', 'AWS_DEFAULT_REGION': 'us-east-1'}
+
+ARTIFACTS = (search.index, suggest.index, slugs.index, feeds.index)
+
+
+class DynamoTestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        credentials = mock.patch.dict(os.environ, FAKE_CREDENTIALS)
+        credentials.start()
+        self.addCleanup(credentials.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        for model in ALL_MODELS:
+            circuit.breaker(model.Meta.table_name).reset()
+            model.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        storages = dict(settings.STORAGES, artifacts={
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': directory, 'allow_overwrite': True},
+        })
+        test_settings = override_settings(STORAGES=storages, WARMUP_ENABLED=False)
+        test_settings.enable()
+        self.addCleanup(test_settings.disable)
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        responses.clear()
+        self.addCleanup(responses.clear)
+        # Published up front, so saves update them in place rather than building in the background
+        for artifact in ARTIFACTS:
+            artifact.rebuild()
+
+
+def post(tags, month=1, **kwargs):
+    """A saved post with `tags`, published mid-`month` of 2025"""
+    item = Post(
+        title=kwargs.pop('title', 'A post'),
+        excerpt='Excerpt',
+        content='Content',
+        author='Author',
+        tags=tags,
+        date_published=datetime(2025, month, 15, tzinfo=timezone.utc),
+        **kwargs,
+    )
+    item.save()
+    return item
@@ -0,0 +1,51 @@
+"""
+Base for tests of code that talks to S3 through blog.utils.get_s3_client():
+every test gets an empty media bucket (moto) and a fresh shared client
+"""
+
+import os
+from unittest import mock
+import boto3
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+from .. import utils
+from .dynamo import FAKE_CREDENTIALS
+
+BUCKET = 'media-tests'
+
+
+def media_bucket(test):
+    """
+    Create an empty media bucket in the running moto mock and point the
+    settings and the shared client at it for the rest of `test`
+    """
+    s3 = boto3.client('s3', region_name='us-east-1')
+    s3.create_bucket(Bucket=BUCKET)
+
+    test_settings = override_settings(AWS_STORAGE_BUCKET_NAME=BUCKET, AWS_ACCESS_KEY_ID='',
+                                      AWS_SECRET_ACCESS_KEY='', AWS_S3_REGION_NAME='us-east-1')
+    test_settings.enable()
+    test.addCleanup(test_settings.disable)
+    # The shared client is built from the settings above, and rebuilt for the next test
+    patcher = mock.patch.object(utils, '_s3_client', None)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return s3
+
+
+class S3TestCase(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        credentials = mock.patch.dict(os.environ, FAKE_CREDENTIALS)
+        credentials.start()
+        self.addCleanup(credentials.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        self.s3 = media_bucket(self)
+
+    def put(self, key, body=b'data', **params):
+        self.s3.put_object(Bucket=BUCKET, Key=key, Body=body, **params)
+
+    def keys(self, prefix=''):
+        return sorted(obj['Key'] for obj in self.s3.list_objects_v2(Bucket=BUCKET, Prefix=prefix).get('Contents', []))
@@ -0,0 +1,169 @@
+import json
+import os
+import tempfile
+import threading
+import boto3
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from moto import mock_aws
+from ..artifacts import Artifact, ArtifactUnavailable, get_storage, versions
+from ..signals import content_deleted, content_saved
+from .dynamo import FAKE_CREDENTIALS
+
+
+def artifact(build=lambda: []):
+    """A JSON list artifact; each instance stands for one worker"""
+    return Artifact('numbers.json', json.loads, lambda value: json.dumps(value).encode(), build)
+
+
+class ArtifactTests(SimpleTestCase):
+    def storages(self):
+        return {'artifacts': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': self.directory, 'allow_overwrite': True},
+        }}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        settings = override_settings(STORAGES=self.storages(), ARTIFACT_REFRESH_SECONDS=30)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_missing_artifact_is_built_off_the_request_thread(self):
+        built = threading.Event()
+        release = threading.Event()
+        threads = []
+
+        def build():
+            threads.append(threading.current_thread())
+            built.set()
+            release.wait(5)
+            return [1]
+
+        numbers = artifact(build)
+        with self.assertRaises(ArtifactUnavailable):
+            numbers.get()
+        self.assertTrue(built.wait(5))
+        self.assertIsNot(threads[0], threading.current_thread())
+        with self.assertRaises(ArtifactUnavailable):
+            numbers.get()  # Still building: no second build, no blocking
+        release.set()
+        self.assertEqual(numbers.load(), [1])
+        self.assertEqual(numbers.get(), [1])
+        self.assertEqual(len(threads), 1)
+        # Published for the other workers, which load rather than rebuild it
+        self.assertEqual(artifact(build=mock.Mock(side_effect=AssertionError)).load(), [1])
+
+    def test_stale_copy_is_served_while_the_newer_one_loads(self):
+        worker, other = artifact(), artifact()
+        worker.publish([1])
+        other.publish([1, 2])
+        with override_settings(ARTIFACT_REFRESH_SECONDS=0):
+            with mock.patch.object(worker, '_refresh_in_background') as refresh:
+                self.assertEqual(worker.get(), [1])
+            refresh.assert_called_once()
+            self.assertEqual(worker.load(), [1, 2])
+
+    def test_update_reapplies_a_change_that_lost_the_race(self):
+        worker, other = artifact(), artifact()
+        worker.publish([])
+
+        def change(current):
+            if not current:
+                other.update(lambda theirs: theirs + ['other'])  # Publishes between our read and write
+            return current + ['worker']
+
+        worker.update(change)
+        self.assertEqual(artifact().load(), ['other', 'worker'])
+
+    def test_concurrent_updates_keep_every_change(self):
+        artifact().publish([])
+        workers = [artifact() for _ in range(4)]
+
+        def add(worker, start):
+            for number in range(start, start + 5):
+                worker.update(lambda current: current + [number])
+
+        with override_settings(ARTIFACT_UPDATE_ATTEMPTS=100):
+            threads = [threading.Thread(target=add, args=(w, i * 5)) for i, w in enumerate(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sorted(artifact().load()), list(range(20)))
+
+    def test_connect_follows_saves_and_deletes(self):
+        class Titles(dict):
+            def without(self, kind, item_id):
+                return Titles((key, title) for key, title in self.items() if key != f'{kind}:{item_id}')
+
+        Note = type('Note', (), {})
+        Other = type('Other', (), {})
+        titles = Artifact(
+            'titles.json',
+            lambda data: Titles(json.loads(data)),
+            lambda value: json.dumps(value).encode(),
+            Titles,
+        )
+        titles.connect(
+            {'Note': 'note'},
+            to_entry=lambda kind, item: (f'{kind}:{item.id}', item.title),
+            add=lambda current, entry: Titles(current, **{entry[0]: entry[1]}),
+        )
+        self.addCleanup(content_saved.disconnect, dispatch_uid='artifact-saved:titles.json')
+        self.addCleanup(content_deleted.disconnect, dispatch_uid='artifact-deleted:titles.json')
+        titles.publish(Titles())
+        titles.load()
+
+        def item(item_id, title, is_published=True):
+            return mock.Mock(id=item_id, title=title, is_published=is_published)
+
+        content_saved.send(Note, item=item('1', 'First'))
+        content_saved.send(Note, item=item('2', 'Second'))
+        content_saved.send(Other, item=item('3', 'Not covered'))
+        self.assertEqual(titles.get(), {'note:1': 'First', 'note:2': 'Second'})
+        content_saved.send(Note, item=item('1', 'First, renamed'))
+        content_saved.send(Note, item=item('2', 'Second', is_published=False))
+        self.assertEqual(titles.get(), {'note:1': 'First, renamed'})
+        content_deleted.send(Note, item=item('1', 'First, renamed'))
+        self.assertEqual(titles.get(), {})
+
+    def test_update_of_a_missing_artifact_builds_it(self):
+        numbers = artifact(build=lambda: [7])
+        numbers.update(lambda current: current + [8])
+        self.assertEqual(numbers.load(), [7])
+
+
+@mock.patch.dict(os.environ, FAKE_CREDENTIALS)
+class S3ArtifactTests(ArtifactTests):
+    """The same behaviour on S3, where writes are conditional on the ETag"""
+
+    def storages(self):
+        return {'artifacts': {
+            'BACKEND': 'storages.backends.s3.S3Storage',
+            'OPTIONS': {
+                'bucket_name': 'artifacts-tests',
+                'location': 'artifacts',
+                'file_overwrite': True,
+                'default_acl': 'private',
+                'object_parameters': {'CacheControl': 'no-cache'},
+                'access_key': 'test',
+                'secret_key': 'test',
+                'region_name': 'us-east-1',
+            },
+        }}
+
+    def setUp(self):
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='artifacts-tests')
+        super().setUp()
+
+    def test_write_is_conditional_on_the_etag(self):
+        store = versions(get_storage())
+        first = store.write('numbers.json', b'[]')
+        self.assertIsNone(store.write('numbers.json', b'[1]'))  # Exists already
+        second = store.write('numbers.json', b'[2]', first)
+        self.assertIsNone(store.write('numbers.json', b'[3]', first))
+        self.assertEqual(store.read('numbers.json'), (b'[2]', second))
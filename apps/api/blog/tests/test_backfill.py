@@ -0,0 +1,53 @@
+from datetime import datetime
+from io import StringIO
+from django.core.management import call_command
+from pynamodb.models import Model
+from ..pynamo_models import Post, Project
+from .dynamo import DynamoTestCase
+
+CONTENT = '# Heading\n\n' + 'word ' * 460 + '\n\n## Second\n\nMore text.'
+
+
+class BackfillContentMetadataTests(DynamoTestCase):
+    def legacy(self, item):
+        """Written the way items were before save() rendered content: no rendering, no metadata"""
+        Model.save(item)
+        return item
+
+    def backfill(self):
+        out = StringIO()
+        call_command('backfill_content_metadata', segments=2, stdout=out)
+        return out.getvalue()
+
+    def test_fills_rendered_content_and_metadata(self):
+        updated_at = datetime(2024, 5, 1)
+        post = self.legacy(Post(id='post', title='Post', slug='post', excerpt='', content=CONTENT,
+                                author='Author', updated_at=updated_at))
+        project = self.legacy(Project(id='project', title='Project', slug='project', description='Kept',
+                                      content='Short **project** text.'))
+
+        output = self.backfill()
+        self.assertIn('Post: updated 1 item(s)', output)
+        self.assertIn('Project: updated 1 item(s)', output)
+
+        post = Post.get('post')
+        self.assertIn('<h2 id="second">Second</h2>', post.content_html)
+        self.assertEqual(post.word_count, 464)
+        self.assertEqual(post.reading_time, 3)
+        self.assertEqual(post.heading_count, 2)
+        self.assertEqual([entry['id'] for entry in post.toc], ['second'])  # toc_depth 2-4
+        self.assertTrue(post.excerpt.startswith('word word') and post.excerpt.endswith('…'))
+        self.assertLessEqual(len(post.excerpt), 201)
+        self.assertEqual(post.updated_at.replace(tzinfo=None), updated_at)  # Not an edit
+
+        project = Project.get('project')
+        self.assertEqual(project.description, 'Kept')
+        self.assertEqual(project.word_count, 3)
+        self.assertEqual(project.reading_time, 1)
+
+    def test_current_items_are_left_alone(self):
+        Post(title='Saved', excerpt='', content='Rendered at save time', author='Author').save()
+        self.legacy(Project(id='empty', title='Empty', slug='empty', description='Described'))
+        self.assertIn('Post: updated 0 item(s)', self.backfill())
+        self.assertEqual(Project.get('empty').word_count, 0)
+        self.assertIn('Project: updated 0 item(s)', self.backfill())
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+from django.test import SimpleTestCase, override_settings
+from .. import changes
+from ..changes import PARTITION, SEPARATOR, changes_since, parse_since, stamp
+from ..pynamo_models import Change
+from .dynamo import DynamoTestCase, post
+
+START = '2025-01-15T12:00:00.000000Z'
+
+
+class ParseSinceTests(SimpleTestCase):
+    def test_cursors(self):
+        cursor = f'{START}~post~abc'
+        self.assertEqual(parse_since(cursor), cursor)
+        self.assertEqual(parse_since(f'{START}#post#abc'), cursor)  # Logged before '~'
+        with self.assertRaises(ValueError):
+            parse_since('yesterday~post~abc')
+
+    def test_timestamps(self):
+        for value in ('2025-01-15T12:00:00Z', '2025-01-15T12:00:00+00:00', '2025-01-15T13:00:00+01:00',
+                      '2025-01-15T12:00:00 00:00', '2025-01-15T12:00:00', '1736942400', '1736942400.0'):
+            self.assertEqual(parse_since(value), f'{START}~', value)
+        with self.assertRaises(ValueError):
+            parse_since('last week')
+
+
+def log(moment, kind, item_id, status='published'):
+    Change(PARTITION, SEPARATOR.join((stamp(moment), kind, item_id)), item_id=item_id, item_type=kind,
+           slug=item_id, status=status, updated_at=moment).save()
+
+
+@override_settings(CHANGE_LOG_SETTLE_SECONDS=0)
+class ChangeLogTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.since = parse_since(str(datetime.now(timezone.utc).timestamp() - 1))
+
+    def ids(self, page):
+        return [(change['type'], change['id'], change['status']) for change in page['changes']]
+
+    def test_saves_and_tombstones(self):
+        item = post([])
+        kept = post([])
+        item.is_published = False
+        item.save()
+        item.delete()
+        page = changes_since(self.since, 100)
+        # The latest entry per item, in the order of those entries
+        self.assertEqual(self.ids(page), [('post', kept.id, 'published'), ('post', item.id, 'deleted')])
+        self.assertFalse(page['has_more'])
+        self.assertEqual(changes_since(page['cursor'], 100)['changes'], [])
+
+    def test_paging_through_one_timestamp(self):
+        moment = datetime.now(timezone.utc) - timedelta(seconds=0.5)
+        for item_id in ('a', 'b', 'c'):
+            log(moment, 'video', item_id)
+        log(moment, 'post', 'd')
+        seen, cursor = [], self.since
+        for _ in range(4):
+            page = changes_since(cursor, 1)
+            seen += self.ids(page)
+            cursor = page['cursor']
+            if not page['has_more']:
+                break
+        self.assertEqual([item_id for _, item_id, _ in seen], ['d', 'a', 'b', 'c'])
+        self.assertFalse(page['has_more'])
+
+    @override_settings(CHANGE_LOG_SETTLE_SECONDS=60)
+    def test_recent_entries_settle_first(self):
+        post([])
+        page = changes_since(self.since, 100)
+        self.assertEqual(page['changes'], [])
+        self.assertEqual(page['cursor'], self.since)  # Not moved past what it held back
+        with override_settings(CHANGE_LOG_SETTLE_SECONDS=0):
+            self.assertEqual(len(changes_since(page['cursor'], 100)['changes']), 1)
+
+    def test_view(self):
+        item = post([])
+        start = self.client.get('/api/v1/changes/').json()
+        self.assertEqual(start['changes'], [])
+        response = self.client.get(f'/api/v1/changes/?since={self.since}')  # Unencoded: nothing to escape
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response.json()), [('post', item.id, 'published')])
+        self.assertNotIn('#', response.json()['cursor'])
+
+    def test_expired_cursor_is_a_410(self):
+        old = datetime.now(timezone.utc) - timedelta(days=91)
+        response = self.client.get(f'/api/v1/changes/?since={old.timestamp()}')
+        self.assertEqual(response.status_code, 410)
+        with self.assertRaises(changes.CursorExpired):
+            changes_since(parse_since(old.isoformat()), 10)
+
+    def test_bad_since_is_a_400(self):
+        self.assertEqual(self.client.get('/api/v1/changes/?since=soon').status_code, 400)
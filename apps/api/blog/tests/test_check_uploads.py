@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from .. import models
+from ..pynamo_models import Bio, ImageVariant
+from .dynamo import DynamoTestCase, post
+from .s3 import BUCKET, media_bucket
+
+
+class CheckUploadsTests(DynamoTestCase, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.s3 = media_bucket(self)
+        author = User.objects.create(username='author')
+        models.Post.objects.create(title='Kept', excerpt='-', content='-', author=author, image='posts/kept.jpg')
+        models.Post.objects.create(title='Gone', excerpt='-', content='-', author=author, image='posts/gone.jpg')
+        post('tech', image_url=f'https://{BUCKET}.s3.amazonaws.com/posts/my%20photo.jpg', image_variants=[
+            ImageVariant(key='posts/variants/photo-640.webp', width=640, height=480, format='webp'),
+        ])
+        # Outside every upload prefix, so checked with a HEAD request rather than the listing
+        Bio(about='About', resume_url='https://cdn.example.com/legacy/resume.pdf').save()
+
+        for key in ('posts/kept.jpg', 'posts/my photo.jpg', 'posts/variants/photo-640.webp'):
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b'data')
+        self.s3.put_object(Bucket=BUCKET, Key='posts/orphan.jpg', Body=b'orphaned')
+        self.s3.put_object(Bucket=BUCKET, Key='unscanned/other.jpg', Body=b'data')
+
+    def check(self, *args):
+        out = StringIO()
+        call_command('check_uploads', *args, stdout=out)
+        return json.loads(out.getvalue())
+
+    def test_reports_missing_and_orphaned_objects(self):
+        report = self.check()
+        self.assertEqual(report['bucket'], BUCKET)
+        self.assertEqual(report['prefixes'], ['bio/', 'posts/', 'projects/'])
+        self.assertEqual(report['referenced'], 5)
+        self.assertEqual(report['listed'], 4)
+        self.assertEqual(report['missing'], [
+            {'key': 'legacy/resume.pdf', 'referenced_by': ['dynamodb Bio:author_bio resume_url']},
+            {'key': 'posts/gone.jpg', 'referenced_by': [f'Post:{models.Post.objects.get(title="Gone").pk} image']},
+        ])
+        self.assertEqual([obj['key'] for obj in report['orphaned']], ['posts/orphan.jpg'])
+        self.assertEqual(report['orphaned'][0]['size'], len(b'orphaned'))
+        self.assertEqual(report['orphaned_bytes'], len(b'orphaned'))
+
+    def test_url_encoded_references_match_their_keys(self):
+        report = self.check()
+        self.assertNotIn('posts/my photo.jpg', [obj['key'] for obj in report['missing']])
+        self.assertNotIn('posts/my photo.jpg', [obj['key'] for obj in report['orphaned']])
+
+    def test_existing_object_outside_the_prefixes(self):
+        self.s3.put_object(Bucket=BUCKET, Key='legacy/resume.pdf', Body=b'data')
+        self.assertEqual([obj['key'] for obj in self.check()['missing']], ['posts/gone.jpg'])
+
+    def test_skip_dynamodb(self):
+        report = self.check('--skip-dynamodb')
+        self.assertEqual(report['referenced'], 2)
+        self.assertEqual([obj['key'] for obj in report['missing']], ['posts/gone.jpg'])
+        self.assertEqual(
+            [obj['key'] for obj in report['orphaned']],
+            ['posts/my photo.jpg', 'posts/orphan.jpg', 'posts/variants/photo-640.webp'],
+        )
+
+    def test_prefix_option(self):
+        report = self.check('--prefix', 'unscanned/', '--skip-dynamodb')
+        self.assertEqual(report['prefixes'], ['unscanned/'])
+        self.assertEqual([obj['key'] for obj in report['orphaned']], ['unscanned/other.jpg'])
+        self.assertEqual([obj['key'] for obj in report['missing']], ['posts/gone.jpg'])
+
+    def test_fail_on_missing(self):
+        with self.assertRaisesMessage(CommandError, f'2 referenced file(s) missing from s3://{BUCKET}'):
+            self.check('--fail-on-missing')
+
+    def test_requires_a_bucket(self):
+        with override_settings(AWS_STORAGE_BUCKET_NAME=''):
+            with self.assertRaisesMessage(CommandError, 'AWS_STORAGE_BUCKET_NAME is not set'):
+                self.check()
@@ -0,0 +1,143 @@
+from unittest import mock
+from botocore.exceptions import ClientError
+from django.test import SimpleTestCase, override_settings
+from .. import circuit
+from ..circuit import CircuitBreaker, CircuitOpenError
+from ..deadlines import DeadlineExceeded
+from ..pynamo_models import Post, Video
+from .dynamo import DynamoTestCase, post
+
+
+def client_error(code):
+    return ClientError({'Error': {'Code': code, 'Message': code}}, 'Query')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch('blog.circuit.time.monotonic', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('tests', window_seconds=10, min_calls=4, failure_rate=0.5, open_seconds=30)
+
+    def fail(self, error=None):
+        def call():
+            raise error or client_error('ProvisionedThroughputExceededException')
+
+        with self.assertRaises(Exception):
+            self.breaker.call(call)
+
+    def succeed(self):
+        return self.breaker.call(lambda: 'ok')
+
+    def open(self):
+        for _ in range(4):
+            self.fail()
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+
+    def test_opens_on_the_failure_rate(self):
+        self.succeed()
+        self.succeed()
+        self.fail()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)  # 1 of 3: too few calls
+        self.fail()
+        self.assertEqual(self.breaker.state, circuit.OPEN)  # 2 of 4
+        with self.assertRaises(CircuitOpenError) as refused:
+            self.succeed()
+        self.assertEqual(refused.exception.retry_after, 30)
+
+    def test_only_struggling_table_errors_count(self):
+        for _ in range(4):
+            self.fail(client_error('ValidationException'))
+        self.fail(client_error('ConditionalCheckFailedException'))
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+    def test_old_outcomes_leave_the_window(self):
+        self.fail()
+        self.fail()
+        self.clock.now += 11
+        self.succeed()
+        self.succeed()
+        self.fail()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)  # 1 of 3 in the window
+
+    def test_half_open_probe_closes(self):
+        self.open()
+        self.clock.now += 30
+        refused = []
+
+        def probe():
+            # While the probe is out, every other call is refused
+            with self.assertRaises(CircuitOpenError):
+                self.succeed()
+            refused.append(True)
+            return 'ok'
+
+        self.assertEqual(self.breaker.call(probe), 'ok')
+        self.assertEqual(refused, [True])
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+        self.assertEqual(self.succeed(), 'ok')
+
+    def test_failed_probe_reopens(self):
+        self.open()
+        self.clock.now += 30
+        self.fail()
+        self.assertEqual(self.breaker.state, circuit.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.succeed()
+        self.clock.now += 30
+        self.succeed()
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+    def test_a_probe_out_of_time_frees_the_slot(self):
+        self.open()
+        self.clock.now += 30
+        self.fail(DeadlineExceeded('out of time'))
+        self.assertEqual(self.breaker.state, circuit.HALF_OPEN)
+        self.succeed()  # The next call is the probe
+        self.assertEqual(self.breaker.state, circuit.CLOSED)
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class OpenCircuitResponseTests(DynamoTestCase):
+    def open(self, model):
+        breaker = circuit.breaker(model.Meta.table_name)
+        breaker.reset()  # Forget the setup's successful calls
+        for _ in range(breaker.min_calls):
+            breaker.record(True)
+        self.assertEqual(breaker.state, circuit.OPEN)
+
+    def test_last_good_response_is_served(self):
+        post([], title='Cached')
+        self.assertEqual(self.client.get('/api/v1/posts/').status_code, 200)
+        # A change retires the cached response; the table then goes down
+        post([], title='Unseen')
+        self.open(Post)
+        response = self.client.get('/api/v1/posts/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['title'] for item in response.json()], ['Cached'])
+        self.assertEqual(response['Warning'], '111 - "Revalidation Failed"')
+
+    def test_503_without_a_last_good_response(self):
+        self.open(Video)
+        with self.assertLogs('blog.views', 'WARNING'):
+            response = self.client.get('/api/v1/videos/')
+        self.assertEqual(response.status_code, 503)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(response.json(), {'error': 'Error fetching videos: temporarily unavailable, retry later'})
+
+    def test_errors_are_logged_not_returned(self):
+        with mock.patch.object(Video, 'scan', side_effect=RuntimeError('internal detail')):
+            with self.assertLogs('blog.views', 'ERROR') as logs:
+                response = self.client.get('/api/v1/videos/')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'Error fetching videos'})
+        self.assertIn('internal detail', '\n'.join(logs.output))
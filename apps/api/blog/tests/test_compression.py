@@ -0,0 +1,71 @@
+import gzip
+import brotli
+from django.test import SimpleTestCase, override_settings
+from ..compression import Representation, accepted_encodings
+from .dynamo import DynamoTestCase, post
+
+BIG = {'items': ['lorem ipsum dolor sit amet'] * 50}
+
+
+class NegotiationTests(SimpleTestCase):
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, br;q=0.5, identity;q=0, x;q=bad'),
+                         {'gzip': 1.0, 'br': 0.5, 'identity': 0.0, 'x': 0.0})
+        self.assertEqual(accepted_encodings(''), {})
+
+    def test_choose(self):
+        representation = Representation.render(BIG)
+        self.assertEqual(representation.choose('gzip, deflate, br'), 'br')
+        self.assertEqual(representation.choose('gzip'), 'gzip')
+        self.assertEqual(representation.choose('br;q=0, *'), 'gzip')
+        self.assertEqual(representation.choose('*;q=0.1'), 'br')
+        self.assertEqual(representation.choose('gzip;q=0, br;q=0'), 'identity')
+        self.assertEqual(representation.choose(''), 'identity')
+
+    def test_variants_hold_the_same_body(self):
+        representation = Representation.render(BIG)
+        identity = representation.bodies['identity']
+        self.assertEqual(brotli.decompress(representation.bodies['br']), identity)
+        self.assertEqual(gzip.decompress(representation.bodies['gzip']), identity)
+        # Same content, same bytes
+        self.assertEqual(Representation.render(BIG).bodies, representation.bodies)
+
+    def test_small_bodies_are_not_compressed(self):
+        self.assertEqual(list(Representation.render({'a': 1}).bodies), ['identity'])
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class CompressedResponseTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        for number in range(5):
+            post(['django'], title=f'Post {number}')
+
+    def get(self, encoding='', **headers):
+        return self.client.get('/api/v1/posts/', HTTP_ACCEPT_ENCODING=encoding, **headers)
+
+    def test_each_coding_is_its_own_representation(self):
+        plain, compressed, zipped = self.get(), self.get('gzip, br'), self.get('gzip')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(compressed['Content-Encoding'], 'br')
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertEqual(brotli.decompress(compressed.content), plain.content)
+        self.assertEqual(gzip.decompress(zipped.content), plain.content)
+        self.assertEqual(len({plain['ETag'], compressed['ETag'], zipped['ETag']}), 3)
+        for response in (plain, compressed, zipped):
+            self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_revalidation_per_coding(self):
+        etag = self.get('br')['ETag']
+        revalidated = self.get('br', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.content, b'')
+        self.assertEqual(revalidated['ETag'], etag)
+        # That ETag names the brotli bytes: a gzip client gets a full response
+        self.assertEqual(self.get('gzip', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_indented_json_is_rendered(self):
+        # The stored bodies are compact JSON, so other renderings skip them
+        response = self.client.get('/api/v1/posts/', HTTP_ACCEPT='application/json; indent=2', HTTP_ACCEPT_ENCODING='br')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertTrue(response.content.startswith(b'[\n  {'))
@@ -0,0 +1,46 @@
+import os
+from unittest import mock
+from django.test import SimpleTestCase
+from .. import deadlines, dynamo_config
+from ..circuit import CircuitOpenError
+from ..pynamo_models import Post, TunedConnection
+
+FAKE_CREDENTIALS = {'AWS_ACCESS_KEY_ID': 'test', 'AWS_SECRET_ACCESS_KEY': 'test'}
+
+
+@mock.patch.dict(os.environ, FAKE_CREDENTIALS)
+class TunedConnectionTests(SimpleTestCase):
+    """The tuning must survive PynamoDB rebuilding the botocore client"""
+
+    def connection(self):
+        return TunedConnection('tests', region='us-east-1', host='http://localhost:8000')
+
+    def assertTuned(self, client):
+        self.assertEqual(client.meta.config.retries['mode'], dynamo_config.DYNAMODB_RETRY_MODE)
+        self.assertEqual(client.meta.config.tcp_keepalive, dynamo_config.DYNAMODB_TCP_KEEPALIVE)
+        # Deadline hooks: a spent budget stops the call before it is sent
+        with deadlines.deadline(-1):
+            with self.assertRaises(deadlines.DeadlineExceeded):
+                client.meta.events.emit('before-send.dynamodb.GetItem', request=None)
+
+    def test_client_is_tuned(self):
+        connection = self.connection()
+        self.assertTuned(connection.client)
+        self.assertIs(connection.client, connection.client)
+
+    def test_rebuilt_client_is_tuned(self):
+        connection = self.connection()
+        first = connection.client
+        first._request_signer._credentials = None  # What botocore caches after a metadata service hiccup
+        rebuilt = connection.client
+        self.assertIsNot(rebuilt, first)
+        self.assertTuned(rebuilt)
+
+    def test_calls_go_through_the_breaker(self):
+        connection = self.connection()
+        connection.breaker = mock.Mock(**{'call.side_effect': CircuitOpenError('tests', 30)})
+        with self.assertRaises(CircuitOpenError):
+            connection.dispatch('GetItem', {})
+
+    def test_models_use_tuned_connections(self):
+        self.assertIsInstance(Post._get_connection().connection, TunedConnection)
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from .. import deadlines
+from ..deadlines import DeadlineExceeded, deadline, timeout_step
+from ..pynamo_models import Video
+from .dynamo import DynamoTestCase
+
+
+def failed_attempt():
+    return (SimpleNamespace(status_code=500), {'Error': {'Code': 'InternalServerError'}})
+
+
+class TimeoutStepTests(SimpleTestCase):
+    def test_no_cap_without_a_budget_or_while_it_covers_the_timeout(self):
+        self.assertIsNone(timeout_step(5.0))
+        with deadline(10):
+            self.assertIsNone(timeout_step(5.0))
+
+    def test_capped_to_the_largest_step_within_the_budget(self):
+        with deadline(3):
+            self.assertEqual(timeout_step(5.0), 2.0)
+        with deadline(0.7):
+            self.assertEqual(timeout_step(5.0), 0.5)
+        with deadline(0.01):
+            self.assertEqual(timeout_step(5.0), deadlines.TIMEOUT_STEPS[0])
+
+
+class DeadlineTests(DynamoTestCase):
+    def botocore_client(self):
+        return Video._get_connection().connection.client
+
+    def test_capped_clients(self):
+        full = self.botocore_client()
+        with deadline(3):
+            capped = self.botocore_client()
+            self.assertIs(self.botocore_client(), capped)
+        self.assertIsNot(capped, full)
+        self.assertEqual((capped.meta.config.connect_timeout, capped.meta.config.read_timeout), (2.0, 2.0))
+        self.assertIs(self.botocore_client(), full)
+        list(Video.scan())  # Both work against the same table
+        with deadline(3):
+            list(Video.scan())
+
+    def test_spent_budget_stops_the_call(self):
+        with deadline(-1):
+            with self.assertRaises(DeadlineExceeded):
+                list(Video.scan())
+
+    def test_no_retry_without_time_for_it(self):
+        events = self.botocore_client().meta.events
+        with deadline(0.05):
+            with self.assertRaises(DeadlineExceeded):
+                events.emit('needs-retry.dynamodb.Scan', response=failed_attempt(), caught_exception=None)
+            with self.assertRaises(DeadlineExceeded):
+                events.emit('needs-retry.dynamodb.Scan', response=None, caught_exception=ConnectionError())
+            # A successful attempt is left alone
+            self.assertIsNone(deadlines._check_before_retry(response=(SimpleNamespace(status_code=200), {})))
+        with deadline(3):
+            # Enough time left: botocore's retry handler decides
+            self.assertIsNone(deadlines._check_before_retry(response=failed_attempt()))
+
+    @override_settings(REQUEST_DEADLINE_SECONDS=3)
+    def test_spent_budget_is_a_503(self):
+        with mock.patch.object(deadlines, 'remaining', return_value=-1):
+            with self.assertLogs('blog.views', 'WARNING'):
+                response = self.client.get('/api/v1/videos/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
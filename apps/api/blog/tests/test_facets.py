@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from pynamodb.exceptions import TransactWriteError
+from .. import facets
+from ..pynamo_models import Facet, Project
+from .dynamo import DynamoTestCase, post
+
+
+class FacetTests(DynamoTestCase):
+    def assertCounts(self, facet, expected):
+        self.assertEqual({value['value']: value['count'] for value in facets.counts(facet)}, expected)
+
+    def assertItemRecord(self, facet, item, values):
+        """The values the item is counted under, as stored in its '<facet>#item' record"""
+        stored = [record.members for record in Facet.query(facets.item_key(facet), Facet.sk == item.id)]
+        self.assertEqual(stored, [set(values)] if values else [])
+
+    def test_create(self):
+        first = post(['django', 'aws'])
+        second = post(['django'], month=2)
+        self.assertCounts('tag', {'django': 2, 'aws': 1})
+        self.assertCounts('month', {'2025-01': 1, '2025-02': 1})
+        self.assertEqual(facets.members('tag', 'django'), {first.id, second.id})
+        self.assertEqual(facets.members('tag', 'aws'), {first.id})
+        self.assertItemRecord('tag', first, {'django', 'aws'})
+
+    def test_retag(self):
+        item = post(['django', 'aws'])
+        item.tags = ['aws', 'python']
+        item.save()
+        self.assertCounts('tag', {'aws': 1, 'python': 1})
+        self.assertEqual(facets.members('tag', 'django'), set())
+        self.assertEqual(facets.members('tag', 'python'), {item.id})
+        self.assertItemRecord('tag', item, {'aws', 'python'})
+
+    def test_saving_unchanged_values_keeps_counts(self):
+        item = post(['django'])
+        item.title = 'Renamed'
+        item.save()
+        self.assertCounts('tag', {'django': 1})
+
+    def test_month_move(self):
+        item = post([], month=1)
+        item.date_published = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        item.save()
+        self.assertCounts('month', {'2025-03': 1})
+        self.assertEqual(facets.members('month', '2025-01'), set())
+        self.assertEqual(facets.members('month', '2025-03'), {item.id})
+
+    def test_unpublish_and_republish(self):
+        item = post(['django'])
+        item.is_published = False
+        item.save()
+        self.assertCounts('tag', {})
+        self.assertCounts('month', {})
+        self.assertItemRecord('tag', item, set())
+        item.is_published = True
+        item.save()
+        self.assertCounts('tag', {'django': 1})
+
+    def test_delete(self):
+        kept = post(['django'])
+        deleted = post(['django', 'aws'])
+        deleted.delete()
+        self.assertCounts('tag', {'django': 1})
+        self.assertEqual(facets.members('tag', 'django'), {kept.id})
+        self.assertItemRecord('tag', deleted, set())
+
+    def test_other_models_have_their_own_facets(self):
+        Project(title='Tool', description='A tool', stack=['python', 'aws']).save()
+        post(['aws'])
+        self.assertCounts('stack', {'python': 1, 'aws': 1})
+        self.assertCounts('tag', {'aws': 1})
+
+    def test_failed_condition_rebuilds_the_facet(self):
+        item = post(['django'])
+        # Drift: the value lost the member its item record still claims
+        Facet('tag', 'django', count=0, members=None).save()
+        item.tags = ['python']
+        with self.assertLogs('blog.facets', 'WARNING'):
+            item.save()
+        self.assertCounts('tag', {'python': 1})
+        self.assertEqual(facets.members('tag', 'python'), {item.id})
+
+    def test_conditions_refuse_a_double_add(self):
+        item = post(['django'])
+        Facet(facets.item_key('tag'), item.id).delete()  # Forgets it was counted
+        with self.assertRaises(TransactWriteError):
+            facets.apply_change('tag', item)
+        self.assertCounts('tag', {'django': 1})
+
+    def test_rebuild_facet(self):
+        first = post(['django', 'aws'])
+        second = post(['django'])
+        Facet('tag', 'stale', count=3, members={'gone'}).save()
+        Facet(facets.item_key('tag'), 'gone', members={'stale'}).save()
+        Facet('tag', 'django', count=7, members={first.id}).save()
+
+        self.assertEqual(facets.rebuild_facet('tag'), 2)
+        self.assertCounts('tag', {'django': 2, 'aws': 1})
+        self.assertEqual(facets.members('tag', 'django'), {first.id, second.id})
+        self.assertEqual(facets.members('tag', 'stale'), set())
+        self.assertEqual([record.sk for record in Facet.query(facets.item_key('tag'))], sorted([first.id, second.id]))
@@ -0,0 +1,130 @@
+import gzip
+import xml.etree.ElementTree as ElementTree
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from .. import feeds
+from ..artifacts import ArtifactUnavailable
+from ..feeds import FeedSet
+from .dynamo import DynamoTestCase
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+SITEMAP = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def rec(kind, number, **fields):
+    return dict({
+        'type': kind,
+        'id': f'{kind}-{number}',
+        'slug': f'{kind}-{number}',
+        'title': f'{kind.title()} {number}',
+        'summary': 'Summary',
+        'categories': [],
+        'published': f'2025-01-{number:02d}T12:00:00+00:00',
+        'updated': f'2025-02-{number:02d}T12:00:00+00:00',
+    }, **fields)
+
+
+def parse(document):
+    return ElementTree.fromstring(gzip.decompress(document.body))
+
+
+@override_settings(SITE_URL='https://example.com', FEED_ITEMS_COUNT=2)
+class FeedRenderingTests(SimpleTestCase):
+    def setUp(self):
+        self.feeds = FeedSet([
+            rec('post', 1),
+            rec('post', 3, title='Fish & <Chips>', categories=['C++', 'say "hi"']),
+            rec('post', 2),
+            rec('project', 1),
+            rec('video', 1),
+        ])
+
+    def test_rss_is_valid_and_newest_first(self):
+        channel = parse(self.feeds.documents['feed.xml']).find('channel')
+        items = channel.findall('item')
+        self.assertEqual([item.findtext('title') for item in items], ['Fish & <Chips>', 'Post 2'])
+        self.assertEqual([c.text for c in items[0].findall('category')], ['C++', 'say "hi"'])
+        self.assertEqual(items[0].findtext('link'), 'https://example.com/posts/post-3')
+        self.assertEqual(items[0].findtext('pubDate'), 'Fri, 03 Jan 2025 12:00:00 +0000')
+        self.assertEqual(channel.findtext('lastBuildDate'), 'Mon, 03 Feb 2025 12:00:00 +0000')
+
+    def test_atom_is_valid(self):
+        feed = parse(self.feeds.documents['atom.xml'])
+        self.assertEqual(feed.tag, f'{ATOM}feed')
+        entries = feed.findall(f'{ATOM}entry')
+        self.assertEqual([entry.findtext(f'{ATOM}title') for entry in entries], ['Fish & <Chips>', 'Post 2'])
+        self.assertEqual([c.get('term') for c in entries[0].findall(f'{ATOM}category')], ['C++', 'say "hi"'])
+        self.assertEqual(feed.findtext(f'{ATOM}updated'), '2025-02-03T12:00:00+00:00')
+
+    def test_empty_feeds_are_valid(self):
+        empty = FeedSet([])
+        self.assertEqual(parse(empty.documents['feed.xml']).find('channel').findall('item'), [])
+        self.assertEqual(parse(empty.documents['atom.xml']).findall(f'{ATOM}entry'), [])
+        self.assertEqual(len(parse(empty.documents['sitemap.xml'])), 4)  # Home and the three sections
+
+    def test_sitemap_lists_every_item(self):
+        urls = parse(self.feeds.documents['sitemap.xml'])
+        self.assertEqual(urls.tag, f'{SITEMAP}urlset')
+        locations = [url.findtext(f'{SITEMAP}loc') for url in urls]
+        for path in ('posts/post-1', 'posts/post-2', 'posts/post-3', 'projects/project-1', 'videos/video-1'):
+            self.assertIn(f'https://example.com/{path}', locations)
+
+    @override_settings(SITEMAP_MAX_URLS=3)
+    def test_large_sitemaps_are_split(self):
+        documents = FeedSet(self.feeds.records).documents
+        index = parse(documents['sitemap.xml'])
+        self.assertEqual(index.tag, f'{SITEMAP}sitemapindex')
+        names = [entry.findtext(f'{SITEMAP}loc') for entry in index]
+        self.assertEqual(names, [f'https://example.com/sitemap-{n}.xml' for n in (1, 2, 3)])
+        self.assertEqual(sum(len(parse(documents[f'sitemap-{n}.xml'])) for n in (1, 2, 3)), 9)
+
+    def test_updates_and_round_trip(self):
+        changed = self.feeds.with_record(rec('post', 2, title='Renamed')).without('post', 'post-3')
+        titles = [item.findtext('title') for item in parse(changed.documents['feed.xml']).iter('item')]
+        self.assertEqual(titles, ['Renamed', 'Post 1'])
+        loaded = FeedSet.from_bytes(changed.to_bytes())
+        self.assertEqual(loaded.records, changed.records)
+        self.assertEqual({name: doc.etag for name, doc in loaded.documents.items()},
+                         {name: doc.etag for name, doc in changed.documents.items()})
+        # Same content, same bytes: the ETag only changes with the content
+        self.assertEqual(FeedSet(changed.records).documents['feed.xml'].etag, changed.documents['feed.xml'].etag)
+
+
+class FeedViewTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        feeds.index.publish(FeedSet([rec('post', 1)]))
+
+    def test_gzip_and_identity_are_separate_representations(self):
+        compressed = self.client.get('/feed.xml', HTTP_ACCEPT_ENCODING='gzip')
+        plain = self.client.get('/feed.xml')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertNotEqual(compressed['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        ElementTree.fromstring(plain.content)
+
+        revalidated = self.client.get('/feed.xml', HTTP_IF_NONE_MATCH=plain['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_gzip_only_when_accepted_with_a_nonzero_quality(self):
+        for header, encoded in [
+            ('gzip;q=0', False),
+            ('br, gzip;q=0, identity', False),
+            ('GZIP;q=0.5', True),
+            ('deflate, br', False),
+            ('*', True),
+            ('*, gzip;q=0', False),
+        ]:
+            response = self.client.get('/feed.xml', HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.get('Content-Encoding'), 'gzip' if encoded else None, header)
+
+    def test_unknown_document(self):
+        self.assertEqual(self.client.get('/sitemap-2.xml').status_code, 404)
+
+    def test_feeds_still_loading(self):
+        with mock.patch.object(feeds.index, 'get', side_effect=ArtifactUnavailable(feeds.ARTIFACT_NAME)):
+            response = self.client.get('/feed.xml')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
@@ -0,0 +1,57 @@
+from unittest import mock
+from django.test import SimpleTestCase
+from rest_framework.serializers import ValidationError
+from ..pynamo_models import Post
+from ..serializers import PostListSerializer, PostSerializer
+from .dynamo import DynamoTestCase, post
+
+
+class FieldSelectionTests(SimpleTestCase):
+    def test_select(self):
+        self.assertEqual(PostListSerializer.select(['slug', 'title']), ['slug', 'title'])
+        everything = PostListSerializer.select()
+        self.assertEqual(PostListSerializer.select(exclude=['excerpt']), [name for name in everything if name != 'excerpt'])
+        self.assertEqual(PostListSerializer.select(['title', 'excerpt'], ['excerpt']), ['title'])
+
+    def test_unknown_fields(self):
+        with self.assertRaises(ValidationError) as raised:
+            PostListSerializer.select(['title', 'nope'], ['content'])  # Not in the list serializer either
+        self.assertEqual(raised.exception.detail, {'fields': 'Unknown fields: nope, content'})
+
+    def test_attributes(self):
+        # Renamed fields read their source, rendered content what rendering needs
+        self.assertEqual(PostSerializer.attributes(['image', 'author_name', 'image_sources']),
+                         {'image_url', 'author', 'image_variants'})
+        self.assertEqual(PostSerializer.attributes(['toc']), {'content', 'content_html', 'content_hash', 'toc'})
+
+
+class FieldSelectionViewTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.item = post(['django'], title='Chosen', slug='chosen')
+
+    def test_fields_drive_the_projection(self):
+        with mock.patch.object(Post, 'scan', wraps=Post.scan) as scan:
+            response = self.client.get('/api/v1/posts/?fields=title,slug')
+        self.assertEqual(response.json(), [{'title': 'Chosen', 'slug': 'chosen'}])
+        # Plus what the view itself reads: the id, and the attributes it filters and sorts on
+        self.assertEqual(scan.call_args.kwargs['attributes_to_get'],
+                         ['date_published', 'id', 'is_published', 'slug', 'title'])
+
+    def test_every_attribute_without_a_selection(self):
+        with mock.patch.object(Post, 'scan', wraps=Post.scan) as scan:
+            response = self.client.get('/api/v1/posts/')
+        self.assertIsNone(scan.call_args.kwargs['attributes_to_get'])
+        self.assertEqual(set(response.json()[0]), set(PostListSerializer._declared_fields))
+
+    def test_fields_and_exclude_combined(self):
+        response = self.client.get('/api/v1/posts/chosen/?fields=title,content,excerpt&exclude=content')
+        self.assertEqual(response.json(), {'title': 'Chosen', 'excerpt': 'Excerpt'})
+        response = self.client.get('/api/v1/posts/?tag=django&exclude=image,image_url,image_sources')
+        self.assertNotIn('image', response.json()[0])
+        self.assertIn('title', response.json()[0])
+
+    def test_unknown_field_is_a_400(self):
+        response = self.client.get('/api/v1/posts/?fields=title,secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'fields': 'Unknown fields: secret'})
@@ -0,0 +1,131 @@
+import base64
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from .. import images
+from ..images import dominant_color, placeholder, prepare_image, render_variants, variant_widths
+from ..pynamo_models import Post
+from .dynamo import DynamoTestCase, post
+
+
+def encoded(image, fmt='PNG', **params):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640, 960])
+class ImageTests(SimpleTestCase):
+    def test_variant_widths(self):
+        self.assertEqual(variant_widths(2000), [320, 640, 960])
+        self.assertEqual(variant_widths(700), [320, 640, 700])  # The original width, never upscaled
+        self.assertEqual(variant_widths(640), [320, 640])
+        self.assertEqual(variant_widths(100), [100])
+
+    def test_render_variants(self):
+        rendered = render_variants(Image.new('RGB', (800, 400), 'blue'), 'posts/abc')
+        self.assertEqual([(key, width, height, fmt) for key, _, width, height, fmt in rendered], [
+            ('posts/abc/320w.avif', 320, 160, 'avif'), ('posts/abc/320w.webp', 320, 160, 'webp'),
+            ('posts/abc/640w.avif', 640, 320, 'avif'), ('posts/abc/640w.webp', 640, 320, 'webp'),
+            ('posts/abc/800w.avif', 800, 400, 'avif'), ('posts/abc/800w.webp', 800, 400, 'webp'),
+        ])
+        for _, data, width, height, fmt in rendered:
+            decoded = Image.open(BytesIO(data))
+            self.assertEqual((decoded.format.lower(), decoded.size), (fmt, (width, height)))
+
+    def test_missing_codecs_are_skipped(self):
+        with mock.patch('PIL.features.check', side_effect=lambda fmt: fmt == 'webp'):
+            rendered = render_variants(Image.new('RGB', (100, 100)), 'x')
+        self.assertEqual([fmt for *_, fmt in rendered], ['webp'])
+
+    def test_prepare_image_modes(self):
+        palette = Image.new('P', (4, 4))
+        transparent = palette.copy()
+        transparent.info['transparency'] = 0
+        for image, mode in (
+            (palette, 'RGB'),
+            (transparent, 'RGBA'),
+            (Image.new('LA', (4, 4)), 'RGB'),
+            (Image.new('CMYK', (4, 4)), 'RGB'),
+            (Image.new('RGBA', (4, 4)), 'RGBA'),
+        ):
+            self.assertEqual(prepare_image(image).mode, mode, image.mode)
+
+    def test_prepare_image_applies_exif_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotated 90° clockwise
+        rotated = Image.open(BytesIO(encoded(Image.new('RGB', (40, 20)), 'JPEG', exif=exif)))
+        self.assertEqual(prepare_image(rotated).size, (20, 40))
+
+    def test_dominant_color(self):
+        image = Image.new('RGB', (100, 100), (200, 30, 40))
+        image.paste((10, 10, 10), (0, 0, 20, 20))
+        self.assertEqual(dominant_color(image), '#c81e28')
+        self.assertEqual(dominant_color(Image.new('RGBA', (10, 10), (0, 255, 0, 255))), '#00ff00')
+
+    def test_placeholder(self):
+        uri = placeholder(Image.new('RGB', (400, 200), 'red'))
+        self.assertTrue(uri.startswith('data:image/webp;base64,'))
+        preview = Image.open(BytesIO(base64.b64decode(uri.split(',', 1)[1])))
+        self.assertEqual((preview.format, preview.size), ('WEBP', (settings.IMAGE_PLACEHOLDER_SIZE, 8)))
+
+
+class ProcessPoolTests(SimpleTestCase):
+    def test_tasks_run_in_a_spawned_django_process(self):
+        self.addCleanup(setattr, images, '_pool', None)
+        pool = images.get_pool()
+        self.addCleanup(pool.shutdown)
+        self.assertIs(images.get_pool(), pool)
+        # Needs the settings, so the process ran django.setup()
+        self.assertEqual(pool.submit(variant_widths, 100).result(timeout=60), [100])
+
+
+@override_settings(IMAGE_VARIANT_WIDTHS=[320, 640], RESPONSE_CACHE_ENABLED=True)
+class BuildVariantsTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        storages = dict(settings.STORAGES, default={
+            'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': directory},
+        })
+        test_settings = override_settings(STORAGES=storages)
+        test_settings.enable()
+        self.addCleanup(test_settings.disable)
+        self.name = default_storage.save('posts/cover.png', ContentFile(encoded(Image.new('RGB', (800, 600), 'red'))))
+        self.item = post([], slug='covered')
+
+    def schedule(self, name):
+        """schedule_variants() on a thread pool, so the task shares this process's mocks"""
+        pool = ThreadPoolExecutor(max_workers=1)
+        with mock.patch.object(images, 'get_pool', return_value=pool):
+            images.schedule_variants('Post', self.item.id, name)
+        pool.shutdown(wait=True)  # The done callback runs on the pool's thread
+
+    def test_build_variants(self):
+        stored = images.build_variants('Post', self.item.id, self.name)
+        self.assertEqual([variant['key'] for variant in stored], [
+            'posts/cover/320w.avif', 'posts/cover/320w.webp', 'posts/cover/640w.avif', 'posts/cover/640w.webp',
+        ])
+        for variant in stored:
+            self.assertTrue(default_storage.exists(variant['key']))
+        item = Post.get(self.item.id)
+        self.assertEqual((item.image_width, item.image_height, item.image_color), (800, 600, '#ff0000'))
+        self.assertEqual(len(item.image_variants), 4)
+        self.assertTrue(item.image_placeholder.startswith('data:image/webp;base64,'))
+
+    def test_cached_responses_are_retired(self):
+        self.assertIsNone(self.client.get('/api/v1/posts/covered/').json()['image_width'])
+        self.schedule(self.name)
+        self.assertEqual(self.client.get('/api/v1/posts/covered/').json()['image_width'], 800)
+
+    def test_failures_are_logged(self):
+        with self.assertLogs('blog.images', 'ERROR'):
+            self.schedule('posts/missing.png')
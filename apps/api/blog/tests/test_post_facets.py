@@ -0,0 +1,39 @@
+from .dynamo import DynamoTestCase, post
+
+
+class PostFacetEndpointTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.january = post(['django', 'aws'], month=1, title='January')
+        self.march = post(['django'], month=3, title='March')
+        self.draft = post(['django'], month=3, title='Draft', is_published=False)
+
+    def titles(self, response):
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['title'] for item in response.json())
+
+    def test_facets(self):
+        response = self.client.get('/api/v1/posts/facets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'tag': [{'value': 'django', 'count': 2}, {'value': 'aws', 'count': 1}],
+            'month': [{'value': '2025-01', 'count': 1}, {'value': '2025-03', 'count': 1}],
+        })
+
+    def test_archive_is_newest_first(self):
+        response = self.client.get('/api/v1/posts/archive/')
+        self.assertEqual(response.json(), [{'month': '2025-03', 'count': 1}, {'month': '2025-01', 'count': 1}])
+
+    def test_filters(self):
+        self.assertEqual(self.titles(self.client.get('/api/v1/posts/', {'tag': 'django'})), ['January', 'March'])
+        self.assertEqual(self.titles(self.client.get('/api/v1/posts/', {'month': '2025-03'})), ['March'])
+        self.assertEqual(self.titles(self.client.get('/api/v1/posts/', {'tag': 'django', 'month': '2025-01'})), ['January'])
+        self.assertEqual(self.titles(self.client.get('/api/v1/posts/', {'tag': 'aws', 'month': '2025-03'})), [])
+        self.assertEqual(self.titles(self.client.get('/api/v1/posts/', {'tag': 'unknown'})), [])
+
+    def test_follows_edits(self):
+        self.client.get('/api/v1/posts/facets/')
+        self.march.tags = ['aws']
+        self.march.save()  # Also drops the cached response
+        response = self.client.get('/api/v1/posts/facets/')
+        self.assertEqual(response.json()['tag'], [{'value': 'aws', 'count': 2}, {'value': 'django', 'count': 1}])
@@ -0,0 +1,74 @@
+import math
+from collections import Counter
+from django.test import SimpleTestCase, override_settings
+from .. import related
+from ..pynamo_models import Post
+from ..related import nearest_neighbours, tfidf_vectors
+from .dynamo import DynamoTestCase, post
+
+
+def vectors(*texts):
+    return tfidf_vectors([Counter(text.split()) for text in texts])
+
+
+class TfidfTests(SimpleTestCase):
+    def test_vectors_are_unit_length(self):
+        for vector in vectors('django aws aws', 'django python', 'rust'):
+            self.assertAlmostEqual(math.sqrt(sum(weight * weight for weight in vector.values())), 1.0)
+
+    def test_rarer_terms_weigh_more(self):
+        vector = vectors('django aws', 'django', 'python')[0]
+        self.assertGreater(vector['aws'], vector['django'])
+        # A term every document has tells them apart not at all
+        self.assertEqual(vectors('django aws', 'django')[1], {})
+
+    def test_empty_corpus(self):
+        self.assertEqual(tfidf_vectors([]), [])
+        self.assertEqual(tfidf_vectors([Counter()]), [{}])
+        self.assertEqual(nearest_neighbours([], 3), [])
+
+    def test_term_limit(self):
+        vector = tfidf_vectors([Counter({f'term{n}': n + 1 for n in range(100)}), Counter()])[0]
+        self.assertEqual(len(vector), related.MAX_TERMS)
+        self.assertIn('term99', vector)
+        self.assertNotIn('term0', vector)
+
+
+class NearestNeighbourTests(SimpleTestCase):
+    def setUp(self):
+        self.vectors = vectors(
+            'django aws lambda',  # 0
+            'django aws lambda deploy',  # 1: closest to 0
+            'django aws',  # 2
+            'django',  # 3
+            'rust embedded',  # 4: shares nothing with 0-3
+        )
+
+    def test_ranking_excludes_the_item_itself(self):
+        neighbours = nearest_neighbours(self.vectors, 10)
+        self.assertEqual(neighbours[0][:2], [1, 2])
+        for index, others in enumerate(neighbours):
+            self.assertNotIn(index, others)
+
+    def test_only_similar_items(self):
+        neighbours = nearest_neighbours(self.vectors, 10)
+        self.assertEqual(neighbours[4], [])
+        self.assertNotIn(4, neighbours[0])
+
+    def test_count_limit(self):
+        self.assertEqual([len(others) for others in nearest_neighbours(self.vectors, 2)], [2, 2, 2, 2, 0])
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class RefreshRelatedTests(DynamoTestCase):
+    def test_refresh_retires_cached_responses(self):
+        first = post(['django', 'aws'], title='Django on AWS', slug='first')
+        post(['django', 'aws'], title='Deploying Django to AWS', slug='second')
+        post(['rust'], title='Embedded Rust', slug='third')
+        related._executor.submit(lambda: None).result()  # Let the refreshes the saves queued finish
+        first.update(actions=[Post.related.set([])])  # No signal, as if never computed
+
+        self.assertEqual(self.client.get('/api/v1/posts/first/').json()['related'], [])
+        self.assertEqual(related.refresh_related('Post'), 1)
+        titles = [card['title'] for card in self.client.get('/api/v1/posts/first/').json()['related']]
+        self.assertEqual(titles, ['Deploying Django to AWS'])
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase
+from .. import rendering
+from ..rendering import content_hash, rendered
+
+
+def item(content, **stored):
+    return SimpleNamespace(**dict({'content': content, 'content_html': None, 'content_hash': None, 'toc': []}, **stored))
+
+
+class RenderCacheTests(SimpleTestCase):
+    def setUp(self):
+        rendering._rendered.clear()
+        self.addCleanup(rendering._rendered.clear)
+
+    def test_renders_once_per_content(self):
+        with mock.patch.object(rendering, 'render_markdown', wraps=rendering.render_markdown) as render:
+            first = rendered(item('# Title\n\nBody'))
+            second = rendered(item('# Title\n\nBody'))
+            rendered(item('Other'))
+        self.assertEqual(first, second)
+        self.assertIn('<h1 id="title">Title</h1>', first[0])
+        self.assertEqual(render.call_count, 2)
+
+    def test_keyed_by_the_hash_alone(self):
+        rendered(item('Some **long** text'))
+        self.assertEqual(list(rendering._rendered), [content_hash('Some **long** text')])
+        self.assertNotIn('Some **long** text', repr(list(rendering._rendered)))
+
+    def test_least_recently_used_is_evicted(self):
+        with mock.patch.object(rendering, 'CACHE_SIZE', 2):
+            rendered(item('one'))
+            rendered(item('two'))
+            rendered(item('one'))
+            rendered(item('three'))
+        self.assertEqual(list(rendering._rendered), [content_hash('one'), content_hash('three')])
+
+    def test_stored_render_is_used_while_current(self):
+        current = item('text', content_html='<p>stored</p>', content_hash=content_hash('text'), toc=['toc'])
+        self.assertEqual(rendered(current), ('<p>stored</p>', ['toc']))
+        self.assertEqual(rendering._rendered, {})
+        outdated = item('edited', content_html='<p>stored</p>', content_hash=content_hash('text'))
+        self.assertEqual(rendered(outdated)[0], '<p>edited</p>')
@@ -0,0 +1,99 @@
+import threading
+import time
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from ..response_cache import ResponseCache
+
+THREADS = 16
+
+
+class ResponseCacheConcurrencyTests(SimpleTestCase):
+    """At most one backend read per key per expiry, however many callers race for it"""
+
+    def setUp(self):
+        cache.clear()
+        self.reads = 0
+        self.reads_lock = threading.Lock()
+        self.read_done = threading.Event()
+
+    def backend_read(self, delay=0.1):
+        def read():
+            with self.reads_lock:
+                self.reads += 1
+                number = self.reads
+            time.sleep(delay)  # Long enough for every other caller to pile up behind it
+            self.read_done.set()
+            return f'value {number}'
+        return read
+
+    def race(self, responses, key, compute):
+        """Call get_or_compute from THREADS threads released at once; returns their results"""
+        barrier = threading.Barrier(THREADS)
+        results = [None] * THREADS
+
+        def caller(index):
+            barrier.wait()
+            results[index] = responses.get_or_compute(key, compute)
+
+        threads = [threading.Thread(target=caller, args=(index,)) for index in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        return results
+
+    def test_concurrent_misses_read_once(self):
+        responses = ResponseCache(fresh_seconds=60, stale_seconds=60, lock_seconds=5)
+        results = self.race(responses, '/api/v1/posts/?', self.backend_read())
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(results, ['value 1'] * THREADS)
+
+    def test_expired_value_is_served_stale_while_one_caller_refreshes(self):
+        responses = ResponseCache(fresh_seconds=0.2, stale_seconds=60, lock_seconds=5)
+        compute = self.backend_read()
+        responses.get_or_compute('/api/v1/posts/?', compute)
+        self.read_done.clear()
+        time.sleep(0.3)
+
+        results = self.race(responses, '/api/v1/posts/?', compute)
+        self.assertEqual(results, ['value 1'] * THREADS)
+        self.assertTrue(self.read_done.wait(timeout=5))
+        time.sleep(0.1)  # Let the refresh store its value
+        self.assertEqual(self.reads, 2)
+        self.assertEqual(responses.get_or_compute('/api/v1/posts/?', compute), 'value 2')
+        self.assertEqual(self.reads, 2)
+
+    def test_keys_are_coalesced_independently(self):
+        responses = ResponseCache(fresh_seconds=60, stale_seconds=60, lock_seconds=5)
+        compute = self.backend_read()
+        self.race(responses, '/api/v1/posts/?tag=a', compute)
+        self.race(responses, '/api/v1/posts/?tag=b', compute)
+        self.assertEqual(self.reads, 2)
+
+    def test_uncacheable_results_are_shared_but_not_stored(self):
+        responses = ResponseCache(fresh_seconds=60, stale_seconds=60, lock_seconds=5)
+        compute = self.backend_read()
+        barrier = threading.Barrier(THREADS)
+        results = []
+
+        def caller():
+            barrier.wait()
+            results.append(responses.get_or_compute('/api/v1/bio/?', compute, cacheable=lambda value: False))
+
+        threads = [threading.Thread(target=caller) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(len(results), THREADS)
+
+        responses.get_or_compute('/api/v1/bio/?', compute, cacheable=lambda value: False)
+        self.assertEqual(self.reads, 2)
+
+    def test_clear_retires_cached_values(self):
+        responses = ResponseCache(fresh_seconds=60, stale_seconds=60, lock_seconds=5)
+        compute = self.backend_read(delay=0)
+        responses.get_or_compute('/api/v1/videos/?', compute)
+        responses.clear()
+        self.assertEqual(responses.get_or_compute('/api/v1/videos/?', compute), 'value 2')
@@ -0,0 +1,90 @@
+import zlib
+from collections import Counter
+from django.test import SimpleTestCase
+from ..search import SearchIndex, stem, tokenize
+
+
+def doc(kind, item_id, **fields):
+    """An (info, weighted term counts) pair, weighting fields the way search.document() does"""
+    weights = {'title': 3, 'keywords': 2, 'content': 1}
+    terms = Counter()
+    for field, text in fields.items():
+        for term in tokenize(text):
+            terms[term] += weights[field]
+    return {'type': kind, 'id': item_id, 'slug': item_id, 'title': fields.get('title', '')}, terms
+
+
+class StemTests(SimpleTestCase):
+    def test_inflections_share_a_stem(self):
+        for words in [
+            ('run', 'running', 'runs'),
+            ('library', 'libraries'),
+            ('cache', 'caches', 'caching', 'cached'),
+            ('deploy', 'deployed', 'deploying', 'deployment'),
+            ('box', 'boxes'),
+            ('make', 'making'),
+        ]:
+            self.assertEqual(len({stem(word) for word in words}), 1, words)
+
+    def test_words_that_only_look_inflected_are_kept(self):
+        for word in ('class', 'status', 'bus', 'go', 'ing', '2024'):
+            self.assertEqual(stem(word), word)
+
+    def test_tokenize_lowercases_and_drops_stop_words(self):
+        self.assertEqual(tokenize('The Caching of PAGES is Running'), [stem('cache'), stem('page'), 'run'])
+        self.assertEqual(tokenize(None), [])
+
+
+class SearchIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SearchIndex.from_documents([
+            doc('post', 'title', title='Caching in Django', content='notes'),
+            doc('post', 'content', title='Notes', content='caching ' + 'filler words here ' * 20),
+            doc('post', 'short', title='Notes', content='caching'),
+            doc('project', 'project', title='Cache server', keywords='python redis'),
+            doc('video', 'unrelated', title='Woodworking'),
+        ])
+
+    def ids(self, results):
+        return [result['id'] for result in results]
+
+    def test_title_matches_outrank_content_matches(self):
+        self.assertEqual(self.ids(self.index.search('caching'))[:2], ['title', 'project'])
+
+    def test_shorter_documents_rank_higher_for_the_same_frequency(self):
+        ids = self.ids(self.index.search('caching'))
+        self.assertLess(ids.index('short'), ids.index('content'))
+
+    def test_rarer_terms_weigh_more(self):
+        # 'redis' is in one document, 'cache' in four
+        results = self.index.search('redis cache')
+        self.assertEqual(results[0]['id'], 'project')
+
+    def test_filters_by_kind_and_limit(self):
+        self.assertEqual(self.ids(self.index.search('cache', kind='project')), ['project'])
+        self.assertEqual(len(self.index.search('cache', limit=2)), 2)
+        self.assertEqual(self.index.search('nothing matches'), [])
+
+    def test_byte_round_trip(self):
+        loaded = SearchIndex.from_bytes(self.index.to_bytes())
+        self.assertEqual(loaded.docs, self.index.docs)
+        self.assertEqual(loaded.terms, self.index.terms)
+        for name in ('lengths', 'offsets', 'doc_ids', 'frequencies'):
+            self.assertEqual(list(getattr(loaded, name)), list(getattr(self.index, name)), name)
+        self.assertEqual(loaded.search('caching redis'), self.index.search('caching redis'))
+
+    def test_rejects_other_data(self):
+        with self.assertRaises(ValueError):
+            SearchIndex.from_bytes(zlib.compress(b'something else'))
+
+    def test_updates_in_place(self):
+        index = self.index.without('post', 'title')
+        self.assertNotIn('title', self.ids(index.search('caching')))
+        index = index.with_document(*doc('post', 'short', title='Woodworking'))
+        self.assertNotIn('short', self.ids(index.search('caching')))
+        self.assertEqual(set(self.ids(index.search('woodworking'))), {'short', 'unrelated'})
+
+    def test_documents_without_terms(self):
+        for index in (SearchIndex.from_documents([]), SearchIndex.from_documents([doc('post', 'a', title='the of')])):
+            self.assertEqual(index.search('anything'), [])
+            self.assertEqual(SearchIndex.from_bytes(index.to_bytes()).docs, index.docs)
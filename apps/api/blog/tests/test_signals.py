@@ -0,0 +1,25 @@
+from ..pynamo_models import Change, Facet
+from ..signals import content_deleted, content_saved
+from .dynamo import DynamoTestCase, post
+
+
+class ContentSignalTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sent = []
+        for signal, name in ((content_saved, 'saved'), (content_deleted, 'deleted')):
+            def record(sender, item, name=name, **kwargs):
+                self.sent.append((name, sender.__name__))
+            signal.connect(record, weak=False, dispatch_uid=f'test-{name}')
+            self.addCleanup(signal.disconnect, dispatch_uid=f'test-{name}')
+
+    def test_content_models_send(self):
+        item = post(['django'])
+        item.delete()
+        self.assertEqual(self.sent, [('saved', 'Post'), ('deleted', 'Post')])
+
+    def test_derived_records_do_not(self):
+        Facet('tag', 'django', count=1, members={'post-1'}).save()
+        Facet('tag', 'django').delete()
+        self.assertEqual(self.sent, [])
+        self.assertEqual(list(Change.scan()), [])  # Nor are they logged as changes
@@ -0,0 +1,51 @@
+from unittest import mock
+from django.core.cache import cache
+from pynamodb.models import Model
+from .. import slugs
+from ..pynamo_models import Post
+from .dynamo import DynamoTestCase, post
+
+
+class SlugLookupTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = post([], title='Hello World')
+
+    def lookup(self, slug):
+        """(item or None, number of GetItem calls it took)"""
+        with mock.patch.object(Post, 'get', wraps=Post.get) as get:
+            item = slugs.get_published(Post, 'post', slug)
+        return item, get.call_count
+
+    def test_known_slug_is_one_read(self):
+        item, reads = self.lookup('hello-world')
+        self.assertEqual((item.id, reads), (self.post.id, 1))
+
+    def test_unknown_slug_is_no_read(self):
+        self.assertEqual(self.lookup('no-such-post'), (None, 0))
+
+    def test_index_follows_renames_and_unpublishing(self):
+        self.post.slug = 'renamed'
+        self.post.save()
+        self.assertEqual(self.lookup('hello-world'), (None, 0))
+        self.assertEqual(self.lookup('renamed')[0].id, self.post.id)
+        self.post.is_published = False
+        self.post.save()
+        self.assertEqual(self.lookup('renamed'), (None, 0))
+
+    def test_a_miss_behind_the_index_is_remembered(self):
+        # Deleted without the signals, as when another worker's index copy is behind
+        Model.delete(self.post)
+        self.assertEqual(self.lookup('hello-world'), (None, 1))
+        self.assertEqual(self.lookup('hello-world'), (None, 0))
+        self.assertTrue(cache.get(slugs.miss_key('post', 'hello-world')))
+
+    def test_publishing_forgets_the_miss(self):
+        cache.set(slugs.miss_key('post', 'hello-world'), True)
+        self.assertEqual(self.lookup('hello-world'), (None, 0))
+        self.post.save()
+        self.assertEqual(self.lookup('hello-world')[0].id, self.post.id)
+
+    def test_detail_view(self):
+        self.assertEqual(self.client.get('/api/v1/posts/hello-world/').json()['title'], 'Hello World')
+        self.assertEqual(self.client.get('/api/v1/posts/no-such-post/').status_code, 404)
@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.conf import settings
+from django.core.files.base import ContentFile
+from storages.backends.s3 import S3Storage
+from ..storage import ContentHashedS3Storage, publish_static
+from .s3 import BUCKET, S3TestCase
+
+CSS = b'body { color: #333; font-family: sans-serif }\n' * 20
+
+
+class ContentHashedStorageTests(S3TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = ContentHashedS3Storage(bucket_name=BUCKET, default_acl=None)
+
+    def digest(self, data):
+        return hashlib.sha256(data).hexdigest()[:32]
+
+    def test_named_by_content(self):
+        name = self.storage.save('posts/My Photo.JPG', ContentFile(b'pixels'))
+        self.assertEqual(name, f'posts/{self.digest(b"pixels")}.jpg')
+        head = self.s3.head_object(Bucket=BUCKET, Key=name)
+        self.assertEqual(head['CacheControl'], settings.MEDIA_CACHE_CONTROL)
+        self.assertEqual(self.s3.get_object(Bucket=BUCKET, Key=name)['Body'].read(), b'pixels')
+
+    def test_extensions(self):
+        digest = self.digest(b'x')
+        for name, expected in (
+            ('bio/resume/CV.PDF', f'bio/resume/{digest}.pdf'),
+            ('posts/archive.tar.gz', f'posts/{digest}.gz'),
+            ('posts/README', f'posts/{digest}'),
+        ):
+            self.assertEqual(self.storage.save(name, ContentFile(b'x')), expected)
+
+    def test_identical_content_is_stored_once(self):
+        first = self.storage.save('posts/a.png', ContentFile(b'same'))
+        with mock.patch.object(S3Storage, '_save') as upload:
+            second = self.storage.save('posts/b.png', ContentFile(b'same'))
+        self.assertEqual(second, first)
+        upload.assert_not_called()
+        self.assertEqual(self.keys(), [first])
+        # Different bytes get their own object
+        self.assertNotEqual(self.storage.save('posts/a.png', ContentFile(b'other')), first)
+
+
+class PublishStaticTests(S3TestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.write('css/app.css', CSS)
+        self.write('css/app.0123abcd.css', CSS)
+        self.write('img/logo.png', b'\x89PNG not compressible')
+        self.write('staticfiles.json', b'{"paths": {"css/app.css": "css/app.0123abcd.css"}}' * 10)
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    def publish(self):
+        return publish_static(self.root, {'css/app.0123abcd.css'}, 'static/', workers=2,
+                              manifest_name='staticfiles.json')
+
+    def head(self, name):
+        return self.s3.head_object(Bucket=BUCKET, Key=f'static/{name}')
+
+    def test_headers(self):
+        self.assertEqual(self.publish(), {'uploaded': 4, 'unchanged': 0})
+        hashed, original, manifest, logo = (
+            self.head(name) for name in ('css/app.0123abcd.css', 'css/app.css', 'staticfiles.json', 'img/logo.png')
+        )
+        self.assertEqual(hashed['CacheControl'], settings.STATIC_CACHE_CONTROL)
+        self.assertIn('immutable', hashed['CacheControl'])
+        self.assertEqual(original['CacheControl'], settings.STATIC_UNHASHED_CACHE_CONTROL)
+        self.assertEqual(manifest['CacheControl'], 'no-cache')
+
+        self.assertEqual((hashed['ContentEncoding'], hashed['ContentType']), ('gzip', 'text/css'))
+        body = self.s3.get_object(Bucket=BUCKET, Key='static/css/app.0123abcd.css')['Body'].read()
+        self.assertEqual(gzip.decompress(body), CSS)
+        self.assertNotIn('ContentEncoding', logo)  # Already compressed
+
+    def test_unchanged_files_are_skipped(self):
+        self.publish()
+        self.assertEqual(self.publish(), {'uploaded': 0, 'unchanged': 4})
+        self.write('css/app.css', CSS + b'p { margin: 0 }')
+        self.assertEqual(self.publish(), {'uploaded': 1, 'unchanged': 3})
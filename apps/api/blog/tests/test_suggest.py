@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase
+from ..suggest import SuggestIndex, normalize
+
+
+def rec(kind, item_id, title, terms=None):
+    return {'type': kind, 'id': item_id, 'slug': item_id, 'title': title, 'terms': terms}
+
+
+class NormalizeTests(SimpleTestCase):
+    def test_keeps_language_punctuation(self):
+        self.assertEqual(normalize('C++'), 'c++')
+        self.assertEqual(normalize('C#'), 'c#')
+        self.assertEqual(normalize('Node.js'), 'node.js')
+
+    def test_lowercases_and_splits_on_other_characters(self):
+        self.assertEqual(normalize('Running  Django, fast!'), 'running django fast')
+        self.assertEqual(normalize('book_reviews'), 'book reviews')
+
+
+class SuggestIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = SuggestIndex([
+            rec('post', 'p1', 'Running Django fast', ['tag', ['tech']]),
+            rec('post', 'p2', 'Dune', ['tag', ['book_reviews']]),
+            rec('post', 'p3', 'Deploying Django', ['tag', ['tech']]),
+            rec('project', 'r1', 'Compiler', ['stack', ['C++', 'Django']]),
+            rec('project', 'r2', 'Game engine', ['stack', ['C#']]),
+            rec('video', 'v1', 'Dancing'),
+        ])
+
+    def texts(self, prefix, **kwargs):
+        return [suggestion['text'] for suggestion in self.index.complete(prefix, **kwargs)]
+
+    def test_matches_the_start_of_any_title_word(self):
+        self.assertEqual(self.texts('dja'), ['Deploying Django', 'Django', 'Running Django fast'])
+        self.assertEqual(self.texts('fast'), ['Running Django fast'])
+        self.assertEqual(self.texts('unrelated'), [])
+
+    def test_heavier_suggestions_come_first_then_alphabetical(self):
+        self.assertEqual(self.texts('te'), ['Tech'])
+        self.assertEqual(self.index.complete('te')[0]['weight'], 2)
+        self.assertEqual(self.texts('d'), ['Dancing', 'Deploying Django', 'Django', 'Dune', 'Running Django fast'])
+
+    def test_limit(self):
+        self.assertEqual(self.texts('d', limit=2), ['Dancing', 'Deploying Django'])
+
+    def test_empty_prefix(self):
+        self.assertEqual(self.index.complete(''), [])
+        self.assertEqual(self.index.complete('!!'), [])
+
+    def test_tags_show_their_label_with_the_stored_value(self):
+        self.assertEqual(self.index.complete('book'), [
+            {'text': 'Book Reviews', 'type': 'tag', 'value': 'book_reviews', 'weight': 1},
+        ])
+        self.assertEqual(self.texts('rev'), ['Book Reviews'])
+
+    def test_stack_technologies_are_shown_as_stored(self):
+        self.assertEqual(self.index.complete('c#'), [{'text': 'C#', 'type': 'stack', 'value': 'C#', 'weight': 1}])
+        self.assertEqual(self.texts('c+'), ['C++'])
+        self.assertEqual(self.texts('c'), ['C#', 'C++', 'Compiler'])
+
+    def test_round_trips_through_bytes(self):
+        restored = SuggestIndex.from_bytes(self.index.to_bytes())
+        self.assertEqual(restored.complete('d'), self.index.complete('d'))
+
+    def test_with_record_and_without(self):
+        index = self.index.with_record(rec('post', 'p2', 'Dune Messiah', ['tag', ['tech']]))
+        self.assertEqual(self.texts('book'), ['Book Reviews'])
+        self.assertEqual([s['text'] for s in index.complete('book')], [])
+        self.assertEqual(index.complete('tech')[0]['weight'], 3)
+        self.assertEqual([s['text'] for s in index.without('video', 'v1').complete('danc')], [])
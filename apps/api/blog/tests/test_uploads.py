@@ -0,0 +1,163 @@
+import hashlib
+from io import BytesIO
+from unittest import mock
+from botocore.exceptions import ClientError
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+from .. import uploads
+from .s3 import BUCKET, S3TestCase
+
+
+def png():
+    buffer = BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class UploadTests(S3TestCase):
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(User(username='admin', is_staff=True))
+
+    def start(self, **data):
+        return self.api.post('/api/v1/uploads/', dict({
+            'field': 'post.image', 'filename': 'cover.png', 'content_type': 'image/png', 'size': 100,
+        }, **data), format='json')
+
+    def complete(self, key, **data):
+        return self.api.post('/api/v1/uploads/complete/', dict({'field': 'post.image', 'key': key}, **data), format='json')
+
+    def test_presigned_post_then_complete(self):
+        session = self.start().json()
+        self.assertEqual(session['method'], 'post')
+        self.assertRegex(session['key'], r'^posts/[0-9a-f]{32}/cover\.png$')
+        self.assertEqual(session['fields']['Content-Type'], 'image/png')
+        self.put(session['key'], png())  # What the browser's POST stores
+
+        response = self.complete(session['key'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(uploads.key_from_token('post.image', response.json()['token']), session['key'])
+
+    def test_identical_content_is_not_uploaded_again(self):
+        body = png()
+        digest = hashlib.sha256(body).hexdigest()
+        first = self.start(sha256=digest).json()
+        self.assertEqual(first['fields']['x-amz-checksum-algorithm'], 'SHA256')
+        self.put(first['key'], body)
+        self.assertEqual(self.start(sha256=digest).json(), {'method': 'exists', 'key': first['key']})
+
+    def test_bad_requests(self):
+        for data, error in (
+            ({'content_type': 'application/pdf'}, 'Only images can be uploaded to this field'),
+            ({'size': 100 * 1024 * 1024 + 1}, 'Files must be between'),
+            ({'size': 0}, 'Files must be between'),
+            ({'field': 'post.title'}, 'post.title is not a file field'),
+            ({'sha256': 'abc'}, 'sha256 must be'),
+        ):
+            response = self.start(**data)
+            self.assertEqual(response.status_code, 400, data)
+            self.assertIn(error, response.json()['error'])
+        # Documents can go to file fields
+        self.assertEqual(self.start(field='bio.resume', content_type='application/pdf').status_code, 201)
+
+    def test_rejected_uploads_are_deleted(self):
+        key = self.start().json()['key']
+        self.put(key, b'not an image')
+        response = self.complete(key)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Uploaded file is not a supported image'})
+        self.assertEqual(self.keys(), [])
+
+    def test_content_hashed_objects_are_kept(self):
+        # It may be content something already uses; check_uploads finds it if not
+        key = 'posts/0123456789abcdef.png'
+        self.put(key, b'not an image')
+        self.assertEqual(self.complete(key).status_code, 400)
+        self.assertEqual(self.keys(), [key])
+
+    @override_settings(DIRECT_UPLOAD_MAX_SIZE=10)
+    def test_oversized_upload_is_rejected(self):
+        key = 'posts/0123456789abcdef0123456789abcdef/cover.png'
+        self.put(key, png())
+        self.assertEqual(self.complete(key).json(), {'error': 'Uploaded file is too large'})
+
+    def test_missing_object(self):
+        response = self.complete('posts/0123456789abcdef0123456789abcdef/cover.png')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Uploaded file not found, please upload it again'})
+
+    def test_key_from_another_field(self):
+        self.assertEqual(self.complete('projects/x.png').json(), {'error': 'Key does not belong to this field'})
+
+    @override_settings(DIRECT_UPLOAD_MULTIPART_THRESHOLD=50, DIRECT_UPLOAD_PART_SIZE=5 * 1024 * 1024)
+    def test_multipart(self):
+        session = self.start(size=6 * 1024 * 1024).json()
+        self.assertEqual(session['method'], 'multipart')
+        self.assertEqual([part['part_number'] for part in session['parts']], [1, 2])
+        body = png() + b'\0' * (6 * 1024 * 1024)
+        etags = []
+        for number, chunk in ((1, body[:5 * 1024 * 1024]), (2, body[5 * 1024 * 1024:])):
+            part = self.s3.upload_part(Bucket=BUCKET, Key=session['key'], UploadId=session['upload_id'],
+                                       PartNumber=number, Body=chunk)
+            etags.append({'part_number': number, 'etag': part['ETag']})
+
+        # Wrong ETags, or parts S3 can't make sense of, are the client's mistake
+        with self.assertLogs('blog.uploads', 'WARNING'):
+            response = self.complete(session['key'], upload_id=session['upload_id'],
+                                     parts=[etags[0], dict(etags[1], etag='"wrong"')])
+        self.assertEqual(response.status_code, 400)
+        response = self.complete(session['key'], upload_id=session['upload_id'], parts=[{'part': 1}])
+        self.assertEqual(response.status_code, 400)
+        # An expired upload id (moto can't answer NoSuchUpload itself)
+        expired = ClientError({'Error': {'Code': 'NoSuchUpload'}, 'ResponseMetadata': {'HTTPStatusCode': 404}},
+                              'CompleteMultipartUpload')
+        with mock.patch.object(uploads.get_s3_client(), 'complete_multipart_upload', side_effect=expired), \
+                self.assertLogs('blog.uploads', 'WARNING'):
+            self.assertEqual(self.complete(session['key'], upload_id='expired', parts=etags).status_code, 400)
+
+        response = self.complete(session['key'], upload_id=session['upload_id'], parts=list(reversed(etags)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['size'], len(body))
+
+    def test_abort(self):
+        upload = self.s3.create_multipart_upload(Bucket=BUCKET, Key='posts/a/b.png')
+        response = self.api.post('/api/v1/uploads/abort/', {
+            'field': 'post.image', 'key': 'posts/a/b.png', 'upload_id': upload['UploadId'],
+        }, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.s3.list_multipart_uploads(Bucket=BUCKET).get('Uploads', []), [])
+
+    def test_admins_only(self):
+        for client in (APIClient(), APIClient()):
+            for path in ('/api/v1/uploads/', '/api/v1/uploads/complete/', '/api/v1/uploads/abort/'):
+                self.assertEqual(client.post(path, {}, format='json').status_code, 403)
+            client.force_authenticate(User(username='reader'))
+
+
+class UploadTokenTests(S3TestCase):
+    def token(self, field='post.image', key='posts/a/b.png'):
+        return uploads.signing.dumps({'field': field, 'key': key}, salt=uploads.TOKEN_SALT)
+
+    def test_valid(self):
+        self.assertEqual(uploads.key_from_token('post.image', self.token()), 'posts/a/b.png')
+
+    def test_tampered(self):
+        token = self.token()
+        forged = uploads.signing.dumps({'field': 'post.image', 'key': 'posts/other.png'}, salt='elsewhere')
+        for value in (token[:-1] + ('A' if token[-1] != 'A' else 'B'), forged, 'garbage'):
+            with self.assertRaisesMessage(ValidationError, 'Upload could not be verified'):
+                uploads.key_from_token('post.image', value)
+
+    def test_other_field(self):
+        with self.assertRaisesMessage(ValidationError, 'Upload belongs to a different field'):
+            uploads.key_from_token('project.image', self.token())
+
+    def test_expired(self):
+        token = self.token()
+        with override_settings(DIRECT_UPLOAD_EXPIRES=-1):
+            with self.assertRaisesMessage(ValidationError, 'Upload could not be verified'):
+                uploads.key_from_token('post.image', token)
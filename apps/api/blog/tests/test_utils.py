@@ -0,0 +1,66 @@
+from unittest import mock
+from django.test import override_settings
+from .. import utils
+from .s3 import S3TestCase
+
+
+class SignedUrlCacheTests(S3TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(utils, '_signed_urls', utils.OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client = utils.get_s3_client()
+        presign = mock.patch.object(client, 'generate_presigned_url', wraps=client.generate_presigned_url)
+        self.presign = presign.start()
+        self.addCleanup(presign.stop)
+        self.now = 1_000_000.0
+        clock = mock.patch.object(utils, 'time', mock.Mock(time=lambda: self.now))
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_signs_each_distinct_key_once(self):
+        urls = utils.sign_many(['a.jpg', 'b.jpg', 'a.jpg', '', None], expiration=3600)
+        self.assertEqual(list(urls), ['a.jpg', 'b.jpg'])
+        self.assertIn('a.jpg', urls['a.jpg'])
+        self.assertEqual(self.presign.call_count, 2)
+
+    def test_second_call_reuses_the_cached_url(self):
+        first = utils.sign_many(['a.jpg'], expiration=3600)
+        self.now += 60
+        second = utils.sign_many(['a.jpg'], expiration=3600)
+        self.assertEqual(second, first)
+        self.assertEqual(self.presign.call_count, 1)
+
+    def test_lifetimes_are_cached_separately(self):
+        utils.sign_many(['a.jpg'], expiration=3600)
+        utils.sign_many(['a.jpg'], expiration=600)
+        self.assertEqual(self.presign.call_count, 2)
+
+    @override_settings(SIGNED_URL_CACHE_MARGIN=300)
+    def test_resigns_near_expiry(self):
+        utils.sign_many(['a.jpg'], expiration=3600)
+        self.now += 3600 - 301
+        utils.sign_many(['a.jpg'], expiration=3600)
+        self.assertEqual(self.presign.call_count, 1)
+        self.now += 2
+        utils.sign_many(['a.jpg'], expiration=3600)
+        self.assertEqual(self.presign.call_count, 2)
+
+    @override_settings(SIGNED_URL_CACHE_SIZE=2)
+    def test_evicts_least_recently_used(self):
+        utils.sign_many(['a.jpg', 'b.jpg'], expiration=3600)
+        utils.sign_many(['a.jpg'], expiration=3600)  # b.jpg is now the oldest
+        utils.sign_many(['c.jpg'], expiration=3600)
+        self.assertEqual([key for _, key, _ in utils._signed_urls], ['a.jpg', 'c.jpg'])
+
+        utils.sign_many(['a.jpg'], expiration=3600)
+        self.assertEqual(self.presign.call_count, 3)
+        utils.sign_many(['b.jpg'], expiration=3600)
+        self.assertEqual(self.presign.call_count, 4)
+
+    def test_failures_are_not_cached(self):
+        self.presign.side_effect = RuntimeError('no credentials')
+        with self.assertLogs('blog.utils', 'WARNING'):
+            self.assertEqual(utils.sign_many(['a.jpg'], expiration=3600), {'a.jpg': None})
+        self.assertEqual(len(utils._signed_urls), 0)
@@ -0,0 +1,132 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from .. import warmup
+from ..pynamo_models import Bio, Post, Project
+from ..response_cache import request_key
+from .dynamo import DynamoTestCase, post
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True, RESPONSE_CACHE_SECONDS=3600)
+class WarmUpTests(DynamoTestCase):
+    def setUp(self):
+        super().setUp()
+        Bio(about='About').save()
+        self.post = post(['django'], title='Warm Post')
+        Project(title='Warm Project', description='A project', stack=['python']).save()
+
+    def test_warmed_responses_are_served_without_dynamodb(self):
+        warmed = warmup.warm_up()
+        self.assertGreaterEqual(warmed, len(warmup.LIST_PATHS) + 4)  # Lists, 2 variants, 2 detail pages
+
+        failing = mock.Mock(side_effect=AssertionError('read DynamoDB'))
+        with mock.patch.object(Post, 'scan', failing), mock.patch.object(Post, 'get', failing), \
+                mock.patch.object(Post, 'batch_get', failing), mock.patch.object(Project, 'scan', failing):
+            for path in ('/api/v1/posts/', '/api/v1/posts/?tag=django', '/api/v1/projects/?stack=python',
+                         '/api/v1/posts/warm-post/', '/api/v1/projects/warm-project/'):
+                with self.subTest(path=path):
+                    self.assertEqual(self.client.get(path).status_code, 200)
+
+    def test_fetch_runs_the_view(self):
+        self.assertEqual([item['title'] for item in warmup.fetch('/api/v1/posts/', {'tag': 'django'})], ['Warm Post'])
+        self.assertIsNone(warmup.fetch('/api/v1/posts/no-such-post/'))
+
+    def test_requests_have_the_cache_keys_of_real_ones(self):
+        request = Request(warmup.warm_up_request('/api/v1/posts/', {'tag': 'django', 'month': '2025-01'}))
+        self.assertEqual(request.method, 'GET')
+        self.assertEqual(request_key(request), '/api/v1/posts/?month=2025-01&tag=django')
+
+
+@override_settings(WARMUP_ENABLED=True)
+class ReadinessTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.workers_dir = os.path.join(directory, 'workers')
+        for patcher in (
+            mock.patch.object(warmup, 'workers_dir', return_value=self.workers_dir),
+            mock.patch.object(warmup, '_boot_done', None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        warm_up = mock.patch.object(warmup, 'warm_up', side_effect=lambda: self.release.wait(5))
+        warm_up.start()
+        self.addCleanup(warm_up.stop)
+
+    def sibling(self):
+        """A live process registered as a sibling worker still warming up"""
+        process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        open(os.path.join(self.workers_dir, str(process.pid)), 'w').close()
+        return process
+
+    def boot(self):
+        warmup.start_boot_warm_up()
+        self.addCleanup(warmup._boot_done.wait, 5)
+
+    def test_ready_without_a_boot_warm_up(self):
+        self.assertTrue(warmup.is_ready())
+
+    def test_not_ready_until_this_workers_warm_up_finishes(self):
+        self.boot()
+        self.assertFalse(warmup.is_ready())
+        self.assertEqual(warmup.warming_workers(), [os.getpid()])
+        self.release.set()
+        warmup._boot_done.wait(5)
+        self.assertTrue(warmup.is_ready())
+        self.assertEqual(os.listdir(self.workers_dir), [])
+
+    def test_not_ready_while_a_sibling_is_warming_up(self):
+        self.boot()
+        sibling = self.sibling()
+        self.release.set()
+        warmup._boot_done.wait(5)
+        self.assertFalse(warmup.is_ready())
+
+        os.remove(os.path.join(self.workers_dir, str(sibling.pid)))
+        self.assertTrue(warmup.is_ready())
+
+    def test_siblings_that_died_are_ignored(self):
+        self.boot()
+        sibling = self.sibling()
+        sibling.kill()
+        sibling.wait()
+        self.release.set()
+        warmup._boot_done.wait(5)
+        self.assertTrue(warmup.is_ready())
+
+    def test_ready_endpoint(self):
+        self.boot()
+        self.assertEqual(self.client.get('/ready/').status_code, 503)
+        self.release.set()
+        warmup._boot_done.wait(5)
+        self.assertEqual(self.client.get('/ready/').json(), {'ready': True})
+
+
+class ScheduleWarmUpTests(SimpleTestCase):
+    def test_concurrent_schedules_queue_one_warm_up(self):
+        release = threading.Event()
+        warmup._executor.submit(release.wait, 5)  # Keeps the queued warm-up waiting
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            threads = [threading.Thread(target=warmup.schedule_warm_up) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            release.set()
+            warmup._executor.submit(lambda: None).result()
+        self.assertEqual(warm_up.call_count, 1)
+
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            warmup.schedule_warm_up()
+            warmup._executor.submit(lambda: None).result()
+        self.assertEqual(warm_up.call_count, 1)
@@ -0,0 +1,254 @@
+"""
+Direct browser-to-S3 uploads for the admin.
+
+The admin widget asks the API for a presigned POST (small files) or a
+multipart-upload session (large files), sends the bytes straight to S3 and
+then asks the API to verify the object. Gunicorn workers never stream file
+contents. The verified key goes back into the admin form as a signed token,
+so a form can only reference objects that went through verification.
+"""
+
+import base64
+import logging
+import math
+import os
+import re
+import uuid
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.utils.text import get_valid_filename
+from .storage import HASH_LENGTH
+from .utils import get_s3_client
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SALT = 'blog.uploads'
+
+
+def get_file_field(field_spec):
+    """Resolve 'post.image' style specs to the blog model's FileField"""
+    try:
+        model_name, field_name = field_spec.split('.')
+        field = apps.get_model('blog', model_name)._meta.get_field(field_name)
+    except (ValueError, LookupError):
+        raise ValidationError(f'Unknown upload field: {field_spec}')
+    if not isinstance(field, models.FileField):
+        raise ValidationError(f'{field_spec} is not a file field')
+    return field
+
+
+def is_image_field(field):
+    return isinstance(field, models.ImageField)
+
+
+def object_params():
+    """
+    S3 parameters every uploaded object gets, matching the storage backend.
+    Keys are unique per upload and never rewritten, so they're immutable too.
+    """
+    params = dict(settings.AWS_S3_OBJECT_PARAMETERS, CacheControl=settings.MEDIA_CACHE_CONTROL)
+    if settings.AWS_DEFAULT_ACL:
+        params.setdefault('ACL', settings.AWS_DEFAULT_ACL)
+    return params
+
+
+def new_key(field, filename, sha256=None):
+    """
+    Object key under the field's upload_to prefix: content-addressed like
+    blog.storage.ContentHashedS3Storage when the browser sent the file's
+    SHA-256, otherwise unique per upload
+    """
+    if sha256:
+        extension = os.path.splitext(filename)[1].lower()
+        return f'{field.upload_to}{sha256[:HASH_LENGTH]}{extension}'
+    name = get_valid_filename(os.path.basename(filename)) or 'upload'
+    return f'{field.upload_to}{uuid.uuid4().hex}/{name}'
+
+
+def is_unique_key(field, key):
+    """
+    Whether `key` was made for a single upload (new_key() without a hash),
+    so no stored content can share it. Content-hashed keys may be in use.
+    """
+    return re.fullmatch(rf'{re.escape(str(field.upload_to))}[0-9a-f]{{32}}/[^/]+', key) is not None
+
+
+def is_client_error(error):
+    """A 4xx from S3: the request named something wrong (upload id, parts, key)"""
+    return 400 <= error.response['ResponseMetadata']['HTTPStatusCode'] < 500
+
+
+def object_exists(key):
+    client = get_s3_client()
+    try:
+        client.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key)
+        return True
+    except client.exceptions.ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return False
+        raise
+
+
+def start_upload(field_spec, filename, content_type, size, sha256=None):
+    """
+    Create an upload session for one file
+
+    Returns:
+        dict: {'method': 'post', 'key', 'url', 'fields'} for a presigned POST,
+              {'method': 'multipart', 'key', 'upload_id', 'part_size', 'parts'}
+              where each part has a presigned PUT URL, or
+              {'method': 'exists', 'key'} when identical content is already stored
+    """
+    field = get_file_field(field_spec)
+    if sha256 is not None and not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        raise ValidationError('sha256 must be a hex SHA-256 digest')
+    if is_image_field(field) and not content_type.startswith('image/'):
+        raise ValidationError('Only images can be uploaded to this field')
+    if not 0 < size <= settings.DIRECT_UPLOAD_MAX_SIZE:
+        raise ValidationError(f'Files must be between 1 byte and {settings.DIRECT_UPLOAD_MAX_SIZE} bytes')
+
+    client = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    key = new_key(field, filename, sha256)
+    if sha256 and object_exists(key):
+        # Deduplicated: the browser skips straight to completion
+        return {'method': 'exists', 'key': key}
+    params = object_params()
+
+    if size < settings.DIRECT_UPLOAD_MULTIPART_THRESHOLD:
+        fields = {'Content-Type': content_type, 'Cache-Control': params.get('CacheControl', '')}
+        if 'ACL' in params:
+            fields['acl'] = params['ACL']
+        if sha256:
+            # S3 rejects the POST unless the bytes match the hash in the key
+            fields['x-amz-checksum-algorithm'] = 'SHA256'
+            fields['x-amz-checksum-sha256'] = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+        post = client.generate_presigned_post(
+            Bucket=bucket,
+            Key=key,
+            Fields=fields,
+            Conditions=[{name: value} for name, value in fields.items()] + [
+                ['content-length-range', 1, settings.DIRECT_UPLOAD_MAX_SIZE],
+            ],
+            ExpiresIn=settings.DIRECT_UPLOAD_EXPIRES,
+        )
+        return {'method': 'post', 'key': key, 'url': post['url'], 'fields': post['fields']}
+
+    # Presigned parts can't carry a whole-object checksum, so a large file
+    # keeps a unique key rather than one S3 couldn't hold to its content
+    key = new_key(field, filename)
+    upload = client.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type, **params)
+    part_size = settings.DIRECT_UPLOAD_PART_SIZE
+    parts = [
+        {
+            'part_number': number,
+            'url': client.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': bucket, 'Key': key, 'UploadId': upload['UploadId'], 'PartNumber': number},
+                ExpiresIn=settings.DIRECT_UPLOAD_EXPIRES,
+            ),
+        }
+        for number in range(1, math.ceil(size / part_size) + 1)
+    ]
+    return {
+        'method': 'multipart',
+        'key': key,
+        'upload_id': upload['UploadId'],
+        'part_size': part_size,
+        'parts': parts,
+    }
+
+
+def verify_object(field, key):
+    """Check the uploaded object's size and type; images must actually decode"""
+    client = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    try:
+        head = client.head_object(Bucket=bucket, Key=key)
+    except client.exceptions.ClientError as e:
+        if is_client_error(e):
+            raise ValidationError('Uploaded file not found, please upload it again')
+        raise
+    if head['ContentLength'] > settings.DIRECT_UPLOAD_MAX_SIZE:
+        raise ValidationError('Uploaded file is too large')
+
+    if is_image_field(field):
+        from PIL import Image, UnidentifiedImageError
+
+        # The header is enough for Pillow to identify the format and size
+        header = client.get_object(Bucket=bucket, Key=key, Range='bytes=0-65535')['Body'].read()
+        try:
+            Image.open(BytesIO(header))
+        except UnidentifiedImageError:
+            raise ValidationError('Uploaded file is not a supported image')
+    return head
+
+
+def complete_upload(field_spec, key, upload_id=None, parts=None):
+    """
+    Finish a multipart upload if needed, verify the object and return the
+    signed token the admin form accepts. Rejected objects are deleted when
+    this upload created them (unique keys); a content-hashed object may be
+    stored content already, so it is left to `manage.py check_uploads`.
+    """
+    field = get_file_field(field_spec)
+    if not key.startswith(str(field.upload_to)):
+        raise ValidationError('Key does not belong to this field')
+
+    client = get_s3_client()
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    if upload_id:
+        try:
+            parts = [
+                {'PartNumber': int(part['part_number']), 'ETag': str(part['etag'])}
+                for part in parts or []
+            ]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError('parts must be a list of {"part_number", "etag"}')
+        try:
+            client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': sorted(parts, key=lambda part: part['PartNumber'])},
+            )
+        except client.exceptions.ClientError as e:
+            if not is_client_error(e):
+                raise
+            logger.warning('Multipart upload could not be completed', extra={'key': key, 'error': repr(e)})
+            raise ValidationError('Upload could not be completed, please upload the file again')
+
+    try:
+        head = verify_object(field, key)
+    except ValidationError:
+        if is_unique_key(field, key):
+            client.delete_object(Bucket=bucket, Key=key)
+        raise
+
+    token = signing.dumps({'field': field_spec, 'key': key}, salt=TOKEN_SALT)
+    return {'key': key, 'size': head['ContentLength'], 'token': token}
+
+
+def abort_upload(field_spec, key, upload_id):
+    """Discard the parts of a multipart upload the browser gave up on"""
+    field = get_file_field(field_spec)
+    if not key.startswith(str(field.upload_to)):
+        raise ValidationError('Key does not belong to this field')
+    get_s3_client().abort_multipart_upload(
+        Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=key, UploadId=upload_id,
+    )
+
+
+def key_from_token(field_spec, token):
+    """Return the verified key carried by a completion token"""
+    try:
+        data = signing.loads(token, salt=TOKEN_SALT, max_age=settings.DIRECT_UPLOAD_EXPIRES)
+    except signing.BadSignature:
+        raise ValidationError('Upload could not be verified, please upload the file again')
+    if data['field'] != field_spec:
+        raise ValidationError('Upload belongs to a different field')
+    return data['key']
@@ -10,6 +10,8 @@ urlpatterns = [
     
     # Posts
     path('posts/', views.PostListView.as_view(), name='post-list'),
+    path('posts/facets/', views.PostFacetsView.as_view(), name='post-facets'),
+    path('posts/archive/', views.PostArchiveView.as_view(), name='post-archive'),
     path('posts/<slug:slug>/', views.PostDetailView.as_view(), name='post-detail'),
     
     # Videos
@@ -18,5 +20,18 @@ urlpatterns = [
     
     # Projects
     path('projects/', views.ProjectListView.as_view(), name='project-list'),
+    path('projects/facets/', views.ProjectFacetsView.as_view(), name='project-facets'),
     path('projects/<slug:slug>/', views.ProjectDetailView.as_view(), name='project-detail'),
+    
+    # Search
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('suggest/', views.SuggestView.as_view(), name='suggest'),
+    
+    # Change log, for incremental revalidation
+    path('changes/', views.ChangesView.as_view(), name='changes'),
+    
+    # Direct uploads from the admin
+    path('uploads/', views.UploadStartView.as_view(), name='upload-start'),
+    path('uploads/complete/', views.UploadCompleteView.as_view(), name='upload-complete'),
+    path('uploads/abort/', views.UploadAbortView.as_view(), name='upload-abort'),
 ]
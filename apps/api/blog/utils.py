@@ -1,48 +1,108 @@
-import boto3
+import logging
+import threading
+import time
+from collections import OrderedDict
 from django.conf import settings
-from botocore.exceptions import ClientError
-from datetime import timedelta
+from .deadlines import install as install_deadlines
+
+logger = logging.getLogger(__name__)
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+# (bucket, key, expiration) -> (url, expires_at), least recently used first
+_signed_urls = OrderedDict()
+_signed_urls_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Process-wide S3 client. Clients are thread-safe and costly to build
+    (endpoint data, credential resolution), so every caller shares one.
+    Its calls stop once the request deadline is spent (see blog/deadlines.py);
+    on the request path it only signs URLs, which makes no calls.
+    """
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                # boto3 is slow to import, so only load it once S3 is actually used
+                import boto3
+                from botocore.config import Config
+
+                session = boto3.session.Session(
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID or None,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY or None,
+                    aws_session_token=getattr(settings, 'AWS_SESSION_TOKEN', None) or None,
+                    region_name=settings.AWS_S3_REGION_NAME,
+                )
+                _s3_client = install_deadlines(session.client('s3', config=Config(
+                    signature_version='s3v4',
+                    max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                )))
+    return _s3_client
+
+
+def _sign(key, expiration):
+    """Sign one key, reusing the cached URL until it is close to expiring"""
+    bucket = settings.AWS_STORAGE_BUCKET_NAME
+    cache_key = (bucket, key, expiration)
+    now = time.time()
+
+    with _signed_urls_lock:
+        cached = _signed_urls.get(cache_key)
+        if cached and now < cached[1] - settings.SIGNED_URL_CACHE_MARGIN:
+            _signed_urls.move_to_end(cache_key)
+            return cached[0]
+
+    try:
+        url = get_s3_client().generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': key},
+            ExpiresIn=expiration,
+        )
+    except Exception as e:
+        logger.warning(
+            'Failed to sign S3 URL',
+            extra={'bucket': bucket, 'key': key, 'error': repr(e)},
+        )
+        return None
+
+    with _signed_urls_lock:
+        _signed_urls[cache_key] = (url, now + expiration)
+        _signed_urls.move_to_end(cache_key)
+        while len(_signed_urls) > settings.SIGNED_URL_CACHE_SIZE:
+            _signed_urls.popitem(last=False)
+    return url
+
+
+def sign_many(keys, expiration=None):
+    """
+    Sign several S3 keys at once (e.g. every image in a list response)
+
+    Args:
+        keys: Iterable of S3 object keys; empty values are skipped
+        expiration: URL lifetime in seconds (default: AWS_QUERYSTRING_EXPIRE)
+
+    Returns:
+        dict: key -> signed URL, or None for keys that could not be signed
+    """
+    expiration = expiration or settings.AWS_QUERYSTRING_EXPIRE
+    return {key: _sign(key, expiration) for key in dict.fromkeys(keys) if key}
 
 
 def generate_signed_url(file_field, expiration=3600):
     """
     Generate a signed URL for an S3 file that allows temporary access
-    
+
     Args:
         file_field: Django FileField or ImageField instance
         expiration: URL expiration time in seconds (default: 1 hour)
-    
+
     Returns:
         str: Signed URL or None if error
     """
     if not file_field or not file_field.name:
         return None
-    
-    try:
-        # Create S3 client
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            aws_session_token=getattr(settings, 'AWS_SESSION_TOKEN', None),
-            region_name=settings.AWS_S3_REGION_NAME
-        )
-        
-        # Generate signed URL
-        signed_url = s3_client.generate_presigned_url(
-            'get_object',
-            Params={
-                'Bucket': settings.AWS_STORAGE_BUCKET_NAME,
-                'Key': file_field.name
-            },
-            ExpiresIn=expiration
-        )
-        
-        return signed_url
-        
-    except ClientError as e:
-        print(f"Error generating signed URL: {e}")
-        return None
-    except Exception as e:
-        print(f"Unexpected error generating signed URL: {e}")
-        return None
+
+    return _sign(file_field.name, expiration)
@@ -1,169 +1,432 @@
-from rest_framework import generics, status
+import gzip
+import logging
+import math
+from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.views import APIView
-from django.shortcuts import get_object_or_404
-from django.http import Http404
+from rest_framework.permissions import IsAdminUser
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
 from pynamodb.exceptions import DoesNotExist
+from . import changes, compression, facets, feeds, search, slugs, suggest
+from .artifacts import ArtifactUnavailable
+from .circuit import CircuitOpenError
+from .deadlines import DeadlineExceeded
 from .pynamo_models import Bio, Post, Video, Project
+from .response_cache import cached_response
 from .serializers import (
     BioSerializer, PostSerializer, PostListSerializer,
     VideoSerializer, ProjectSerializer, ProjectListSerializer
 )
 
+logger = logging.getLogger(__name__)
+
+
+def error_response(message, error):
+    """
+    500, or 503 with Retry-After when DynamoDB calls are being shed, time ran
+    out or an index is still loading. The client only gets `message`; the
+    error itself goes to the log (called from the `except` handling it).
+    """
+    if isinstance(error, (ArtifactUnavailable, CircuitOpenError, DeadlineExceeded)):
+        logger.warning('%s: %s', message, error)
+        retry_after = getattr(error, 'retry_after', 1)
+        return Response(
+            {'error': f'{message}: temporarily unavailable, retry later'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={'Retry-After': str(math.ceil(retry_after))}
+        )
+    logger.exception(message)
+    return Response(
+        {'error': message}, 
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
+
+def field_selection(request, serializer_class, *required):
+    """
+    The fields named by ?fields= and ?exclude= (comma-separated), and the model
+    attributes to read for them plus `required` (those the view itself uses).
+    (None, None) when the client wants every field.
+    """
+    fields, exclude = (
+        [name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()]
+        for param in ('fields', 'exclude')
+    )
+    if not fields and not exclude:
+        return None, None
+    names = serializer_class.select(fields, exclude)
+    return names, sorted(serializer_class.attributes(names) | {'id', *required})
+
 
 # Bio Views
 class BioDetailView(APIView):
     """Get the author's bio from DynamoDB"""
     
+    @cached_response
     def get(self, request):
+        fields, attributes = field_selection(request, BioSerializer)
         try:
             # Get the single bio instance using fixed ID
-            bio = Bio.get('author_bio')
-            serializer = BioSerializer(bio)
+            bio = Bio.get('author_bio', attributes_to_get=attributes)
+            serializer = BioSerializer(bio, fields=fields)
             return Response(serializer.data)
         except DoesNotExist:
             return Response(
                 {'error': 'Bio not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        except Exception as e:
+            return error_response('Error fetching bio', e)
 
 
 # Post Views
 class PostListView(APIView):
     """List all published posts from DynamoDB"""
     
+    @cached_response
     def get(self, request):
+        fields, attributes = field_selection(request, PostListSerializer, 'date_published', 'is_published')
         try:
-            # Scan for all published posts
-            posts = []
-            for post in Post.scan(Post.is_published == True):
-                posts.append(post)
-            
-            # Filter by tag if provided
             tag = request.query_params.get('tag', None)
-            if tag:
-                posts = [post for post in posts if tag in post.tags]
+            month = request.query_params.get('month', None)
+            if tag or month:
+                # Ids from the tag/month facets, then one batch read
+                ids = None
+                for facet, value in (('tag', tag), ('month', month)):
+                    if value:
+                        members = facets.members(facet, value)
+                        ids = members if ids is None else ids & members
+                posts = [post for post in Post.batch_get(ids, attributes_to_get=attributes) if post.is_published]
+            else:
+                # Scan for all published posts
+                posts = []
+                for post in Post.scan(Post.is_published == True, attributes_to_get=attributes):
+                    posts.append(post)
             
             # Sort by date_published (newest first)
             posts.sort(key=lambda x: x.date_published, reverse=True)
             
-            serializer = PostListSerializer(posts, many=True)
+            serializer = PostListSerializer(posts, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
-            return Response(
-                {'error': f'Error fetching posts: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return error_response('Error fetching posts', e)
+
+
+class PostFacetsView(APIView):
+    """Tags and months of published posts, with post counts"""
+    
+    @cached_response
+    def get(self, request):
+        try:
+            return Response({'tag': facets.counts('tag'), 'month': facets.counts('month')})
+        except Exception as e:
+            return error_response('Error fetching post facets', e)
+
+
+class PostArchiveView(APIView):
+    """Months with published posts, newest first"""
+    
+    @cached_response
+    def get(self, request):
+        try:
+            months = sorted(facets.counts('month'), key=lambda x: x['value'], reverse=True)
+            return Response([{'month': month['value'], 'count': month['count']} for month in months])
+        except Exception as e:
+            return error_response('Error fetching post archive', e)
 
 
 class PostDetailView(APIView):
     """Get a specific post by slug from DynamoDB"""
     
+    @cached_response
     def get(self, request, slug):
+        fields, attributes = field_selection(request, PostSerializer)
         try:
-            # Scan for post with matching slug and is_published=True
-            for post in Post.scan((Post.slug == slug) & (Post.is_published == True)):
-                serializer = PostSerializer(post)
-                return Response(serializer.data)
+            # Resolve the slug in memory: unknown slugs never reach DynamoDB
+            post = slugs.get_published(Post, 'post', slug, attributes_to_get=attributes)
+            if post is None:
+                return Response(
+                    {'error': 'Post not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
             
-            return Response(
-                {'error': 'Post not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+            serializer = PostSerializer(post, fields=fields)
+            return Response(serializer.data)
         except Exception as e:
-            return Response(
-                {'error': f'Error fetching post: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return error_response('Error fetching post', e)
 
 
 # Video Views
 class VideoListView(APIView):
     """List all published videos from DynamoDB"""
     
+    @cached_response
     def get(self, request):
+        fields, attributes = field_selection(request, VideoSerializer, 'created_at')
         try:
             # Scan for all published videos
             videos = []
-            for video in Video.scan(Video.is_published == True):
+            for video in Video.scan(Video.is_published == True, attributes_to_get=attributes):
                 videos.append(video)
             
             # Sort by created_at (newest first)
             videos.sort(key=lambda x: x.created_at, reverse=True)
             
-            serializer = VideoSerializer(videos, many=True)
+            serializer = VideoSerializer(videos, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
-            return Response(
-                {'error': f'Error fetching videos: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return error_response('Error fetching videos', e)
 
 
 class VideoDetailView(APIView):
     """Get a specific video by slug from DynamoDB"""
     
+    @cached_response
     def get(self, request, slug):
+        fields, attributes = field_selection(request, VideoSerializer)
         try:
-            # Scan for video with matching slug and is_published=True
-            for video in Video.scan((Video.slug == slug) & (Video.is_published == True)):
-                serializer = VideoSerializer(video)
-                return Response(serializer.data)
+            # Resolve the slug in memory: unknown slugs never reach DynamoDB
+            video = slugs.get_published(Video, 'video', slug, attributes_to_get=attributes)
+            if video is None:
+                return Response(
+                    {'error': 'Video not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
             
-            return Response(
-                {'error': 'Video not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+            serializer = VideoSerializer(video, fields=fields)
+            return Response(serializer.data)
         except Exception as e:
-            return Response(
-                {'error': f'Error fetching video: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return error_response('Error fetching video', e)
 
 
 # Project Views
 class ProjectListView(APIView):
     """List all published projects from DynamoDB"""
     
+    @cached_response
     def get(self, request):
+        fields, attributes = field_selection(request, ProjectListSerializer, 'created_at', 'is_published')
         try:
-            # Scan for all published projects
-            projects = []
-            for project in Project.scan(Project.is_published == True):
-                projects.append(project)
+            stack = request.query_params.get('stack', None)
+            if stack:
+                # Ids from the technology facet, then one batch read
+                ids = facets.members('stack', stack)
+                projects = [project for project in Project.batch_get(ids, attributes_to_get=attributes) if project.is_published]
+            else:
+                # Scan for all published projects
+                projects = []
+                for project in Project.scan(Project.is_published == True, attributes_to_get=attributes):
+                    projects.append(project)
             
             # Sort by created_at (newest first)
             projects.sort(key=lambda x: x.created_at, reverse=True)
             
-            serializer = ProjectListSerializer(projects, many=True)
+            serializer = ProjectListSerializer(projects, many=True, fields=fields)
             return Response(serializer.data)
         except Exception as e:
-            return Response(
-                {'error': f'Error fetching projects: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+            return error_response('Error fetching projects', e)
+
+
+class ProjectFacetsView(APIView):
+    """Technologies used by published projects, with project counts"""
+    
+    @cached_response
+    def get(self, request):
+        try:
+            return Response({'stack': facets.counts('stack')})
+        except Exception as e:
+            return error_response('Error fetching project facets', e)
 
 
 class ProjectDetailView(APIView):
     """Get a specific project by slug from DynamoDB"""
     
+    @cached_response
     def get(self, request, slug):
+        fields, attributes = field_selection(request, ProjectSerializer)
         try:
-            # Scan for project with matching slug and is_published=True
-            for project in Project.scan((Project.slug == slug) & (Project.is_published == True)):
-                serializer = ProjectSerializer(project)
-                return Response(serializer.data)
+            # Resolve the slug in memory: unknown slugs never reach DynamoDB
+            project = slugs.get_published(Project, 'project', slug, attributes_to_get=attributes)
+            if project is None:
+                return Response(
+                    {'error': 'Project not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
             
+            serializer = ProjectSerializer(project, fields=fields)
+            return Response(serializer.data)
+        except Exception as e:
+            return error_response('Error fetching project', e)
+
+
+# Search
+class SearchView(APIView):
+    """Full-text search over published posts, projects and videos (in-memory index)"""
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
             return Response(
-                {'error': 'Project not found'}, 
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'The q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        
+        try:
+            results = search.search(query, limit=max(1, limit), kind=request.query_params.get('type'))
+            return Response({'query': query, 'count': len(results), 'results': results})
+        except Exception as e:
+            return error_response('Error searching', e)
+
+
+class SuggestView(APIView):
+    """Typeahead completions for titles, tags and stack technologies (in-memory index)"""
+    
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', suggest.MAX_RESULTS))
+        except ValueError:
+            limit = suggest.MAX_RESULTS
+        
+        try:
+            results = suggest.suggest(request.query_params.get('q', ''), limit=max(1, limit))
+            return Response({'results': results})
         except Exception as e:
+            return error_response('Error fetching suggestions', e)
+
+
+# Change log
+class ChangesView(APIView):
+    """Items changed, unpublished or deleted since a cursor, oldest first (blog/changes.py)"""
+    
+    def get(self, request):
+        since = request.query_params.get('since', '').strip()
+        if not since:
+            # Start here after fetching everything
+            return Response({'changes': [], 'cursor': changes.current_cursor(), 'has_more': False})
+        try:
+            cursor = changes.parse_since(since)
+        except ValueError:
             return Response(
-                {'error': f'Error fetching project: {str(e)}'}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'since must be a cursor, an ISO 8601 timestamp or a Unix time'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', settings.CHANGES_PAGE_SIZE))
+        except ValueError:
+            limit = settings.CHANGES_PAGE_SIZE
+        
+        try:
+            return Response(changes.changes_since(cursor, max(1, min(limit, settings.CHANGES_MAX_PAGE_SIZE))))
+        except changes.CursorExpired as e:
+            return Response({'error': str(e)}, status=status.HTTP_410_GONE)
+        except Exception as e:
+            return error_response('Error fetching changes', e)
+
+
+# Feeds and sitemap (served at the site root, see config/urls.py)
+@require_safe
+def feed_document(request, name):
+    """A pre-rendered RSS/Atom feed or sitemap, gzip-encoded when the client accepts it"""
+    try:
+        document = feeds.get_document(name)
+    except ArtifactUnavailable as e:
+        response = HttpResponse('Feeds are loading', status=503, content_type='text/plain')
+        response['Retry-After'] = str(e.retry_after)
+        return response
+    if document is None:
+        raise Http404('No such document')
+    
+    accepted = compression.accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    gzipped = accepted.get('gzip', accepted.get('*', 0)) > 0
+    # Each encoding is its own representation, so it gets its own ETag
+    etag = document.etag if gzipped else f'{document.etag[:-1]}-identity"'
+    response = get_conditional_response(request, etag=etag, last_modified=document.last_modified)
+    if response is None:
+        response = HttpResponse(
+            document.body if gzipped else gzip.decompress(document.body),
+            content_type=feeds.content_type(name),
+        )
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    if document.last_modified:
+        response['Last-Modified'] = http_date(document.last_modified)
+    response['Cache-Control'] = settings.FEED_CACHE_CONTROL
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+# Direct upload views (admin only, used by the admin upload widget). They
+# import blog.uploads when called: it loads boto3 and django-storages, which
+# workers serving only the read API never need.
+class UploadStartView(APIView):
+    """Create a presigned POST or multipart-upload session for a browser upload to S3"""
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        from . import uploads
+        try:
+            session = uploads.start_upload(
+                request.data.get('field', ''),
+                request.data.get('filename', ''),
+                request.data.get('content_type', ''),
+                int(request.data.get('size', 0)),
+                request.data.get('sha256') or None,
+            )
+            return Response(session, status=status.HTTP_201_CREATED)
+        except (ValidationError, ValueError) as e:
+            return Response({'error': ' '.join(getattr(e, 'messages', [str(e)]))}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return error_response('Error starting upload', e)
+
+
+class UploadCompleteView(APIView):
+    """Finish a browser upload and verify the object before the admin form may use it"""
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        from . import uploads
+        try:
+            result = uploads.complete_upload(
+                request.data.get('field', ''),
+                request.data.get('key', ''),
+                upload_id=request.data.get('upload_id'),
+                parts=request.data.get('parts'),
             )
+            return Response(result)
+        except ValidationError as e:
+            return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return error_response('Error completing upload', e)
+
+
+class UploadAbortView(APIView):
+    """Discard an unfinished multipart upload"""
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        from . import uploads
+        try:
+            uploads.abort_upload(
+                request.data.get('field', ''),
+                request.data.get('key', ''),
+                request.data.get('upload_id', ''),
+            )
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except ValidationError as e:
+            return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return error_response('Error aborting upload', e)
 
 
 # API Overview
@@ -175,7 +438,10 @@ def api_overview(request):
         'Posts': {
             'List': '/api/v1/posts/',
             'Detail': '/api/v1/posts/{slug}/',
-            'Filter by tag': '/api/v1/posts/?tag={tag}'
+            'Filter by tag': '/api/v1/posts/?tag={tag}',
+            'Filter by month': '/api/v1/posts/?month={YYYY-MM}',
+            'Tag and month counts': '/api/v1/posts/facets/',
+            'Archive': '/api/v1/posts/archive/'
         },
         'Videos': {
             'List': '/api/v1/videos/',
@@ -183,7 +449,13 @@ def api_overview(request):
         },
         'Projects': {
             'List': '/api/v1/projects/',
-            'Detail': '/api/v1/projects/{slug}/'
-        }
+            'Detail': '/api/v1/projects/{slug}/',
+            'Filter by technology': '/api/v1/projects/?stack={technology}',
+            'Technology counts': '/api/v1/projects/facets/'
+        },
+        'Field selection': '?fields={name,...} or ?exclude={name,...} on bio, list and detail endpoints',
+        'Search': '/api/v1/search/?q={query}&type={post|project|video}&limit={n}',
+        'Suggest': '/api/v1/suggest/?q={prefix}&limit={n}',
+        'Changes': '/api/v1/changes/?since={cursor|timestamp}&limit={n}'
     }
     return Response(api_urls)
@@ -0,0 +1,210 @@
+"""
+Response cache warm-up for new workers and after publishing.
+
+A fresh worker (gunicorn's post_worker_init, see gunicorn.conf.py) and every
+content change run the read views for the bio, the first page of each list,
+each tag and technology variant and the WARMUP_DETAIL_PAGES most recent
+detail pages, so their responses are in the response cache
+(blog/response_cache.py) before visitors ask. Requests go through the views
+themselves, so the cache keys are exactly those of real requests. At most
+WARMUP_CONCURRENCY run at once, which bounds the read capacity it uses.
+
+`/ready/` answers 503 until the boot warm-up has finished in this worker
+and in every other live worker of the same gunicorn master, so the load
+balancer, whose health check reaches whichever worker accepts it, only routes
+to an instance once all of its workers are warm. Workers register in a
+directory named after the master's pid (one file per warming worker); a
+worker that hasn't loaded the app yet isn't registered, so readiness can be
+reported a moment before a slow-starting sibling begins its warm-up.
+"""
+
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from django.conf import settings
+from django.dispatch import receiver
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve
+from .signals import content_deleted, content_saved
+
+logger = logging.getLogger(__name__)
+
+LIST_PATHS = [
+    '/api/v1/bio/',
+    '/api/v1/posts/',
+    '/api/v1/posts/facets/',
+    '/api/v1/posts/archive/',
+    '/api/v1/videos/',
+    '/api/v1/projects/',
+    '/api/v1/projects/facets/',
+]
+
+# Lists whose newest items get their detail pages (<list path><slug>/) warmed
+DETAIL_LISTS = ['/api/v1/posts/', '/api/v1/projects/', '/api/v1/videos/']
+
+# None: this process never started a boot warm-up (runserver, manage.py), so it's ready
+_boot_done = None
+
+# One warm-up at a time; a publish burst queues up behind it
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warmup')
+_pending = False
+_pending_lock = threading.Lock()
+
+
+def warm_up_request(path, params=None):
+    """
+    A bare GET of `path` with `params`: the path and query string are all the
+    views and the response cache key on
+    """
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.GET = QueryDict(urlencode(params or {}))
+    request.META.update({'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'REMOTE_ADDR': '127.0.0.1'})
+    return request
+
+
+def fetch(path, params=None):
+    """Run the view for `path` like a request would; returns the response data or None"""
+    match = resolve(path)
+    view = match.func
+    if hasattr(view, 'view_class'):
+        # Unthrottled: warm-up requests mustn't use up a client's rate limit
+        view = view.view_class.as_view(throttle_classes=[])
+    response = view(warm_up_request(path, params), *match.args, **match.kwargs)
+    if response.status_code != 200:
+        return None
+    # Cache hits come back as stored JSON (blog/compression.py), misses as DRF Responses
+    return response.data if hasattr(response, 'data') else json.loads(response.content)
+
+
+def variants():
+    """Query-string variants of the lists: one per tag and per technology"""
+    from . import facets
+
+    paths = []
+    for value in facets.counts('tag'):
+        paths.append(('/api/v1/posts/', {'tag': value['value']}))
+    for value in facets.counts('stack'):
+        paths.append(('/api/v1/projects/', {'stack': value['value']}))
+    return paths
+
+
+def warm_up():
+    """Fill the response cache and the in-memory indexes; returns the number of responses warmed"""
+    from . import feeds, search, slugs, suggest
+
+    started = time.monotonic()
+    for artifact in (slugs.index, search.index, suggest.index, feeds.index):
+        artifact.load()
+
+    def warm(target):
+        path, params = target
+        try:
+            return fetch(path, params)
+        except Exception:
+            logger.warning('Warm-up request failed', extra={'path': path, 'params': params}, exc_info=True)
+            return None
+
+    with ThreadPoolExecutor(max_workers=settings.WARMUP_CONCURRENCY) as pool:
+        lists = dict(zip(LIST_PATHS, pool.map(warm, [(path, None) for path in LIST_PATHS])))
+        targets = variants()
+        for list_path in DETAIL_LISTS:
+            newest = (lists.get(list_path) or [])[:settings.WARMUP_DETAIL_PAGES]
+            targets.extend((f'{list_path}{item["slug"]}/', None) for item in newest)
+        warmed = sum(1 for data in pool.map(warm, targets) if data is not None)
+
+    warmed += sum(1 for data in lists.values() if data is not None)
+    logger.info('Warm-up finished', extra={'responses': warmed, 'seconds': round(time.monotonic() - started, 2)})
+    return warmed
+
+
+def workers_dir():
+    """Where the workers of this gunicorn master (the parent process) register their boot warm-ups"""
+    return os.path.join(tempfile.gettempdir(), f'blog-warmup-{os.getppid()}')
+
+
+def warming_workers():
+    """Pids of the live workers of this master, this one included, whose boot warm-up is still running"""
+    try:
+        names = os.listdir(workers_dir())
+    except FileNotFoundError:
+        return []
+    pids = []
+    for name in names:
+        pid = int(name)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            # Died mid warm-up; its replacement registers itself
+            continue
+        except PermissionError:
+            pass
+        pids.append(pid)
+    return pids
+
+
+def start_boot_warm_up():
+    """Warm up a new worker in the background; /ready/ reports 503 until it's done"""
+    global _boot_done
+    if not settings.WARMUP_ENABLED:
+        return
+    _boot_done = threading.Event()
+    done = _boot_done
+    os.makedirs(workers_dir(), exist_ok=True)
+    marker = os.path.join(workers_dir(), str(os.getpid()))
+    open(marker, 'w').close()
+
+    def run():
+        try:
+            warm_up()
+        except Exception:
+            # A cold worker still serves correctly; don't keep it out of rotation
+            logger.exception('Boot warm-up failed')
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(marker)
+            done.set()
+
+    threading.Thread(target=run, name='warmup-boot', daemon=True).start()
+
+
+def is_ready():
+    """Whether this worker and its live siblings have finished their boot warm-ups"""
+    if _boot_done is None:
+        return True
+    return _boot_done.is_set() and not warming_workers()
+
+
+def schedule_warm_up():
+    """Queue a warm-up unless one is already waiting to run"""
+    global _pending
+    with _pending_lock:
+        if _pending:
+            return
+        _pending = True
+
+    def run():
+        global _pending
+        with _pending_lock:
+            _pending = False
+        try:
+            warm_up()
+        except Exception:
+            logger.exception('Warm-up after publish failed')
+
+    _executor.submit(run)
+
+
+@receiver(content_saved)
+@receiver(content_deleted)
+def warm_up_after_change(sender, item, **kwargs):
+    """Re-warm once the change has retired the cached responses"""
+    if settings.WARMUP_ENABLED and sender.__name__ in ('Bio', 'Post', 'Project', 'Video'):
+        schedule_warm_up()
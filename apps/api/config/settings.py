@@ -12,16 +12,15 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from decouple import config
-import os
-from dotenv import load_dotenv
-import dj_database_url
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Load environment variables from .env file (only import python-dotenv when there is one)
+if (BASE_DIR / '.env').exists():
+    from dotenv import load_dotenv
+    load_dotenv(BASE_DIR / '.env')
+
 # Security Settings
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-_h@8w3@runrjwfg6u2b&kk9+qfq-8f4(x0e!mn6zf=iu!$*a@0')
 DEBUG = config('DEBUG', default=True, cast=bool)
@@ -87,13 +86,13 @@ CORS_ALLOW_METHODS = [
 
 # Application definition
 
+# API-only deployments (e.g. Vercel) can set DJANGO_ADMIN_ENABLED=False so workers
+# skip loading Jazzmin, the admin and its session/message machinery at boot
+ADMIN_ENABLED = config('DJANGO_ADMIN_ENABLED', default=True, cast=bool)
+
 INSTALLED_APPS = [
-    'jazzmin',  # Must be before django.contrib.admin
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
     'django.contrib.staticfiles',
     
     # Third party apps
@@ -108,14 +107,27 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'blog.middleware.RequestDeadlineMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if ADMIN_ENABLED:
+    INSTALLED_APPS = [
+        'jazzmin',  # Must be before django.contrib.admin
+        'django.contrib.admin',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+    ] + INSTALLED_APPS
+    # Sessions must run before auth/messages, which must run before the admin views
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.common.CommonMiddleware'),
+                      'django.contrib.sessions.middleware.SessionMiddleware')
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.clickjacking.XFrameOptionsMiddleware'),
+                      'django.contrib.auth.middleware.AuthenticationMiddleware')
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.clickjacking.XFrameOptionsMiddleware'),
+                      'django.contrib.messages.middleware.MessageMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -215,6 +227,12 @@ REST_FRAMEWORK = {
 
 # Note: CORS settings are configured above in the security section
 
+# Worker boot budget enforced by `manage.py profile_imports`: the median, over
+# several runs, of the summed -X importtime self times. It includes what
+# rest_framework.compat imports because it is installed (markdown, Pygments,
+# PyYAML, requests, psycopg through django.contrib.postgres), about 130 ms.
+IMPORT_TIME_BUDGET_MS = config('IMPORT_TIME_BUDGET_MS', default=650, cast=float)
+
 # AWS S3 Settings
 AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID', default='')
 AWS_SECRET_ACCESS_KEY = config('AWS_SECRET_ACCESS_KEY', default='')
@@ -227,11 +245,20 @@ AWS_S3_OBJECT_PARAMETERS = {
     'CacheControl': 'max-age=86400',
     'ACL': 'public-read',  # Ensure objects are publicly readable
 }
+# Media objects are content-addressed (blog/storage.py), so their bytes never change
+MEDIA_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Collected static files: hashed names never change, the originals and manifest do
+STATIC_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_UNHASHED_CACHE_CONTROL = 'public, max-age=300'
+STATIC_MANIFEST_CACHE_CONTROL = 'no-cache'
 AWS_S3_FILE_OVERWRITE = False  # Don't overwrite files with same name
 AWS_S3_VERIFY = True  # Verify SSL certificates
 AWS_S3_USE_SSL = True  # Use HTTPS
 AWS_QUERYSTRING_AUTH = False  # Use public URLs instead of signed URLs
 AWS_QUERYSTRING_EXPIRE = 3600  # Signed URLs expire in 1 hour
+SIGNED_URL_CACHE_MARGIN = 300  # Re-sign cached URLs 5 minutes before they expire
+SIGNED_URL_CACHE_SIZE = 2048  # Signed URLs kept per worker
+S3_MAX_POOL_CONNECTIONS = config('S3_MAX_POOL_CONNECTIONS', default=16, cast=int)  # Shared S3 client's connection pool
 
 # Storage Settings
 # Check for Pulumi-provided static bucket name (for AWS deployment)
@@ -244,10 +271,20 @@ if STATIC_BUCKET_NAME:
     
     STORAGES = {
         "default": {
-            "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+            "BACKEND": "blog.storage.ContentHashedS3Storage",
         },
         "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+            "BACKEND": "blog.storage.S3ManifestStaticStorage",
+        },
+        # Prebuilt indexes shared by all workers (see blog/artifacts.py)
+        "artifacts": {
+            "BACKEND": "storages.backends.s3.S3Storage",
+            "OPTIONS": {
+                "location": "artifacts",
+                "file_overwrite": True,
+                "default_acl": "private",
+                "object_parameters": {"CacheControl": "no-cache"},
+            },
         },
     }
     # Serve static files directly from S3 URLs
@@ -257,10 +294,20 @@ elif AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY and AWS_STORAGE_BUCKET_NAME:
     # Use S3 for media files if AWS credentials are provided (existing setup)
     STORAGES = {
         "default": {
-            "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+            "BACKEND": "blog.storage.ContentHashedS3Storage",
         },
         "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+            "BACKEND": "blog.storage.S3ManifestStaticStorage",
+        },
+        # Prebuilt indexes shared by all workers (see blog/artifacts.py)
+        "artifacts": {
+            "BACKEND": "storages.backends.s3.S3Storage",
+            "OPTIONS": {
+                "location": "artifacts",
+                "file_overwrite": True,
+                "default_acl": "private",
+                "object_parameters": {"CacheControl": "no-cache"},
+            },
         },
     }
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
@@ -273,6 +320,11 @@ else:
         "staticfiles": {
             "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
         },
+        # Prebuilt indexes shared by all workers (see blog/artifacts.py)
+        "artifacts": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+            "OPTIONS": {"location": BASE_DIR / "artifacts", "allow_overwrite": True},
+        },
     }
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
@@ -280,6 +332,74 @@ else:
 # Static files
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Admin uploads go from the browser straight to S3 whenever S3 is the media storage
+# (see blog/uploads.py). Files at or above the multipart threshold upload in parts.
+DIRECT_UPLOADS_ENABLED = STORAGES['default']['BACKEND'] == 'blog.storage.ContentHashedS3Storage'
+DIRECT_UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+DIRECT_UPLOAD_MULTIPART_THRESHOLD = 16 * 1024 * 1024
+DIRECT_UPLOAD_PART_SIZE = 8 * 1024 * 1024  # S3 requires at least 5 MB per part
+DIRECT_UPLOAD_EXPIRES = 3600  # Lifetime of upload URLs and completion tokens, in seconds
+
+# DynamoDB sync: admin edits to Bio/Post/Video/Project are mirrored into the
+# DynamoDB items the API serves (see blog/sync.py)
+DYNAMODB_SYNC_ENABLED = config('DYNAMODB_SYNC_ENABLED', default=False, cast=bool)
+
+# Responsive image variants generated from uploaded images (see blog/images.py)
+IMAGE_VARIANT_WIDTHS = [320, 640, 960, 1280, 1920]
+IMAGE_VARIANT_FORMATS = ['avif', 'webp']  # Preferred first; skipped if Pillow lacks the codec
+IMAGE_VARIANT_QUALITY = {'avif': 55, 'webp': 75}
+IMAGE_PIPELINE_WORKERS = config('IMAGE_PIPELINE_WORKERS', default=1, cast=int)
+IMAGE_PLACEHOLDER_SIZE = 16  # Longest side of the inline LQIP preview, in pixels
+
+# Prebuilt in-memory indexes (search, ...) are stored in the "artifacts" storage
+# and loaded once per worker, which re-checks for a newer build this often
+ARTIFACT_REFRESH_SECONDS = config('ARTIFACT_REFRESH_SECONDS', default=30, cast=int)
+ARTIFACT_UPDATE_ATTEMPTS = 5  # Tries of an index update that races other writers (see blog/artifacts.py)
+SEARCH_MAX_RESULTS = 50
+RELATED_ITEMS_COUNT = 3  # Related posts/projects stored on each item (see blog/related.py)
+SLUG_NEGATIVE_CACHE_SECONDS = 60  # How long a slug that failed to resolve keeps returning 404 (see blog/slugs.py)
+CHANGE_LOG_RETENTION_DAYS = 90  # Change log entries expire after this; older cursors must refetch (see blog/changes.py)
+CHANGE_LOG_SETTLE_SECONDS = 2  # Newer entries are held back, so a write logged late is never skipped
+CHANGES_PAGE_SIZE = 100
+CHANGES_MAX_PAGE_SIZE = 1000
+
+# Read views are served from the default cache (see blog/response_cache.py):
+# fresh for RESPONSE_CACHE_SECONDS, then stale for up to RESPONSE_CACHE_STALE_SECONDS
+# while one caller refreshes. With a shared CACHES backend the recompute lock
+# is fleet-wide; with the default local-memory cache it is per worker.
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_SECONDS = config('RESPONSE_CACHE_SECONDS', default=30, cast=int)
+RESPONSE_CACHE_STALE_SECONDS = config('RESPONSE_CACHE_STALE_SECONDS', default=300, cast=int)
+RESPONSE_CACHE_LOCK_SECONDS = 10
+RESPONSE_CACHE_LAST_GOOD_SECONDS = 7 * 24 * 3600  # Served with a Warning when recomputing fails
+
+# Cached responses are stored rendered and compressed, so hits are sent without
+# recompressing (see blog/compression.py). Encoding happens once per cache fill,
+# hence the high levels; see `manage.py benchmark_compression`.
+RESPONSE_COMPRESSION_ENABLED = config('RESPONSE_COMPRESSION_ENABLED', default=True, cast=bool)
+RESPONSE_COMPRESSION_MIN_BYTES = 200  # Smaller bodies gain less than the headers cost
+RESPONSE_GZIP_LEVEL = 9
+RESPONSE_BROTLI_QUALITY = 9
+
+# Warm-up of the response cache on worker boot and after publishing (see blog/warmup.py)
+WARMUP_ENABLED = config('WARMUP_ENABLED', default=RESPONSE_CACHE_ENABLED, cast=bool)
+WARMUP_CONCURRENCY = config('WARMUP_CONCURRENCY', default=2, cast=int)  # Concurrent reads, bounds the capacity used
+WARMUP_DETAIL_PAGES = 10  # Newest posts/projects/videos whose detail pages are warmed
+
+# Time budget of a read request for its DynamoDB and S3 calls (see blog/deadlines.py);
+# once spent, views answer from the last good response or with a 503. 0 disables it.
+REQUEST_DEADLINE_SECONDS = config('REQUEST_DEADLINE_SECONDS', default=3.0, cast=float)
+
+# RSS/Atom feeds and sitemap, pre-rendered on publish (see blog/feeds.py). Links
+# point at the frontend, which is expected to proxy /feed.xml, /atom.xml and
+# /sitemap*.xml to this API so crawlers find them on the same host.
+SITE_URL = config('SITE_URL', default='https://cgstewart.dev').rstrip('/')
+FEED_TITLE = 'CG Stewart'
+FEED_DESCRIPTION = 'Posts by CG Stewart'
+FEED_ITEMS_COUNT = 20
+SITEMAP_MAX_URLS = 50000  # Per sitemap file (the protocol's limit); larger sets get a sitemap index
+FEED_CACHE_CONTROL = 'public, max-age=300'
+
 # Jazzmin Admin Theme Configuration
 JAZZMIN_SETTINGS = {
     # Title on the login screen and main admin page
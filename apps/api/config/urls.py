@@ -14,12 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
 from datetime import datetime
+from blog.views import feed_document
 
 # Simple health check view for Vercel
 def health_check(request):
@@ -30,12 +30,27 @@ def health_check(request):
         'database': 'neon-serverless'
     })
 
+# Load balancer readiness: 503 until the boot warm-up of every worker is done (blog/warmup.py)
+def readiness_check(request):
+    from blog.warmup import is_ready
+
+    ready = is_ready()
+    return JsonResponse({'ready': ready}, status=200 if ready else 503)
+
 urlpatterns = [
     path('', health_check, name='health_check'),  # Root endpoint for Vercel
-    path('admin/', admin.site.urls),
+    path('ready/', readiness_check, name='readiness_check'),
     path('api/v1/', include('blog.urls')),
+    # Pre-rendered feeds and sitemap (blog/feeds.py)
+    re_path(r'^(?P<name>feed\.xml|atom\.xml|sitemap(?:-\d+)?\.xml)$', feed_document, name='feed-document'),
 ]
 
+# The admin (and Jazzmin) are only loaded where they are enabled
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
 # Serve media files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
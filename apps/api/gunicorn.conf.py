@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for the Django API
+"""
+
+from decouple import config
+
+bind = '0.0.0.0:8000'
+workers = config('GUNICORN_WORKERS', default=2, cast=int)
+# Also sizes the DynamoDB connection pool (see blog/dynamo_config.py)
+threads = config('GUNICORN_THREADS', default=1, cast=int)
+
+
+def post_fork(server, worker):
+    """Open DynamoDB connections before the new worker accepts requests"""
+    from blog.pynamo_models import warm_up_connections
+
+    warm_up_connections()
+
+
+def post_worker_init(worker):
+    """Warm the response cache once the app is loaded; /ready/ answers 503 until every worker is warm"""
+    from blog.warmup import start_boot_warm_up
+
+    start_boot_warm_up()
@@ -132,11 +132,65 @@ def create_dynamodb_tables():
         }
     )
     
+    # Facets table: aggregates maintained on publish (see blog/facets.py)
+    facets_table = aws.dynamodb.Table(
+        f"{project_name}-facets",
+        name=f"{project_name}-facets-{environment}",
+        billing_mode="PAY_PER_REQUEST",
+        attributes=[
+            aws.dynamodb.TableAttributeArgs(
+                name="pk",
+                type="S"
+            ),
+            aws.dynamodb.TableAttributeArgs(
+                name="sk",
+                type="S"
+            )
+        ],
+        hash_key="pk",
+        range_key="sk",
+        tags={
+            "Environment": environment,
+            "Project": project_name,
+            "Component": "facets"
+        }
+    )
+    
+    # Changes table: log of content saves and deletes (see blog/changes.py)
+    changes_table = aws.dynamodb.Table(
+        f"{project_name}-changes",
+        name=f"{project_name}-changes-{environment}",
+        billing_mode="PAY_PER_REQUEST",
+        attributes=[
+            aws.dynamodb.TableAttributeArgs(
+                name="pk",
+                type="S"
+            ),
+            aws.dynamodb.TableAttributeArgs(
+                name="sk",
+                type="S"
+            )
+        ],
+        hash_key="pk",
+        range_key="sk",
+        ttl=aws.dynamodb.TableTtlArgs(
+            attribute_name="expires_at",
+            enabled=True
+        ),
+        tags={
+            "Environment": environment,
+            "Project": project_name,
+            "Component": "changes"
+        }
+    )
+    
     return {
         "bio": bio_table,
         "posts": posts_table,
         "videos": videos_table,
-        "projects": projects_table
+        "projects": projects_table,
+        "facets": facets_table,
+        "changes": changes_table
     }
 
 # IAM Role for ECS Task
@@ -192,7 +246,9 @@ def create_ecs_task_role(dynamodb_tables, s3_bucket_name):
             bio_table=dynamodb_tables["bio"].arn,
             posts_table=dynamodb_tables["posts"].arn,
             videos_table=dynamodb_tables["videos"].arn,
-            projects_table=dynamodb_tables["projects"].arn
+            projects_table=dynamodb_tables["projects"].arn,
+            facets_table=dynamodb_tables["facets"].arn,
+            changes_table=dynamodb_tables["changes"].arn
         ).apply(lambda args: f"""{{
             "Version": "2012-10-17",
             "Statement": [
@@ -203,16 +259,20 @@ def create_ecs_task_role(dynamodb_tables, s3_bucket_name):
                         "dynamodb:PutItem",
                         "dynamodb:UpdateItem",
                         "dynamodb:DeleteItem",
+                        "dynamodb:ConditionCheckItem",
                         "dynamodb:Query",
                         "dynamodb:Scan",
                         "dynamodb:BatchGetItem",
-                        "dynamodb:BatchWriteItem"
+                        "dynamodb:BatchWriteItem",
+                        "dynamodb:DescribeTable"
                     ],
                     "Resource": [
                         "{args['bio_table']}",
                         "{args['posts_table']}",
                         "{args['videos_table']}",
                         "{args['projects_table']}",
+                        "{args['facets_table']}",
+                        "{args['changes_table']}",
                         "{args['bio_table']}/index/*",
                         "{args['posts_table']}/index/*",
                         "{args['videos_table']}/index/*",
@@ -236,7 +296,8 @@ def create_ecs_task_role(dynamodb_tables, s3_bucket_name):
                         "s3:GetObject",
                         "s3:PutObject",
                         "s3:DeleteObject",
-                        "s3:ListBucket"
+                        "s3:ListBucket",
+                        "s3:AbortMultipartUpload"
                     ],
                     "Resource": [
                         "arn:aws:s3:::{s3_bucket_name}",
@@ -439,6 +500,8 @@ def create_ecs_infrastructure(roles, networking, dynamodb_tables, django_admin_n
             posts_table=dynamodb_tables["posts"].name,
             videos_table=dynamodb_tables["videos"].name,
             projects_table=dynamodb_tables["projects"].name,
+            facets_table=dynamodb_tables["facets"].name,
+            changes_table=dynamodb_tables["changes"].name,
             django_admin_name=django_admin_name,
             django_admin_password=django_admin_password,
             django_admin_email=django_admin_email,
@@ -488,6 +551,14 @@ def create_ecs_infrastructure(roles, networking, dynamodb_tables, django_admin_n
                         "name": "DYNAMODB_PROJECTS_TABLE",
                         "value": "{args['projects_table']}"
                     }},
+                    {{
+                        "name": "DYNAMODB_FACETS_TABLE",
+                        "value": "{args['facets_table']}"
+                    }},
+                    {{
+                        "name": "DYNAMODB_CHANGES_TABLE",
+                        "value": "{args['changes_table']}"
+                    }},
                     {{
                         "name": "DJANGO_ADMIN_NAME",
                         "value": "{args['django_admin_name']}"
@@ -503,6 +574,10 @@ def create_ecs_infrastructure(roles, networking, dynamodb_tables, django_admin_n
                     {{
                         "name": "STATIC_BUCKET_NAME",
                         "value": "{args['s3_bucket_name']}"
+                    }},
+                    {{
+                        "name": "DYNAMODB_SYNC_ENABLED",
+                        "value": "True"
                     }}
                 ]
             }}
@@ -539,7 +614,7 @@ def create_ecs_infrastructure(roles, networking, dynamodb_tables, django_admin_n
             healthy_threshold=2,
             interval=30,
             matcher="200",
-            path="/admin/",  # Django admin as health check
+            path="/ready/",  # 503 until the worker's response cache warm-up is done
             port="traffic-port",
             protocol="HTTP",
             timeout=5,
@@ -698,6 +773,22 @@ def main():
     dynamodb_tables = create_dynamodb_tables()
     networking = create_networking()
     roles = create_ecs_task_role(dynamodb_tables, s3_bucket_name)
+    
+    # The admin uploads files from the browser straight to the media bucket
+    # (presigned POST and multipart PUTs); the multipart client needs the ETags
+    aws.s3.BucketCorsConfiguration(
+        f"{project_name}-media-cors",
+        bucket=s3_bucket_name,
+        cors_rules=[
+            aws.s3.BucketCorsConfigurationCorsRuleArgs(
+                allowed_methods=["POST", "PUT"],
+                allowed_origins=["https://api.byoui.com"],
+                allowed_headers=["*"],
+                expose_headers=["ETag"],
+                max_age_seconds=3600
+            )
+        ]
+    )
     # =============================================================================
     # ECR Repository for Container Images
     # =============================================================================
@@ -886,7 +977,9 @@ def main():
                     "Action": [
                         "s3:GetObject",
                         "s3:GetObjectVersion",
-                        "s3:PutObject"
+                        "s3:PutObject",
+                        "s3:PutObjectAcl",
+                        "s3:ListBucket"
                     ],
                     "Resource": [
                         args['pipeline_bucket_arn'],
@@ -1085,7 +1178,8 @@ def main():
         "bio": dynamodb_tables["bio"].name,
         "posts": dynamodb_tables["posts"].name,
         "videos": dynamodb_tables["videos"].name,
-        "projects": dynamodb_tables["projects"].name
+        "projects": dynamodb_tables["projects"].name,
+        "facets": dynamodb_tables["facets"].name
     })
     # Get domain configuration
     domain_name = config.require("domain_name")
@@ -15,4 +15,4 @@ uv run python manage.py create_admin_user
 
 # Start gunicorn
 echo "Starting gunicorn server..."
-exec uv run gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers 2
+exec uv run gunicorn config.wsgi:application --config gunicorn.conf.py